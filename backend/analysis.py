@@ -0,0 +1,244 @@
+"""
+Text analysis core for PaperIQ: sentence/token model, diagnostics,
+scoring and sentence flagging.
+"""
+import re
+
+from .metrics import NULL_TIMER
+from .sentiment import score_sentiment
+
+# Bump whenever metrics, weights or flagging rules change so cached and
+# archived results are not reused.
+SCORING_VERSION = "1"
+
+# --- utilities (same as prototype heuristics) ---
+SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+')
+WORD_RE = re.compile(r'\b[\w\']+\b')
+CAUSAL_RE = re.compile(r'\b(because|therefore|thus|hence|consequently|so)\b')
+MODAL_VERBS = frozenset({"may", "might", "could", "should", "would"})
+
+
+def split_sentences(text):
+    """
+    Yields (sentence, (start, end)) for each sentence, where the span is the
+    character range of the sentence in `text` and newlines inside the
+    sentence are replaced by spaces.
+    """
+    stripped = text.strip()
+    base = len(text) - len(text.lstrip())
+    pos = 0
+    bounds = [m.span() for m in SENTENCE_BOUNDARY_RE.finditer(stripped)]
+    bounds.append((len(stripped), len(stripped)))
+    for end, next_pos in bounds:
+        piece = stripped[pos:end]
+        sentence = piece.strip()
+        if sentence:
+            start = base + pos + len(piece) - len(piece.lstrip())
+            yield sentence.replace('\n', ' '), (start, start + len(sentence))
+        pos = next_pos
+
+def sentence_stats(sentence):
+    """
+    Per-sentence token statistics.
+    Returns: (lowercased tokens, unique token count, has causal connector, modal verb count)
+    """
+    lowered = sentence.lower()
+    tokens = WORD_RE.findall(lowered)
+    causal = CAUSAL_RE.search(lowered) is not None
+    modal = sum(1 for w in tokens if w in MODAL_VERBS)
+    return tokens, len(set(tokens)), causal, modal
+
+
+class Document:
+    """
+    Sentence and token model of a text, built in a single pass.
+
+    Every metric reads from this instead of re-splitting or re-tokenizing.
+    `spans` are (start, end) character offsets of each sentence in `text`;
+    `token_offsets[i]:token_offsets[i + 1]` is the slice of `words` that
+    belongs to sentence i. `stats` can supply precomputed sentence_stats()
+    results, e.g. from a per-sentence cache.
+    """
+    __slots__ = ('text', 'sentences', 'spans', 'words', 'token_offsets',
+                 'token_counts', 'unique_counts', 'causal', 'modal_counts')
+
+    def __init__(self, text, stats=sentence_stats):
+        self.text = text
+        self.sentences = []
+        self.spans = []
+        self.words = []
+        self.token_offsets = [0]
+        self.token_counts = []
+        self.unique_counts = []
+        self.causal = []
+        self.modal_counts = []
+
+        for sentence, span in split_sentences(text):
+            tokens, unique, causal, modal = stats(sentence)
+            self.sentences.append(sentence)
+            self.spans.append(span)
+            self.words.extend(tokens)
+            self.token_offsets.append(len(self.words))
+            self.token_counts.append(len(tokens))
+            self.unique_counts.append(unique)
+            self.causal.append(causal)
+            self.modal_counts.append(modal)
+
+    def sentence_tokens(self, i):
+        return self.words[self.token_offsets[i]:self.token_offsets[i + 1]]
+
+
+def sentence_split(text):
+    return [sentence for sentence, _span in split_sentences(text)]
+
+def tokenize_words(text):
+    return WORD_RE.findall(text.lower())
+
+def type_token_ratio(words):
+    if not words:
+        return 0.0
+    return len(set(words)) / len(words)
+
+def avg_word_length(words):
+    if not words:
+        return 0.0
+    return sum(len(w) for w in words) / len(words)
+
+def avg_sentence_length(token_counts):
+    if not token_counts:
+        return 0.0
+    return sum(token_counts) / len(token_counts)
+
+def lexical_sophistication(words):
+    if not words:
+        return 0.0
+    long_words = sum(1 for w in words if len(w) > 6)
+    return long_words / len(words)
+
+def coherence_score(token_counts):
+    if not token_counts:
+        return 0.0
+    lens = token_counts
+    mean = sum(lens)/len(lens)
+    var = sum((l-mean)**2 for l in lens)/len(lens)
+    score = max(0.0, 1.0 - (var / (mean+1)**2))
+    return score
+
+def reasoning_proxy(doc):
+    causal = sum(doc.causal)
+    modal = sum(doc.modal_counts)
+    score = (causal / (len(doc.sentences)+1)) - (modal / (len(doc.words)+1))
+    return max(0.0, min(1.0, 0.5 + score))
+
+def structural_features(doc, timer=NULL_TIMER):
+    """Every diagnostic except sentiment; enough for score_paper."""
+    sentences = doc.sentences
+    words = doc.words
+    features = {}
+    features['word_count'] = len(words)
+    features['sentence_count'] = len(sentences)
+    with timer('avg_sentence_len'):
+        features['avg_sentence_len'] = avg_sentence_length(doc.token_counts)
+    with timer('avg_word_len'):
+        features['avg_word_len'] = avg_word_length(words)
+    with timer('ttr'):
+        features['ttr'] = type_token_ratio(words)
+    with timer('lex_soph'):
+        features['lex_soph'] = lexical_sophistication(words)
+    with timer('coherence'):
+        features['coherence'] = coherence_score(doc.token_counts)
+    with timer('reasoning_proxy'):
+        features['reasoning_proxy'] = reasoning_proxy(doc)
+    return features
+
+def compute_features(text, timer=NULL_TIMER):
+    # Sentence splitting and tokenization happen in one pass
+    with timer('split_tokenize'):
+        doc = Document(text)
+    sentences = doc.sentences
+    features = structural_features(doc, timer)
+    
+    # Sentiment: one tokenization pass shared by the document and its sentences
+    with timer('sentiment'):
+        polarity, subjectivity, sentence_scores = score_sentiment(text, sentences)
+    features['sentiment_polarity'] = polarity
+    features['sentiment_subjectivity'] = subjectivity
+    
+    # Sentence-level sentiment
+    sentence_sentiments = [
+        {'text': sentence, 'polarity': p, 'subjectivity': s}
+        for sentence, (p, s) in zip(sentences, sentence_scores)
+    ]
+    
+    return features, doc, sentence_sentiments
+
+def paper_scores(features, minimum=min):
+    """
+    Unrounded (language, coherence, reasoning, composite) scores.
+    `features` may also be a table of columns (e.g. a NumPy structured
+    array) with minimum=np.minimum, scoring every row at once.
+    """
+    lang = 100 * (0.2*minimum(1.0, features['ttr']*1.5) + 0.3*minimum(1.0, features['lex_soph']*3) + 0.5*minimum(1.0, features['avg_word_len']/5))
+    coh = 100 * features['coherence']
+    reason = 100 * features['reasoning_proxy']
+    return lang, coh, reason, 0.4*lang + 0.3*coh + 0.3*reason
+
+def score_paper(features):
+    lang, coh, reason, composite = paper_scores(features)
+    composite = round(composite, 2)
+    return {
+        'language': round(lang,2),
+        'coherence': round(coh,2),
+        'reasoning': round(reason,2),
+        'composite': composite
+    }
+
+# Flagging rules: (key, penalty, reason, suggestion). The key names the
+# rule in API filters; reasons and suggestions are joined in this order.
+FLAG_RULES = (
+    ('long', 1.2, "Sentence is too long and complex",
+     "Split into multiple shorter sentences to improve readability."),
+    ('repetitive', 1.0, "Repetitive vocabulary",
+     "Use synonyms to improve lexical diversity."),
+    ('transitions', 0.5, "Lack of transition words",
+     "Use transition words (e.g., 'because', 'therefore') to improve flow."),
+)
+
+def long_sentence_threshold(overall_features):
+    return max(40, overall_features['avg_sentence_len']*2)
+
+def flag_rules(n_words, unique, causal, long_threshold):
+    """Keys of the FLAG_RULES a sentence breaks, in rule order."""
+    broken = []
+    if not n_words:
+        return broken
+    if n_words > long_threshold:
+        broken.append('long')
+    if unique/n_words < 0.5 and n_words > 10:
+        broken.append('repetitive')
+    if not causal and n_words > 30:
+        broken.append('transitions')
+    return broken
+
+def flag_details(broken):
+    """The flagged-sentence fields (score, reason, suggestion) for a list of broken rule keys."""
+    rules = [rule for rule in FLAG_RULES if rule[0] in broken]
+    neg = 0.0
+    for _key, penalty, _reason, _suggestion in rules:
+        neg += penalty
+    return {
+        "score": neg,
+        "reason": "; ".join(rule[2] for rule in rules),
+        "suggestion": " ".join(rule[3] for rule in rules),
+    }
+
+def sentence_contributions(doc, overall_features):
+    contributions = []
+    long_threshold = long_sentence_threshold(overall_features)
+    for i, s in enumerate(doc.sentences):
+        broken = flag_rules(doc.token_counts[i], doc.unique_counts[i], doc.causal[i], long_threshold)
+        if broken:
+            contributions.append({"sentence": s, **flag_details(broken)})
+            
+    contributions.sort(key=lambda x: x['score'], reverse=True)
+    return contributions
@@ -0,0 +1,152 @@
+"""
+Content-addressed result cache for PaperIQ analyses.
+
+Results are keyed by a hash of the normalized text and the scoring version,
+held in a bounded in-memory LRU, and optionally persisted to a sqlite file
+so they survive restarts. The sqlite tier is bounded too: by row count,
+oldest first, and optionally by age.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_text(text: str) -> str:
+    """Normalization that cannot change analysis results (surrounding whitespace only)."""
+    return text.strip()
+
+
+def cache_key(text: str, version: str) -> str:
+    """Hash of the normalized text and the scoring version."""
+    h = hashlib.sha256(version.encode())
+    h.update(b'\0')
+    h.update(normalize_text(text).encode('utf-8', 'surrogatepass'))
+    return h.hexdigest()
+
+
+# The sqlite tier is trimmed after this many writes (and when it is opened),
+# so it can briefly hold up to this many rows over its limit.
+SWEEP_EVERY = 64
+
+
+class ResultCache:
+    """Thread-safe LRU of serialized results with an optional sqlite tier."""
+
+    def __init__(self, max_entries: int = 256, db_path: Optional[str] = None,
+                 max_disk_entries: int = 10000, max_age: Optional[float] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self.max_age = max_age
+        self._writes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS results '
+                '(key TEXT PRIMARY KEY, body BLOB NOT NULL, created REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS results_created ON results (created)')
+            self._db.commit()
+            with self._lock:
+                self._sweep()
+
+    def get(self, key: str) -> tuple[Optional[bytes], Optional[str]]:
+        """
+        Look up a cached result.
+        Returns: (body, tier) where tier is 'memory', 'disk' or None on a miss
+        """
+        return self._lookup(key, count=True)
+
+    def peek(self, key: str) -> tuple[Optional[bytes], Optional[str]]:
+        """
+        get() without counting the lookup as a hit or miss, for reading back
+        results by analysis id rather than serving a submission.
+        """
+        return self._lookup(key, count=False)
+
+    def _lookup(self, key: str, count: bool):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                if count:
+                    self.memory_hits += 1
+                return body, 'memory'
+            if self._db is not None:
+                row = self._db.execute('SELECT body FROM results WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    body = bytes(row[0])
+                    self._remember(key, body)
+                    if count:
+                        self.disk_hits += 1
+                    return body, 'disk'
+            if count:
+                self.misses += 1
+            return None, None
+
+    def put(self, key: str, body: bytes):
+        """Store a serialized result in memory and, if configured, on disk."""
+        with self._lock:
+            self._remember(key, body)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO results (key, body, created) VALUES (?, ?, ?)',
+                    (key, body, time.time())
+                )
+                self._writes += 1
+                if self._writes % SWEEP_EVERY == 0:
+                    self._sweep()
+                self._db.commit()
+
+    def _sweep(self):
+        """Delete rows older than max_age and the oldest rows beyond max_disk_entries (lock held)."""
+        if self.max_age:
+            self._db.execute('DELETE FROM results WHERE created < ?', (time.time() - self.max_age,))
+        if self.max_disk_entries and self.max_disk_entries > 0:
+            self._db.execute(
+                'DELETE FROM results WHERE key IN '
+                '(SELECT key FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)',
+                (self.max_disk_entries,)
+            )
+        self._db.commit()
+
+    def _remember(self, key: str, body: bytes):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached result from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM results')
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'disk': self._db is not None,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': hits / lookups if lookups else 0.0,
+            }
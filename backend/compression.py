@@ -0,0 +1,138 @@
+"""
+HTTP body compression for the PaperIQ API.
+
+GzipRequestMiddleware inflates request bodies sent with
+`Content-Encoding: gzip` (the Streamlit client compresses large texts)
+before they reach the endpoints, with a cap on the inflated size.
+Responses are compressed with brotli (when the optional `brotli` package
+is installed) or gzip, whichever the client prefers, honouring q-values.
+"""
+import gzip
+import json
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def encoding_weights(accept_encoding: str) -> dict:
+    """Coding -> q-value from an Accept-Encoding header."""
+    weights = {}
+    for item in accept_encoding.lower().split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+    return weights
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick 'br' or 'gzip' from an Accept-Encoding header, or None for identity."""
+    weights = encoding_weights(accept_encoding)
+    wildcard = weights.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best = None
+    best_q = 0.0
+    for name in candidates:
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    weights = encoding_weights(accept_encoding)
+    return weights.get('gzip', weights.get('*', 0.0)) > 0
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class GzipRequestMiddleware:
+    """ASGI middleware that decodes gzip-compressed request bodies."""
+
+    def __init__(self, app, max_size: int = 64 * 1024 * 1024):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        headers = scope['headers']
+        encoding = next((v for k, v in headers if k == b'content-encoding'), None)
+        if encoding is None or encoding.strip().lower() != b'gzip':
+            return await self.app(scope, receive, send)
+
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        parts = []
+        size = 0
+        more_body = True
+        try:
+            while more_body:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                more_body = message.get('more_body', False)
+                data = inflater.decompress(message.get('body', b''), self.max_size - size + 1)
+                size += len(data)
+                if size > self.max_size or inflater.unconsumed_tail:
+                    return await self._reject(send, 413, 'Decompressed request body is too large.')
+                parts.append(data)
+            if not inflater.eof:
+                return await self._reject(send, 400, 'Truncated gzip request body.')
+        except zlib.error:
+            return await self._reject(send, 400, 'Invalid gzip request body.')
+
+        body = b''.join(parts)
+        scope = dict(scope)
+        scope['headers'] = [
+            (k, v) for k, v in headers if k not in (b'content-encoding', b'content-length')
+        ] + [(b'content-length', str(len(body)).encode())]
+        sent = False
+
+        async def inflated_receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            return await receive()
+
+        await self.app(scope, inflated_receive, send)
+
+    @staticmethod
+    async def _reject(send, status, detail):
+        # Same shape as an HTTPException response.
+        body = json.dumps({'detail': detail}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+class NegotiatedGZipMiddleware(GZipMiddleware):
+    """
+    Starlette's GZipMiddleware compresses whenever "gzip" appears in
+    Accept-Encoding, even as `gzip;q=0`; this one leaves responses alone
+    unless the client accepts gzip.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and not accepts_gzip(Headers(scope=scope).get('accept-encoding', '')):
+            return await self.app(scope, receive, send)
+        await super().__call__(scope, receive, send)
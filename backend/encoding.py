@@ -0,0 +1,109 @@
+"""
+Alternative representations of /analyze results.
+
+The compact form references sentences by index and character offsets
+into the submitted text instead of repeating each sentence, and results
+can be serialized as msgpack when the optional `msgpack` package is
+installed. JSON is produced with orjson when it is available.
+"""
+import json
+from typing import Optional
+
+from .analysis import split_sentences
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_TYPE = 'application/json'
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+# Accept ranges that let the client take JSON.
+JSON_RANGES = (JSON_TYPE, 'application/*', '*/*')
+
+
+def loads(body: bytes):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def dumps(data, fmt: str = 'json') -> bytes:
+    if fmt == 'msgpack':
+        return msgpack.packb(data, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def accept_weights(accept: str) -> dict:
+    """Media range -> q-value from an Accept header."""
+    weights = {}
+    for item in accept.lower().split(','):
+        name, *params = item.split(';')
+        q = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name.strip():
+            weights[name.strip()] = q
+    return weights
+
+
+def negotiate_format(accept: str) -> Optional[str]:
+    """
+    'msgpack' if the client prefers it and it is available, else 'json'.
+    None if the client only accepts msgpack and it is not installed, so
+    the caller can answer 406 instead of sending JSON it cannot read.
+    """
+    weights = accept_weights(accept)
+    msgpack_q = max(weights.get(t, 0.0) for t in MSGPACK_TYPES)
+    json_q = max(weights.get(t, 0.0) for t in JSON_RANGES)
+    if msgpack_q > 0 and msgpack_q >= json_q and msgpack is not None:
+        return 'msgpack'
+    if msgpack_q > 0 and json_q == 0:
+        return None
+    return 'json'
+
+
+def media_type(fmt: str) -> str:
+    return MSGPACK_TYPES[0] if fmt == 'msgpack' else JSON_TYPE
+
+
+def compact_result(data: dict, text: str) -> dict:
+    """
+    Rewrite an /analyze result so sentences appear once, as [start, end]
+    offsets into `text`, with per-sentence sentiment as parallel lists and
+    flagged sentences referring to their sentence index.
+    """
+    spans = []
+    index = {}
+    for i, (sentence, span) in enumerate(split_sentences(text)):
+        spans.append(span)
+        index.setdefault(sentence, i)
+    sentiment = data['sentiment_analysis']
+    flagged = []
+    for item in data['top_flagged_sentences']:
+        item = dict(item)
+        item['index'] = index.get(item.pop('sentence'))
+        flagged.append(item)
+    return {
+        'composite': data['composite'],
+        'language': data['language'],
+        'coherence': data['coherence'],
+        'reasoning': data['reasoning'],
+        'diagnostics': data['diagnostics'],
+        'top_flagged_sentences': flagged,
+        'sentences': {
+            'spans': spans,
+            'polarity': [s['polarity'] for s in sentiment],
+            'subjectivity': [s['subjectivity'] for s in sentiment],
+        },
+    }
@@ -0,0 +1,119 @@
+"""
+Execution backend for CPU-bound analysis work.
+
+Keeps heavy regex/sentiment work off the event loop, bounds how many
+analyses may be queued or running at once, and applies a per-request
+timeout so a burst of submissions degrades into fast 503s instead of
+unbounded latency.
+"""
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+MODES = ('inline', 'thread', 'process')
+
+
+class Saturated(Exception):
+    """Raised when the number of pending analyses has reached its limit."""
+
+
+class Slot:
+    """A pending slot reserved by AnalysisExecutor.slot(); release() frees it at most once."""
+
+    def __init__(self, executor):
+        self._executor = executor
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.release()
+
+
+class AnalysisExecutor:
+    """Runs analysis callables inline, on a thread pool, or on a process pool."""
+
+    def __init__(self, mode: str = 'thread', workers: int = 1, max_pending: int = 64,
+                 timeout: Optional[float] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown executor mode {mode!r}; expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pool = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Analyses currently queued or running."""
+        return self._pending
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.mode == 'process':
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='paperiq-analysis')
+        return self._pool
+
+    def acquire(self):
+        """Reserve a pending slot or raise Saturated; pair with release()."""
+        with self._lock:
+            if self.max_pending > 0 and self._pending >= self.max_pending:
+                raise Saturated()
+            self._pending += 1
+
+    def release(self, _future=None):
+        """Free a slot reserved by acquire()."""
+        with self._lock:
+            self._pending -= 1
+
+    def slot(self) -> Slot:
+        """acquire() for work whose end has several exit paths; any of them may call Slot.release()."""
+        self.acquire()
+        return Slot(self)
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) on the configured backend.
+        Raises Saturated when too much work is pending and asyncio.TimeoutError
+        when the result is not ready within the timeout.
+        """
+        self.acquire()
+        if self.mode == 'inline':
+            try:
+                return fn(*args)
+            finally:
+                self.release()
+
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self.release()
+            raise
+        # The slot is freed when the work finishes or is cancelled, not when the
+        # caller gives up: a timeout cancels work that is still queued, but work
+        # that already started keeps counting against the limit until it ends.
+        future.add_done_callback(self.release)
+        return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+
+    def warm_up(self, fn, *args):
+        """
+        Start every worker and run fn(*args) once per worker, outside the
+        pending limit. Process workers forked after the parent has warmed up
+        inherit its loaded state.
+        """
+        if self.mode == 'inline':
+            return
+        pool = self._get_pool()
+        for future in [pool.submit(fn, *args) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
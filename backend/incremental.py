@@ -0,0 +1,95 @@
+"""
+Incremental re-analysis for documents that are edited and re-submitted.
+
+Each session remembers the per-sentence work (token statistics and
+sentiment) for the current version of a document. A new version only
+tokenizes and scores the sentences that changed; document-level metrics
+are then re-aggregated from the cached per-sentence values.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from .analysis import Document, sentence_stats, structural_features
+from .sentiment import SentenceSentiment, fold_document
+
+
+class DocumentSession:
+    """Current text of one document plus its cached per-sentence results."""
+
+    def __init__(self, doc_id: str):
+        self.doc_id = doc_id
+        self.text = ''
+        self.lock = threading.Lock()
+        self._records = {}
+        self._junctions = {}
+
+    def apply_edit(self, start: int, end: int, replacement: str) -> str:
+        """Return the session text with text[start:end] replaced."""
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError(f"Edit range {start}:{end} is outside the document (length {len(self.text)})")
+        return self.text[:start] + replacement + self.text[end:]
+
+    def analyze(self, text: str):
+        """
+        Analyze a new version of the document, reusing unchanged sentences.
+        Returns: (features, doc, sentence_sentiments, recomputed) in the same
+        shape as compute_features() plus the number of sentences recomputed
+        """
+        previous = self._records
+        current = {}
+        recomputed = 0
+
+        def stats(sentence):
+            nonlocal recomputed
+            record = current.get(sentence) or previous.get(sentence)
+            if record is None:
+                record = (sentence_stats(sentence), SentenceSentiment(sentence))
+                recomputed += 1
+            current[sentence] = record
+            return record[0]
+
+        doc = Document(text, stats=stats)
+        features = structural_features(doc)
+        sentiments = [current[s][1] for s in doc.sentences]
+        polarity, subjectivity = fold_document(text, sentiments, self._junctions)
+        features['sentiment_polarity'] = polarity
+        features['sentiment_subjectivity'] = subjectivity
+        sentence_sentiments = [
+            {'text': sentence, 'polarity': r.score[0], 'subjectivity': r.score[1]}
+            for sentence, r in zip(doc.sentences, sentiments)
+        ]
+
+        # Keep only sentences in the latest version so memory tracks document size.
+        self.text = text
+        self._records = current
+        if len(self._junctions) > 2 * len(sentiments) + 64:
+            self._junctions = {}
+        return features, doc, sentence_sentiments, recomputed
+
+
+class SessionStore:
+    """Bounded LRU of document sessions."""
+
+    def __init__(self, max_sessions: int = 128):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, doc_id: Optional[str], create: bool = True) -> Optional[DocumentSession]:
+        """Look up a session, starting a new one (with a fresh id if none given) when allowed."""
+        with self._lock:
+            session = self._sessions.get(doc_id) if doc_id else None
+            if session is None:
+                if not create:
+                    return None
+                session = DocumentSession(doc_id or uuid.uuid4().hex)
+                self._sessions[session.doc_id] = session
+            self._sessions.move_to_end(session.doc_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def __len__(self):
+        return len(self._sessions)
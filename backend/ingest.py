@@ -0,0 +1,280 @@
+"""
+Document ingestion for PaperIQ
+Supports: PDF, DOCX, TXT
+
+Every upload, whether sent to /analyze/file, scored by score_corpus or
+opened in the Streamlit apps (through frontend/document_processor.py),
+goes through one pipeline: detect type -> extract -> clean -> normalize,
+cached by file hash.
+"""
+import hashlib
+import importlib.util
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+from .text_normalizer import default_normalizer
+
+# PDFs with at least this many pages are extracted across a process pool
+# shared by every document; 0 or 1 worker extracts serially.
+PDF_PARALLEL_MIN_PAGES = 40
+PDF_WORKERS = int(os.environ.get("PAPERIQ_PDF_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+
+# Number of ingested documents kept in memory, keyed by file hash.
+INGEST_CACHE_SIZE = 16
+
+# PyPDF2 and python-docx are only imported when a document of that type is
+# first parsed; checking that they are installed does not load them.
+PDF_SUPPORTED = importlib.util.find_spec('PyPDF2') is not None
+DOCX_SUPPORTED = importlib.util.find_spec('docx') is not None
+
+
+def _pdf_reader(file_bytes: bytes):
+    import PyPDF2
+    return PyPDF2.PdfReader(io.BytesIO(file_bytes))
+
+
+def _docx_document(file_bytes: bytes):
+    import docx
+    return docx.Document(io.BytesIO(file_bytes))
+
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+# Set in processes that are themselves pool workers (e.g. score_corpus), so
+# they extract serially instead of each starting a pool of their own.
+_serial_pdf = False
+
+
+def serial_pdf_extraction():
+    """Extract PDF pages in this process only; call from worker-process initializers."""
+    global _serial_pdf
+    _serial_pdf = True
+
+
+def _get_pdf_pool(workers: int) -> ProcessPoolExecutor:
+    """The shared page-extraction pool, started on first use."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Never fork the (multithreaded) Streamlit or uvicorn process.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                            initializer=serial_pdf_extraction)
+        return _pdf_pool
+
+
+# Readers of the files a worker is extracting, most recent last.
+_worker_readers = OrderedDict()
+
+
+def _extract_pages(reader, start: int, stop: int) -> list[tuple[int, str, float]]:
+    pages = []
+    for i in range(start, stop):
+        started = time.perf_counter()
+        text = reader.pages[i].extract_text() or ""
+        pages.append((i + 1, text, time.perf_counter() - started))
+    return pages
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> list[tuple[int, str, float]]:
+    """Worker task: extract pages [start, stop) of the PDF at `path`, opening it once per worker."""
+    reader = _worker_readers.get(path)
+    if reader is None:
+        with open(path, 'rb') as f:
+            reader = _pdf_reader(f.read())
+        _worker_readers[path] = reader
+        while len(_worker_readers) > 2:
+            _worker_readers.popitem(last=False)
+    else:
+        _worker_readers.move_to_end(path)
+    return _extract_pages(reader, start, stop)
+
+
+def iter_pdf_pages(file_bytes: bytes, workers: Optional[int] = None) -> Iterator[tuple[int, str, float]]:
+    """
+    Yield (page_number, text, seconds) for each PDF page, in page order.
+    Large PDFs are split into page ranges extracted on the shared process
+    pool; workers read the PDF from a temporary file.
+    """
+    reader = _pdf_reader(file_bytes)
+    page_count = len(reader.pages)
+    workers = workers or PDF_WORKERS
+
+    if _serial_pdf or workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        for i in range(page_count):
+            yield from _extract_pages(reader, i, i + 1)
+        return
+
+    pool = _get_pdf_pool(workers)
+    chunk = max(1, -(-page_count // (workers * 4)))
+    fd, path = tempfile.mkstemp(suffix='.pdf', prefix='paperiq-')
+    futures = []
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(file_bytes)
+        futures = [pool.submit(_extract_page_range, path, start, min(start + chunk, page_count))
+                   for start in range(0, page_count, chunk)]
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # still open in a worker (Windows); left to the temp directory cleanup
+
+
+def extract_text_from_pdf(file_bytes: bytes, page_timings: Optional[list] = None) -> Optional[str]:
+    """
+    Extract text from PDF file
+    If page_timings is a list, (page_number, seconds) is appended for each page.
+    """
+    if not PDF_SUPPORTED:
+        return None
+    
+    try:
+        pages = []
+        for number, text, seconds in iter_pdf_pages(file_bytes):
+            pages.append(text)
+            if page_timings is not None:
+                page_timings.append((number, seconds))
+        
+        return "\n".join(pages).strip()
+    except Exception as e:
+        print(f"Error extracting PDF: {e}")
+        return None
+
+
+def extract_text_from_docx(file_bytes: bytes) -> Optional[str]:
+    """Extract text from DOCX file"""
+    if not DOCX_SUPPORTED:
+        return None
+    
+    try:
+        doc = _docx_document(file_bytes)
+        
+        text = "\n".join(paragraph.text for paragraph in doc.paragraphs)
+        
+        return text.strip()
+    except Exception as e:
+        print(f"Error extracting DOCX: {e}")
+        return None
+
+
+def extract_text_from_txt(file_bytes: bytes) -> Optional[str]:
+    """Extract text from TXT file"""
+    try:
+        return file_bytes.decode('utf-8')
+    except UnicodeDecodeError:
+        try:
+            return file_bytes.decode('latin-1')
+        except Exception as e:
+            print(f"Error extracting TXT: {e}")
+            return None
+
+
+def detect_file_type(file_name: str, file_bytes: bytes) -> Optional[str]:
+    """Detect 'pdf', 'docx' or 'txt' from the file name, falling back to magic bytes."""
+    name = (file_name or '').lower()
+    for ext in ('pdf', 'docx', 'txt'):
+        if name.endswith('.' + ext):
+            return ext
+    if file_bytes.startswith(b'%PDF'):
+        return 'pdf'
+    if file_bytes.startswith(b'PK') and b'word/' in file_bytes[:4096]:
+        return 'docx'
+    return None
+
+
+def clean_text(text):
+    """
+    Cleans text by replacing common PDF extraction artifacts/ligatures.
+    All rules run in a single pass; see text_normalizer.
+    """
+    return default_normalizer(text)
+
+
+def normalize_text(text: str) -> str:
+    """Unify line endings and drop NUL bytes and surrounding whitespace."""
+    return text.replace('\r\n', '\n').replace('\r', '\n').replace('\x00', '').strip()
+
+
+def iter_text_chunks(file_bytes: bytes, file_type: str) -> Iterator[str]:
+    """Extraction stage: yield raw text one page (PDF) or one document (DOCX/TXT) at a time."""
+    if file_type == 'pdf':
+        for _number, text, _seconds in iter_pdf_pages(file_bytes):
+            yield text
+    elif file_type == 'docx':
+        doc = _docx_document(file_bytes)
+        yield "\n".join(paragraph.text for paragraph in doc.paragraphs)
+    elif file_type == 'txt':
+        text = extract_text_from_txt(file_bytes)
+        if text is None:
+            raise ValueError("Could not decode text file")
+        yield text
+
+
+def clean_chunks(chunks: Iterable[str]) -> Iterator[str]:
+    """Cleaning stage: fix PDF ligatures and typographic artifacts chunk by chunk."""
+    for chunk in chunks:
+        yield clean_text(chunk)
+
+
+_ingest_cache = OrderedDict()
+_ingest_lock = threading.Lock()
+
+
+def ingest_document(file_bytes: bytes, file_name: str) -> tuple[Optional[str], str]:
+    """
+    Run an uploaded file through detect -> extract -> clean -> normalize.
+    Results are cached by file hash, so re-running on the same upload
+    (e.g. a Streamlit rerun) does not parse the file again.
+    Returns: (text, message)
+    """
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    with _ingest_lock:
+        cached = _ingest_cache.get(digest)
+        if cached is not None:
+            _ingest_cache.move_to_end(digest)
+            return cached
+
+    result = _ingest(file_bytes, file_name)
+    if result[0]:
+        with _ingest_lock:
+            _ingest_cache[digest] = result
+            while len(_ingest_cache) > INGEST_CACHE_SIZE:
+                _ingest_cache.popitem(last=False)
+    return result
+
+
+def _ingest(file_bytes: bytes, file_name: str) -> tuple[Optional[str], str]:
+    file_type = detect_file_type(file_name, file_bytes)
+    if file_type is None:
+        return None, f"❌ Unsupported file type. Please upload PDF, DOCX, or TXT files."
+    if file_type == 'pdf' and not PDF_SUPPORTED:
+        return None, "PDF support not available. Install PyPDF2: pip install PyPDF2"
+    if file_type == 'docx' and not DOCX_SUPPORTED:
+        return None, "DOCX support not available. Install python-docx: pip install python-docx"
+
+    label = file_type.upper()
+    try:
+        chunks = iter_text_chunks(file_bytes, file_type)
+        # Ligature artifacts come from PDF text extraction; other formats are kept as typed.
+        if file_type == 'pdf':
+            chunks = clean_chunks(chunks)
+        text = normalize_text("\n".join(chunks))
+    except Exception as e:
+        print(f"Error extracting {label}: {e}")
+        return None, f"❌ Failed to extract text from {label}"
+    if not text:
+        return None, f"❌ Failed to extract text from {label}"
+    return text, f"✅ Extracted {len(text)} characters from {label}"
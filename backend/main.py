@@ -1,147 +1,192 @@
-
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+import asyncio
+import io
+import json
+import os
 import re
-from typing import List
-from textblob import TextBlob
+import threading
+import time
+import weakref
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import List, Optional, Union
+
+from .analysis import (
+    SCORING_VERSION, Document, compute_features, score_paper, sentence_contributions, structural_features
+)
+from .cache import ResultCache, cache_key
+from .compression import GzipRequestMiddleware, NegotiatedGZipMiddleware, compress, negotiate_encoding
+from .encoding import compact_result, dumps, loads, media_type, negotiate_format
+from .executor import AnalysisExecutor, Saturated
+from .incremental import SessionStore
+from .metrics import CONTENT_TYPE, NULL_TIMER, Counter, Gauge, Histogram, Registry, StageTimer, server_timing
+from .reports import FORMATS as REPORT_FORMATS, render_report
+from .sentiment import document_sentiment, iter_sentence_sentiment, load_lexicon
+from .warmup import SAMPLE_DOCUMENT, WarmUp
+from .ingest import detect_file_type, ingest_document
+
+# Run the pipeline on a sample document at startup; /health answers 503
+# "warming" until it has finished. Set to 0 to skip.
+WARMUP = os.environ.get("PAPERIQ_WARMUP", "1").lower() in ("1", "true", "yes")
+
+warmup = WarmUp(enabled=WARMUP)
+
+@asynccontextmanager
+async def lifespan(app):
+    task = asyncio.create_task(asyncio.to_thread(warmup.run, warmup_steps())) if WARMUP else None
+    yield
+    if task is not None and not task.done():
+        task.cancel()
+    analysis_executor.shutdown()
+    report_executor.shutdown()
+    if _batch_pool is not None:
+        _batch_pool.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(title="PaperIQ API", version="0.1", lifespan=lifespan)
+
+# In-memory LRU size and optional sqlite file for the persistent cache tier.
+CACHE_SIZE = int(os.environ.get("PAPERIQ_CACHE_SIZE", "256"))
+CACHE_DB = os.environ.get("PAPERIQ_CACHE_DB") or None
+# Bounds of the sqlite tier: rows kept (oldest removed first) and maximum age in days (0 disables).
+CACHE_DB_MAX_ROWS = int(os.environ.get("PAPERIQ_CACHE_DB_MAX_ROWS", "10000"))
+CACHE_DB_MAX_AGE = float(os.environ.get("PAPERIQ_CACHE_DB_MAX_AGE_DAYS", "0")) * 86400 or None
+
+result_cache = ResultCache(max_entries=CACHE_SIZE, db_path=CACHE_DB,
+                           max_disk_entries=CACHE_DB_MAX_ROWS, max_age=CACHE_DB_MAX_AGE)
+
+# Process pool used by /analyze/batch (defaults to one worker per core).
+BATCH_WORKERS = int(os.environ.get("PAPERIQ_BATCH_WORKERS", "0")) or os.cpu_count() or 1
+BATCH_MAX_ITEMS = int(os.environ.get("PAPERIQ_BATCH_MAX_ITEMS", "1000"))
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+# Where /analyze runs the pipeline: "inline", "thread" or "process", plus
+# how much work may be pending before new requests get a 503.
+EXECUTOR_MODE = os.environ.get("PAPERIQ_EXECUTOR", "thread")
+EXECUTOR_WORKERS = int(os.environ.get("PAPERIQ_WORKERS", "0")) or os.cpu_count() or 1
+MAX_PENDING = int(os.environ.get("PAPERIQ_MAX_PENDING", "64"))
+ANALYZE_TIMEOUT = float(os.environ.get("PAPERIQ_ANALYZE_TIMEOUT", "60")) or None
+RETRY_AFTER = os.environ.get("PAPERIQ_RETRY_AFTER", "2")
+
+# Sentiment records sent per flush by /analyze/stream.
+STREAM_CHUNK = int(os.environ.get("PAPERIQ_STREAM_CHUNK", "50"))
+
+# Documents kept for incremental re-analysis.
+MAX_SESSIONS = int(os.environ.get("PAPERIQ_SESSIONS", "128"))
+
+document_sessions = SessionStore(max_sessions=MAX_SESSIONS)
+
+# Cap on a gzip-compressed request body once inflated.
+MAX_BODY_MB = float(os.environ.get("PAPERIQ_MAX_BODY_MB", "64"))
+
+# Responses at least this large are compressed when the client accepts it.
+COMPRESS_MIN_BYTES = int(os.environ.get("PAPERIQ_COMPRESS_MIN_BYTES", "1024"))
 
-app = FastAPI(title="PaperIQ API", version="0.1")
+app.add_middleware(GzipRequestMiddleware, max_size=int(MAX_BODY_MB * 1024 * 1024))
+# /analyze compresses (and caches) its own bodies; this covers the other endpoints.
+app.add_middleware(NegotiatedGZipMiddleware, minimum_size=COMPRESS_MIN_BYTES, compresslevel=6)
+
+# Encoded/compressed variants of cached /analyze results.
+variant_cache = ResultCache(max_entries=CACHE_SIZE)
+
+# Largest upload accepted by /analyze/file.
+MAX_UPLOAD_MB = float(os.environ.get("PAPERIQ_MAX_UPLOAD_MB", "20"))
+
+analysis_executor = AnalysisExecutor(
+    mode=EXECUTOR_MODE,
+    workers=EXECUTOR_WORKERS,
+    max_pending=MAX_PENDING,
+    timeout=ANALYZE_TIMEOUT,
+)
+
+# Report rendering (/report): its own pool so exports do not queue behind
+# analyses, and a cache of rendered reports keyed by analysis id and format.
+REPORT_EXECUTOR = os.environ.get("PAPERIQ_REPORT_EXECUTOR", "thread")
+REPORT_WORKERS = int(os.environ.get("PAPERIQ_REPORT_WORKERS", "0")) or os.cpu_count() or 1
+REPORT_CACHE_SIZE = int(os.environ.get("PAPERIQ_REPORT_CACHE_SIZE", "64"))
+REPORT_CACHE_DB = os.environ.get("PAPERIQ_REPORT_CACHE_DB") or None
+
+report_executor = AnalysisExecutor(
+    mode=REPORT_EXECUTOR,
+    workers=REPORT_WORKERS,
+    max_pending=MAX_PENDING,
+    timeout=ANALYZE_TIMEOUT,
+)
+report_cache = ResultCache(max_entries=REPORT_CACHE_SIZE, db_path=REPORT_CACHE_DB,
+                           max_disk_entries=CACHE_DB_MAX_ROWS, max_age=CACHE_DB_MAX_AGE)
+
+ANALYSIS_ID_RE = re.compile(r'[0-9a-f]{64}')
+
+# Per-sentence listings (/analysis/{id}/sentences and /flagged): largest page
+# and number of analyses whose sentence index is kept in memory.
+SENTENCE_PAGE_MAX = int(os.environ.get("PAPERIQ_SENTENCE_PAGE_MAX", "200"))
+SENTENCE_INDEXES = int(os.environ.get("PAPERIQ_SENTENCE_INDEXES", "32"))
+
+# Add a Server-Timing header with per-stage durations to /analyze responses.
+SERVER_TIMING = os.environ.get("PAPERIQ_SERVER_TIMING", "0").lower() in ("1", "true", "yes")
+
+# --- Metrics (GET /metrics) ---
+metrics = Registry()
+stage_seconds = metrics.register(Histogram(
+    'paperiq_stage_seconds', 'Time spent in each analysis pipeline stage.', labelnames=('stage',)))
+request_seconds = metrics.register(Histogram(
+    'paperiq_analyze_seconds', 'End-to-end /analyze latency.', labelnames=('cache',)))
+document_chars = metrics.register(Histogram(
+    'paperiq_document_chars', 'Size of submitted documents in characters.',
+    buckets=(1e3, 5e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6)))
+report_seconds = metrics.register(Histogram(
+    'paperiq_report_seconds', 'Time to render a report.', labelnames=('format',)))
+analysis_errors = metrics.register(Counter(
+    'paperiq_analysis_errors_total', 'Analyses that failed, timed out or were rejected.', labelnames=('reason',)))
+for _tier in ('memory_hits', 'disk_hits', 'misses'):
+    metrics.register(Gauge(f'paperiq_cache_{_tier}_total', f'Result cache {_tier.replace("_", " ")}.',
+                           lambda t=_tier: result_cache.stats()[t], kind='counter'))
+metrics.register(Gauge('paperiq_cache_hit_ratio', 'Result cache hits / lookups.',
+                       lambda: result_cache.stats()['hit_ratio']))
+metrics.register(Gauge('paperiq_cache_entries', 'Results held in the in-memory cache.',
+                       lambda: result_cache.stats()['entries']))
+metrics.register(Gauge('paperiq_queue_depth', 'Analyses queued or running.',
+                       lambda: analysis_executor.pending))
+metrics.register(Gauge('paperiq_queue_capacity', 'Pending analyses allowed before 503.',
+                       lambda: analysis_executor.max_pending))
+metrics.register(Gauge('paperiq_sessions', 'Documents held for incremental re-analysis.',
+                       lambda: len(document_sessions)))
+metrics.register(Gauge('paperiq_warmup_seconds', 'Time the startup warm-up took (0 until finished).',
+                       lambda: warmup.seconds or 0.0))
+metrics.register(Gauge('paperiq_warm', 'Whether the startup warm-up has finished.',
+                       lambda: int(warmup.ready)))
+
+
+def record_stages(timings):
+    for stage, seconds in timings.items():
+        stage_seconds.observe(seconds, stage=stage)
 
 
 @app.get('/health')
 def health_check():
-    """Simple health check endpoint so frontends can verify the API is up."""
-    return {"status": "ok"}
-
-# --- utilities (same as prototype heuristics) ---
-def sentence_split(text):
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-    sentences = [s.replace('\n', ' ').strip() for s in sentences if len(s.strip())>0]
-    return sentences
-
-def tokenize_words(text):
-    words = re.findall(r'\b[\w\']+\b', text.lower())
-    return words
-
-def type_token_ratio(words):
-    if not words:
-        return 0.0
-    return len(set(words)) / len(words)
-
-def avg_word_length(words):
-    if not words:
-        return 0.0
-    return sum(len(w) for w in words) / len(words)
-
-def avg_sentence_length(sentences):
-    if not sentences:
-        return 0.0
-    lengths = [len(tokenize_words(s)) for s in sentences]
-    return sum(lengths) / len(lengths)
-
-def lexical_sophistication(words):
-    if not words:
-        return 0.0
-    long_words = sum(1 for w in words if len(w) > 6)
-    return long_words / len(words)
-
-def coherence_score(sentences):
-    if not sentences:
-        return 0.0
-    lens = [len(tokenize_words(s)) for s in sentences]
-    mean = sum(lens)/len(lens)
-    var = sum((l-mean)**2 for l in lens)/len(lens)
-    score = max(0.0, 1.0 - (var / (mean+1)**2))
-    return score
-
-def reasoning_proxy(sentences, words):
-    causal = sum(1 for s in sentences if re.search(r'\b(because|therefore|thus|hence|consequently|so)\b', s.lower()))
-    modal = sum(1 for w in words if w in {"may","might","could","should","would"})
-    score = (causal / (len(sentences)+1)) - (modal / (len(words)+1))
-    return max(0.0, min(1.0, 0.5 + score))
-
-def compute_features(text):
-    sentences = sentence_split(text)
-    words = tokenize_words(text)
-    features = {}
-    features['word_count'] = len(words)
-    features['sentence_count'] = len(sentences)
-    features['avg_sentence_len'] = avg_sentence_length(sentences)
-    features['avg_word_len'] = avg_word_length(words)
-    features['ttr'] = type_token_ratio(words)
-    features['lex_soph'] = lexical_sophistication(words)
-    features['coherence'] = coherence_score(sentences)
-    features['reasoning_proxy'] = reasoning_proxy(sentences, words)
-    
-    # Add sentiment analysis
-    blob = TextBlob(text)
-    features['sentiment_polarity'] = blob.sentiment.polarity
-    features['sentiment_subjectivity'] = blob.sentiment.subjectivity
-    
-    # Sentence-level sentiment
-    sentence_sentiments = []
-    for sentence in sentences:
-        sent_blob = TextBlob(sentence)
-        sentence_sentiments.append({
-            'text': sentence,
-            'polarity': sent_blob.sentiment.polarity,
-            'subjectivity': sent_blob.sentiment.subjectivity
-        })
-    
-    return features, sentences, words, sentence_sentiments
-
-def score_paper(features):
-    lang = 100 * (0.2*min(1.0, features['ttr']*1.5) + 0.3*min(1.0, features['lex_soph']*3) + 0.5*min(1.0, features['avg_word_len']/5))
-    coh = 100 * features['coherence']
-    reason = 100 * features['reasoning_proxy']
-    composite = round((0.4*lang + 0.3*coh + 0.3*reason), 2)
-    return {
-        'language': round(lang,2),
-        'coherence': round(coh,2),
-        'reasoning': round(reason,2),
-        'composite': composite
-    }
+    """
+    Simple health check endpoint so frontends can verify the API is up.
+    Answers 503 "warming" while the startup warm-up is still running.
+    """
+    if not warmup.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming", "warmup": warmup.status()},
+            headers={'Retry-After': '1'},
+        )
+    return {"status": "ok", "cache": result_cache.stats(), "warmup": warmup.status()}
 
-def sentence_contributions(sentences, overall_features):
-    contributions = []
-    for s in sentences:
-        words = tokenize_words(s)
-        if not words:
-            continue
-            
-        ttr = len(set(words))/len(words)
-        long = 1.0 if len(words) > max(40, overall_features['avg_sentence_len']*2) else 0.0
-        causal = 1.0 if re.search(r'\b(because|therefore|thus|hence|consequently|so)\b', s.lower()) else 0.0
-        
-        neg = 0.0
-        reasons = []
-        suggestions = []
-        
-        if long > 0:
-            neg += 1.2
-            reasons.append("Sentence is too long and complex")
-            suggestions.append("Split into multiple shorter sentences to improve readability.")
-            
-        if ttr < 0.5 and len(words) > 10:
-            neg += 1.0
-            reasons.append("Repetitive vocabulary")
-            suggestions.append("Use synonyms to improve lexical diversity.")
-            
-        if causal == 0 and len(words) > 30:
-            neg += 0.5
-            reasons.append("Lack of transition words")
-            suggestions.append("Use transition words (e.g., 'because', 'therefore') to improve flow.")
-            
-        if neg > 0:
-            contributions.append({
-                "sentence": s,
-                "score": neg,
-                "reason": "; ".join(reasons),
-                "suggestion": " ".join(suggestions)
-            })
-            
-    contributions.sort(key=lambda x: x['score'], reverse=True)
-    return contributions
+@app.get('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics: stage timings, document sizes, cache and queue state."""
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
 
 # --- API models ---
 class AnalyzeRequest(BaseModel):
@@ -161,17 +206,58 @@ class AnalyzeResponse(BaseModel):
     top_flagged_sentences: List[dict]
     sentiment_analysis: List[SentimentInfo]
 
-@app.post('/analyze', response_model=AnalyzeResponse)
-def analyze(req: AnalyzeRequest):
-    text = req.text or ''
-    if len(text.strip()) < 20:
-        raise HTTPException(status_code=400, detail='Text too short. Provide at least 20 characters.')
-    features, sentences, words, sentence_sentiments = compute_features(text)
-    scores = score_paper(features)
-    contribs = sentence_contributions(sentences, features)
-    # contribs is now a list of dicts, we just take the top 5
-    top_flagged = contribs[:5]
-    
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    text: str
+
+class BatchRequest(BaseModel):
+    items: List[Union[BatchItem, str]]
+
+class BatchItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    analysis_id: Optional[str] = None
+    result: Optional[AnalyzeResponse] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
+
+class BulkReportRequest(BaseModel):
+    analysis_ids: List[str]
+    format: str = 'pdf'
+
+class SentencePage(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    items: List[dict]
+
+class FlaggedPage(SentencePage):
+    rules: dict
+
+class FeatureTableResponse(BaseModel):
+    count: int
+    ids: List[Optional[str]]
+    features: dict
+    scores: dict
+
+class TextEdit(BaseModel):
+    start: int
+    end: int
+    replacement: str = ''
+
+class IncrementalRequest(BaseModel):
+    document_id: Optional[str] = None
+    text: Optional[str] = None
+    edit: Optional[TextEdit] = None
+
+class IncrementalResponse(AnalyzeResponse):
+    document_id: str
+    sentences_reused: int
+    sentences_recomputed: int
+
+def build_response(scores, features, top_flagged, sentence_sentiments, response_cls=AnalyzeResponse, **extra):
     # Convert sentence sentiments to response model
     sentiment_analysis = [
         SentimentInfo(
@@ -181,13 +267,658 @@ def analyze(req: AnalyzeRequest):
         ) for s in sentence_sentiments
     ]
     
-    resp = AnalyzeResponse(
+    resp = response_cls(
         composite = scores['composite'],
         language = scores['language'],
         coherence = scores['coherence'],
         reasoning = scores['reasoning'],
         diagnostics = features,
         top_flagged_sentences = top_flagged,
-        sentiment_analysis = sentiment_analysis
+        sentiment_analysis = sentiment_analysis,
+        **extra
     )
     return resp
+
+def analyze_text(text, timer=NULL_TIMER):
+    """Run the full analysis pipeline on a text and build the API response."""
+    features, doc, sentence_sentiments = compute_features(text, timer)
+    with timer('score_paper'):
+        scores = score_paper(features)
+    with timer('sentence_contributions'):
+        contribs = sentence_contributions(doc, features)
+    # contribs is now a list of dicts, we just take the top 5
+    top_flagged = contribs[:5]
+    with timer('build_response'):
+        return build_response(scores, features, top_flagged, sentence_sentiments)
+
+def analysis_events(text, key):
+    """
+    Yields (event, payload) pairs for a streamed analysis: headline scores
+    first, then flagged sentences, per-sentence sentiment and finally the
+    document sentiment. The assembled response is cached once complete.
+    """
+    doc = Document(text)
+    features = structural_features(doc)
+    scores = score_paper(features)
+    yield 'scores', {**scores, 'diagnostics': dict(features)}
+
+    top_flagged = sentence_contributions(doc, features)[:5]
+    for rank, contrib in enumerate(top_flagged):
+        yield 'flagged', {'rank': rank, **contrib}
+
+    streams = []
+    sentence_sentiments = []
+    for i, (tokens, (p, s)) in enumerate(iter_sentence_sentiment(doc.sentences)):
+        streams.append(tokens)
+        record = {'text': doc.sentences[i], 'polarity': p, 'subjectivity': s}
+        sentence_sentiments.append(record)
+        yield 'sentiment', {'index': i, **record}
+
+    polarity, subjectivity = document_sentiment(text, streams)
+    features['sentiment_polarity'] = polarity
+    features['sentiment_subjectivity'] = subjectivity
+    yield 'diagnostics', {'sentiment_polarity': polarity, 'sentiment_subjectivity': subjectivity}
+
+    resp = build_response(scores, features, top_flagged, sentence_sentiments)
+    result_cache.put(key, resp.model_dump_json().encode())
+    yield 'done', {}
+
+def cached_events(data):
+    """Replay a cached response as the same event sequence analysis_events() produces."""
+    diagnostics = dict(data['diagnostics'])
+    sentiment = {k: diagnostics.pop(k) for k in ('sentiment_polarity', 'sentiment_subjectivity')}
+    yield 'scores', {
+        'language': data['language'],
+        'coherence': data['coherence'],
+        'reasoning': data['reasoning'],
+        'composite': data['composite'],
+        'diagnostics': diagnostics,
+    }
+    for rank, contrib in enumerate(data['top_flagged_sentences']):
+        yield 'flagged', {'rank': rank, **contrib}
+    for i, record in enumerate(data['sentiment_analysis']):
+        yield 'sentiment', {'index': i, **record}
+    yield 'diagnostics', sentiment
+    yield 'done', {}
+
+def encode_events(events, sse, on_close, timeout=None):
+    """
+    Serialize events as NDJSON lines or SSE frames, batching sentiment records.
+    Past `timeout` seconds (checked between events) the stream ends with an
+    error event: the 200 status has already been sent, so there is no 504.
+    """
+    def frame(event, payload):
+        if sse:
+            return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({'event': event, **payload}) + "\n"
+
+    deadline = time.monotonic() + timeout if timeout else None
+    buffer = []
+    try:
+        for event, payload in events:
+            buffer.append(frame(event, payload))
+            if deadline is not None and event != 'done' and time.monotonic() > deadline:
+                analysis_errors.inc(reason='timeout')
+                buffer.append(frame('error', {'detail': 'Analysis timed out.'}))
+                break
+            if event != 'sentiment' or len(buffer) >= STREAM_CHUNK:
+                yield ''.join(buffer)
+                buffer = []
+    except Exception as e:
+        analysis_errors.inc(reason='error')
+        buffer.append(frame('error', {'detail': f"Analysis failed: {e}"}))
+    finally:
+        on_close()
+    if buffer:
+        yield ''.join(buffer)
+
+class SlotStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for work holding an analysis_executor slot. The slot
+    is freed once the response is over however it ends: body sent, client
+    gone before the body was read (so the body generator never started), or
+    the response dropped without being sent at all.
+    """
+
+    def __init__(self, content, slot, **kwargs):
+        super().__init__(content, **kwargs)
+        self.slot = slot
+        weakref.finalize(self, slot.release)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.slot.release()
+
+@app.post('/analyze', response_model=AnalyzeResponse)
+async def analyze(req: AnalyzeRequest, request: Request, sentences: str = 'text'):
+    """
+    Analyze a text. With ?sentences=offsets, sentences are returned once as
+    [start, end] offsets into the submitted text instead of repeated text.
+    Send `Accept: application/msgpack` for msgpack (if installed on the server;
+    otherwise 406, unless the header also accepts JSON).
+    """
+    text = req.text or ''
+    if len(text.strip()) < 20:
+        raise HTTPException(status_code=400, detail='Text too short. Provide at least 20 characters.')
+    if sentences not in ('text', 'offsets'):
+        raise HTTPException(status_code=400, detail="sentences must be 'text' or 'offsets'.")
+    return await cached_analysis(text, request, compact=sentences == 'offsets')
+
+@app.post('/analyze/file', response_model=AnalyzeResponse)
+async def analyze_file(request: Request, filename: str = ''):
+    """
+    Analyze an uploaded PDF, DOCX or TXT file sent as the raw request body.
+    Text goes through the same ingestion pipeline as the Streamlit apps.
+    """
+    limit = int(MAX_UPLOAD_MB * 1024 * 1024)
+    if int(request.headers.get('content-length') or 0) > limit:
+        raise HTTPException(status_code=413, detail=f'File exceeds {MAX_UPLOAD_MB:g} MB.')
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail=f'File exceeds {MAX_UPLOAD_MB:g} MB.')
+        chunks.append(chunk)
+    file_bytes = b''.join(chunks)
+    if not file_bytes:
+        raise HTTPException(status_code=400, detail='Empty upload.')
+    if detect_file_type(filename, file_bytes) is None:
+        raise HTTPException(status_code=415, detail='Unsupported file type. Upload PDF, DOCX or TXT.')
+
+    text, message = await run_in_threadpool(ingest_document, file_bytes, filename)
+    if text is None:
+        raise HTTPException(status_code=422, detail=message)
+    if len(text) < 20:
+        raise HTTPException(status_code=400, detail='Text too short. Provide at least 20 characters.')
+    return await cached_analysis(text, request)
+
+async def cache_get(cache, key, peek=False):
+    """
+    ResultCache.get() (or, with peek=True, the uncounted peek()) from async
+    handlers; a sqlite tier is read on a worker thread.
+    """
+    lookup = cache.peek if peek else cache.get
+    if cache.db_path is None:
+        return lookup(key)
+    return await run_in_threadpool(lookup, key)
+
+async def cache_put(cache, key, body):
+    """ResultCache.put() from async handlers; a sqlite tier is written on a worker thread."""
+    if cache.db_path is None:
+        cache.put(key, body)
+    else:
+        await run_in_threadpool(cache.put, key, body)
+
+async def cached_analysis(text, request=None, compact=False):
+    """
+    Serve repeat submissions straight from the cache as pre-serialized JSON,
+    re-encoded and compressed as the request asks for.
+    """
+    started = time.perf_counter()
+    fmt = response_format(request)
+    document_chars.observe(len(text))
+    key = cache_key(text, SCORING_VERSION)
+    body, tier = await cache_get(result_cache, key)
+    timings = {}
+    if body is None:
+        body, timings = await run_analysis(text)
+        await cache_put(result_cache, key, body)
+    headers = {'X-Cache': 'HIT' if tier else 'MISS', 'X-Cache-Tier': tier or 'none', 'X-Analysis-Id': key}
+    response = await encode_response(key, body, text, request, fmt, compact, headers)
+    total = time.perf_counter() - started
+    request_seconds.observe(total, cache='hit' if tier else 'miss')
+    if SERVER_TIMING:
+        entries = dict(timings) if timings else {f'cache-{tier}': 0.0}
+        entries['total'] = total
+        response.headers['Server-Timing'] = server_timing(entries)
+    return response
+
+def response_format(request):
+    """The /analyze response format the request accepts; 406 if it only takes msgpack and that is missing."""
+    if request is None:
+        return 'json'
+    fmt = negotiate_format(request.headers.get('accept', ''))
+    if fmt is None:
+        raise HTTPException(status_code=406, detail='msgpack is not installed on this server. Accept application/json instead.')
+    return fmt
+
+async def encode_response(key, body, text, request, fmt, compact, headers):
+    """Build the /analyze response in the negotiated format and compression."""
+    encoding = None
+    if request is not None and len(body) >= COMPRESS_MIN_BYTES:
+        encoding = negotiate_encoding(request.headers.get('accept-encoding', ''))
+    if fmt == 'json' and not compact and encoding is None:
+        return Response(content=body, media_type='application/json', headers=headers)
+
+    # Offsets shift with leading whitespace, which the cache key ignores.
+    lead = len(text) - len(text.lstrip()) if compact else 0
+    variant_key = f'{key}:{fmt}:{int(compact)}:{lead}:{encoding}'
+    payload, _ = variant_cache.get(variant_key)
+    if payload is None:
+        payload = await run_in_threadpool(encode_variant, body, text, fmt, compact, encoding)
+        variant_cache.put(variant_key, payload)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+        headers['Vary'] = 'Accept, Accept-Encoding'
+    else:
+        # NegotiatedGZipMiddleware adds Accept-Encoding itself for uncompressed bodies.
+        headers['Vary'] = 'Accept'
+    return Response(content=payload, media_type=media_type(fmt), headers=headers)
+
+def encode_variant(body, text, fmt, compact, encoding):
+    """Re-encode a cached JSON result in the requested format and compression."""
+    if compact or fmt != 'json':
+        data = loads(body)
+        if compact:
+            data = compact_result(data, text)
+        body = dumps(data, fmt)
+    if encoding:
+        body = compress(body, encoding)
+    return body
+
+def queue_full():
+    return HTTPException(
+        status_code=503,
+        detail='Analysis queue is full. Please retry shortly.',
+        headers={'Retry-After': RETRY_AFTER}
+    )
+
+async def run_analysis(text):
+    """
+    Analyze text on the execution backend, mapping overload and timeouts to HTTP errors.
+    Returns: (body, stage timings)
+    """
+    try:
+        body, error, timings = await analysis_executor.run(analyze_to_json, text)
+    except Saturated:
+        analysis_errors.inc(reason='saturated')
+        raise queue_full()
+    except asyncio.TimeoutError:
+        analysis_errors.inc(reason='timeout')
+        raise HTTPException(status_code=504, detail='Analysis timed out.')
+    record_stages(timings)
+    if error is not None:
+        analysis_errors.inc(reason='error')
+        raise HTTPException(status_code=500, detail=error)
+    return body, timings
+
+@app.post('/analyze/stream')
+def analyze_stream(req: AnalyzeRequest, request: Request, format: Optional[str] = None):
+    """
+    Streamed /analyze: NDJSON by default, Server-Sent Events with
+    ?format=sse or an `Accept: text/event-stream` header.
+    The analysis runs while the body is sent (on the server's thread pool,
+    whatever PAPERIQ_EXECUTOR says), counts toward the same pending limit as
+    /analyze and ends with an `error` event after PAPERIQ_ANALYZE_TIMEOUT.
+    """
+    text = req.text or ''
+    if len(text.strip()) < 20:
+        raise HTTPException(status_code=400, detail='Text too short. Provide at least 20 characters.')
+    sse = format == 'sse' or (format is None and 'text/event-stream' in request.headers.get('accept', ''))
+    media_type = 'text/event-stream' if sse else 'application/x-ndjson'
+    key = cache_key(text, SCORING_VERSION)
+    body, tier = result_cache.get(key)
+    headers = {'X-Cache': 'HIT' if tier else 'MISS', 'X-Cache-Tier': tier or 'none', 'X-Analysis-Id': key}
+    if body is not None:
+        return StreamingResponse(encode_events(cached_events(json.loads(body)), sse, lambda: None),
+                                 media_type=media_type, headers=headers)
+    try:
+        slot = analysis_executor.slot()
+    except Saturated:
+        analysis_errors.inc(reason='saturated')
+        raise queue_full()
+    return SlotStreamingResponse(
+        encode_events(analysis_events(text, key), sse, slot.release, timeout=analysis_executor.timeout),
+        slot, media_type=media_type, headers=headers,
+    )
+
+@app.post('/analyze/incremental', response_model=IncrementalResponse)
+def analyze_incremental(req: IncrementalRequest):
+    """
+    Re-analyze an edited document, recomputing only the sentences that changed.
+    Send the full text (optionally with a document_id) to start or replace a
+    session, or a document_id plus an edit {start, end, replacement}.
+    """
+    if (req.text is None) == (req.edit is None):
+        raise HTTPException(status_code=400, detail='Provide either text or edit.')
+    session = document_sessions.get(req.document_id, create=req.edit is None)
+    if session is None:
+        raise HTTPException(status_code=404, detail='Unknown document_id. Send the full text to start a session.')
+
+    with session.lock:
+        if req.edit is not None:
+            try:
+                text = session.apply_edit(req.edit.start, req.edit.end, req.edit.replacement)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        else:
+            text = req.text
+        if len(text.strip()) < 20:
+            raise HTTPException(status_code=400, detail='Text too short. Provide at least 20 characters.')
+        try:
+            analysis_executor.acquire()
+        except Saturated:
+            raise queue_full()
+        try:
+            features, doc, sentence_sentiments, recomputed = session.analyze(text)
+        finally:
+            analysis_executor.release()
+
+    scores = score_paper(features)
+    top_flagged = sentence_contributions(doc, features)[:5]
+    return build_response(
+        scores, features, top_flagged, sentence_sentiments,
+        response_cls=IncrementalResponse,
+        document_id=session.doc_id,
+        sentences_reused=len(doc.sentences) - recomputed,
+        sentences_recomputed=recomputed,
+    )
+
+def warmup_steps():
+    """Warm-up stages: lexicon, full pipeline, response encoding, executor workers."""
+    def pipeline():
+        body, error, _timings = analyze_to_json(SAMPLE_DOCUMENT)
+        if error is not None:
+            raise RuntimeError(error)
+        encode_variant(body, SAMPLE_DOCUMENT, 'json', True, 'gzip')
+
+    return [
+        load_lexicon,
+        pipeline,
+        lambda: analysis_executor.warm_up(analyze_to_json, SAMPLE_DOCUMENT),
+    ]
+
+def get_batch_pool():
+    """Lazily start the process pool shared by batch requests."""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            _batch_pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+        return _batch_pool
+
+def discard_batch_pool(pool):
+    """Drop a broken batch pool so the next request starts a fresh one."""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is pool:
+            _batch_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def analyze_to_json(text):
+    """
+    Analyze one text and serialize the response.
+    Returns: (body, error, stage timings) so one bad document cannot fail a
+    whole batch, and timings measured in a worker reach the API's metrics
+    """
+    timer = StageTimer()
+    try:
+        resp = analyze_text(text, timer)
+        with timer('serialize'):
+            body = resp.model_dump_json().encode()
+        return body, None, timer.timings
+    except Exception as e:
+        return None, f"Analysis failed: {e}", timer.timings
+
+def analyze_pending(items, pending, bodies, errors):
+    """
+    Analyze the cache misses of a batch into bodies/errors, fanned out across
+    the process pool. If a worker dies the pool is replaced and every item it
+    had not returned gets an error; the rest of the batch is still answered.
+    """
+    texts = [items[i].text for i in pending]
+    pool = None
+    if len(texts) > 1 and BATCH_WORKERS > 1:
+        pool = get_batch_pool()
+        chunksize = max(1, len(texts) // (BATCH_WORKERS * 4))
+        # map() keeps input order.
+        outcomes = pool.map(analyze_to_json, texts, chunksize=chunksize)
+    else:
+        outcomes = map(analyze_to_json, texts)
+    done = 0
+    try:
+        for i, (body, error, timings) in zip(pending, outcomes):
+            bodies[i], errors[i] = body, error
+            record_stages(timings)
+            if body is not None:
+                result_cache.put(cache_key(items[i].text, SCORING_VERSION), body)
+            else:
+                analysis_errors.inc(reason='error')
+            done += 1
+    except BrokenProcessPool:
+        discard_batch_pool(pool)
+        for i in pending[done:]:
+            errors[i] = 'Analysis failed: a worker process exited unexpectedly.'
+            analysis_errors.inc(reason='error')
+
+@app.post('/analyze/batch', response_model=BatchResponse)
+def analyze_batch(req: BatchRequest):
+    """
+    Analyze many texts; results come back in input order, with an error
+    instead of a result for items that could not be analyzed. A batch with
+    cache misses holds one pending slot while it runs, so it is refused with
+    503 like /analyze when the queue is full.
+    """
+    if len(req.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f'Too many items. Send at most {BATCH_MAX_ITEMS} per batch.')
+
+    items = [BatchItem(text=item) if isinstance(item, str) else item for item in req.items]
+    bodies = [None] * len(items)
+    errors = [None] * len(items)
+    pending = []
+    for i, item in enumerate(items):
+        if len(item.text.strip()) < 20:
+            errors[i] = 'Text too short. Provide at least 20 characters.'
+            continue
+        body, _tier = result_cache.get(cache_key(item.text, SCORING_VERSION))
+        if body is None:
+            pending.append(i)
+        else:
+            bodies[i] = body
+
+    if pending:
+        try:
+            analysis_executor.acquire()
+        except Saturated:
+            analysis_errors.inc(reason='saturated')
+            raise queue_full()
+        try:
+            analyze_pending(items, pending, bodies, errors)
+        finally:
+            analysis_executor.release()
+
+    # Results are already serialized; splice them into the envelope without re-validating.
+    parts = []
+    for i, item in enumerate(items):
+        analysis_id = cache_key(item.text, SCORING_VERSION) if bodies[i] is not None else None
+        parts.append(
+            b'{"index":%d,"id":%s,"analysis_id":%s,"result":%s,"error":%s}' % (
+                i,
+                json.dumps(item.id).encode(),
+                json.dumps(analysis_id).encode(),
+                bodies[i] if bodies[i] is not None else b'null',
+                json.dumps(errors[i]).encode(),
+            )
+        )
+    return Response(content=b'{"results":[' + b','.join(parts) + b']}', media_type='application/json')
+
+@app.post('/analyze/features', response_model=FeatureTableResponse)
+def analyze_features(req: BatchRequest, sentiment: bool = True):
+    """
+    Diagnostics and scores for many texts, column-oriented: one list per
+    diagnostic with a value per item, in input order. Much cheaper per text
+    than /analyze/batch (no flagged sentences or per-sentence sentiment);
+    ?sentiment=false also skips document sentiment (returned as null).
+    """
+    # numpy is only needed here, so it is not imported at start-up.
+    from .columnar import feature_table, score_table, to_columns
+
+    if len(req.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f'Too many items. Send at most {BATCH_MAX_ITEMS} per batch.')
+    items = [BatchItem(text=item) if isinstance(item, str) else item for item in req.items]
+    pool = get_batch_pool() if len(items) > 1 and BATCH_WORKERS > 1 else None
+    table = feature_table([item.text for item in items], sentiment=sentiment, pool=pool)
+    body = dumps({
+        'count': len(items),
+        'ids': [item.id for item in items],
+        'features': to_columns(table),
+        'scores': to_columns(score_table(table)),
+    })
+    return Response(content=body, media_type='application/json')
+
+def unknown_analysis():
+    return HTTPException(status_code=404, detail='Unknown or expired analysis_id. Submit the text to /analyze again.')
+
+@lru_cache(maxsize=SENTENCE_INDEXES)
+def sentence_index(analysis_id):
+    """SentenceIndex of a cached analysis, kept across page requests for the same analysis."""
+    # Imported on first use, like columnar, to keep numpy out of start-up.
+    from .sentence_index import SentenceIndex
+
+    result = None
+    if ANALYSIS_ID_RE.fullmatch(analysis_id):
+        result, _ = result_cache.peek(analysis_id)
+    if result is None:
+        raise unknown_analysis()
+    return SentenceIndex(loads(result))
+
+@app.get('/analysis/{analysis_id}')
+def analysis_result(analysis_id: str):
+    """
+    The full /analyze result of an earlier analysis, while it is still in
+    the result cache. Lets clients drop results they can fetch again.
+    """
+    result = None
+    if ANALYSIS_ID_RE.fullmatch(analysis_id):
+        result, _ = result_cache.peek(analysis_id)
+    if result is None:
+        raise unknown_analysis()
+    return Response(content=result, media_type='application/json')
+
+def check_page(offset, limit):
+    if offset < 0 or not 1 <= limit <= SENTENCE_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f'offset must be >= 0 and limit between 1 and {SENTENCE_PAGE_MAX}.')
+
+@app.get('/analysis/{analysis_id}/sentences', response_model=SentencePage)
+def analysis_sentences(analysis_id: str, offset: int = 0, limit: int = 50,
+                       min_polarity: float = -1.0, max_polarity: float = 1.0,
+                       min_subjectivity: float = 0.0, max_subjectivity: float = 1.0,
+                       flagged: Optional[bool] = None):
+    """
+    One page of per-sentence sentiment for an earlier analysis, in document
+    order. Polarity and subjectivity ranges are inclusive; `flagged` keeps
+    only flagged (true) or unflagged (false) sentences. `total` counts every
+    matching sentence, so clients can page without loading the rest.
+    """
+    check_page(offset, limit)
+    total, items = sentence_index(analysis_id).sentiment_page(
+        offset, limit, min_polarity, max_polarity, min_subjectivity, max_subjectivity, flagged)
+    return SentencePage(total=total, offset=offset, limit=limit, items=items)
+
+@app.get('/analysis/{analysis_id}/flagged', response_model=FlaggedPage)
+def analysis_flagged(analysis_id: str, offset: int = 0, limit: int = 20, rule: Optional[str] = None):
+    """
+    One page of every flagged sentence of an earlier analysis (not just the
+    top five in the /analyze response), worst first. `rule` keeps sentences
+    breaking one rule: long, repetitive or transitions; `rules` counts the
+    sentences breaking each.
+    """
+    from .sentence_index import RULE_BITS
+
+    check_page(offset, limit)
+    if rule is not None and rule not in RULE_BITS:
+        raise HTTPException(status_code=400, detail=f"rule must be one of: {', '.join(RULE_BITS)}.")
+    index = sentence_index(analysis_id)
+    total, items = index.flagged_page(offset, limit, rule)
+    return FlaggedPage(total=total, offset=offset, limit=limit, items=items, rules=index.rule_counts())
+
+async def cached_report(analysis_id, fmt):
+    """
+    Rendered report for a cached analysis, rendering it on the report pool on a miss.
+    Returns: (body, cache tier or None)
+    """
+    key = f'{analysis_id}:{fmt}'
+    body, tier = await cache_get(report_cache, key)
+    if body is not None:
+        return body, tier
+    result = None
+    if ANALYSIS_ID_RE.fullmatch(analysis_id):
+        result, _ = await cache_get(result_cache, analysis_id, peek=True)
+    if result is None:
+        raise unknown_analysis()
+    started = time.perf_counter()
+    try:
+        body = await report_executor.run(render_report, result, fmt)
+    except Saturated:
+        analysis_errors.inc(reason='saturated')
+        raise queue_full()
+    except asyncio.TimeoutError:
+        analysis_errors.inc(reason='timeout')
+        raise HTTPException(status_code=504, detail='Report rendering timed out.')
+    except Exception as e:
+        analysis_errors.inc(reason='report')
+        raise HTTPException(status_code=500, detail=f"Report rendering failed: {e}")
+    report_seconds.observe(time.perf_counter() - started, format=fmt)
+    await cache_put(report_cache, key, body)
+    return body, None
+
+def check_report_format(fmt):
+    if fmt not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(REPORT_FORMATS)}.")
+
+@app.get('/report/{analysis_id}')
+async def report(analysis_id: str, format: str = 'pdf'):
+    """
+    Render a PDF, HTML or CSV report for an earlier analysis. `analysis_id`
+    is the X-Analysis-Id header of an /analyze response (or `analysis_id`
+    of a batch item); the analysis must still be in the result cache.
+    """
+    check_report_format(format)
+    body, tier = await cached_report(analysis_id, format)
+    return Response(content=body, media_type=REPORT_FORMATS[format], headers={
+        'Content-Disposition': f'attachment; filename="paperiq-{analysis_id[:12]}.{format}"',
+        'X-Cache': 'HIT' if tier else 'MISS',
+    })
+
+@app.post('/report/batch')
+async def report_batch(req: BulkReportRequest):
+    """
+    Reports for many analyses as one zip archive, rendered concurrently on
+    the report pool. Unknown or expired ids are listed in missing.txt.
+    """
+    check_report_format(req.format)
+    if len(req.analysis_ids) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f'Too many ids. Send at most {BATCH_MAX_ITEMS} per batch.')
+    ids = list(dict.fromkeys(req.analysis_ids))
+    # Never hold more pending renders than the pool has workers, so a big
+    # export does not hit the pending limit or starve single /report calls.
+    slots = asyncio.Semaphore(report_executor.workers)
+
+    async def render(analysis_id):
+        async with slots:
+            try:
+                return (await cached_report(analysis_id, req.format))[0]
+            except HTTPException as e:
+                if e.status_code == 404:
+                    return None
+                raise
+
+    bodies = await asyncio.gather(*(render(analysis_id) for analysis_id in ids))
+    # PDFs are already compressed; text formats are deflated.
+    compression = zipfile.ZIP_STORED if req.format == 'pdf' else zipfile.ZIP_DEFLATED
+    buffer = io.BytesIO()
+    missing = []
+    with zipfile.ZipFile(buffer, 'w', compression) as archive:
+        for analysis_id, body in zip(ids, bodies):
+            if body is None:
+                missing.append(analysis_id)
+            else:
+                archive.writestr(f'paperiq-{analysis_id}.{req.format}', body)
+        if missing:
+            archive.writestr('missing.txt', '\n'.join(missing) + '\n')
+    return Response(content=buffer.getvalue(), media_type='application/zip', headers={
+        'Content-Disposition': f'attachment; filename="paperiq-reports-{req.format}.zip"',
+        'X-Missing': str(len(missing)),
+    })
@@ -0,0 +1,158 @@
+"""
+Minimal Prometheus instrumentation for PaperIQ.
+
+Counters, histograms and callback gauges rendered in the Prometheus text
+exposition format (0.0.4), plus a StageTimer that records how long each
+pipeline stage took. Timings are plain dicts so they can be measured in a
+worker process and recorded by the API process.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds, from sub-millisecond metric functions to multi-second documents.
+TIME_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=TIME_BUCKETS, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum.
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total) in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = 'le="%s"' % _format_value(bound)
+                    lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+                lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Gauge:
+    """
+    Metric whose value is read from a callback when metrics are scraped;
+    kind='counter' for totals kept elsewhere (e.g. cache hit counters).
+    """
+
+    def __init__(self, name, documentation, callback, kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.kind = kind
+
+    def render(self):
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+            f'{self.name} {_format_value(self.callback())}',
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class StageTimer:
+    """Collects {stage: seconds}; `with timer('stage'):` times one stage."""
+    __slots__ = ('timings',)
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def __call__(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - started
+
+
+class NullTimer:
+    """Stand-in for StageTimer when nothing is being measured."""
+    __slots__ = ()
+
+    @contextmanager
+    def __call__(self, stage):
+        yield
+
+
+NULL_TIMER = NullTimer()
+
+
+def server_timing(timings: dict) -> str:
+    """Format stage timings as a Server-Timing header value (milliseconds)."""
+    return ', '.join(f'{stage};dur={seconds * 1000:.2f}' for stage, seconds in timings.items())
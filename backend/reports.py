@@ -0,0 +1,200 @@
+"""
+Server-side report rendering for PaperIQ analyses.
+
+render_report() turns a cached /analyze result (the serialized JSON body)
+into a PDF, HTML or CSV document. It is a plain top-level function of bytes
+in and bytes out so it can run on a thread or process pool. The PDF layout
+matches the report the Streamlit app offers for download.
+"""
+import csv
+import html
+import io
+
+from .encoding import loads
+
+FORMATS = {
+    'pdf': 'application/pdf',
+    'html': 'text/html; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Diagnostics in the order the report lists them, with display names.
+DIAGNOSTICS = (
+    ('word_count', 'Word Count'),
+    ('sentence_count', 'Sentence Count'),
+    ('avg_sentence_len', 'Avg Sentence Length'),
+    ('avg_word_len', 'Avg Word Length'),
+    ('ttr', 'Vocabulary Diversity'),
+    ('lex_soph', 'Lexical Sophistication'),
+    ('coherence', 'Coherence Score'),
+    ('reasoning_proxy', 'Reasoning Score'),
+    ('sentiment_polarity', 'Sentiment Polarity'),
+    ('sentiment_subjectivity', 'Subjectivity'),
+)
+SCORES = ('composite', 'language', 'coherence', 'reasoning')
+
+
+def render_report(body: bytes, fmt: str) -> bytes:
+    """Render a serialized analysis result as 'pdf', 'html' or 'csv'."""
+    data = loads(body)
+    if fmt == 'pdf':
+        return render_pdf(data)
+    if fmt == 'html':
+        return render_html(data)
+    if fmt == 'csv':
+        return render_csv(data)
+    raise ValueError(f"Unknown report format {fmt!r}")
+
+
+def _diagnostic_rows(diagnostics):
+    for key, label in DIAGNOSTICS:
+        value = diagnostics.get(key)
+        if value is None:
+            yield label, 'N/A'
+        elif key in ('word_count', 'sentence_count'):
+            yield label, str(value)
+        else:
+            yield label, f"{value:.2f}"
+
+
+def render_pdf(data: dict) -> bytes:
+    # fpdf is only needed for PDF reports; import it on first use.
+    from fpdf import FPDF
+
+    class PDF(FPDF):
+        def header(self):
+            self.set_font('Arial', 'B', 20)
+            self.set_text_color(46, 125, 50)  # PaperIQ green
+            self.cell(0, 10, 'PaperIQ Analysis Report', 0, 1, 'L')
+            self.ln(5)
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.set_text_color(128, 128, 128)
+            self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+    pdf = PDF()
+    pdf.add_page()
+
+    # Executive summary
+    pdf.set_fill_color(240, 248, 240)
+    pdf.rect(10, 30, 190, 40, 'F')
+    pdf.set_y(35)
+    pdf.set_font('Arial', 'B', 14)
+    pdf.set_text_color(0, 0, 0)
+    pdf.cell(0, 10, 'Executive Summary', 0, 1, 'L')
+    pdf.set_font('Arial', 'B', 24)
+    pdf.set_text_color(46, 125, 50)
+    pdf.cell(95, 15, f"{data['composite']}/100", 0, 0, 'C')
+    pdf.set_font('Arial', '', 10)
+    pdf.set_text_color(50, 50, 50)
+    pdf.set_xy(110, 45)
+    pdf.cell(0, 5, f"Language Quality: {data['language']}", 0, 1)
+    pdf.set_x(110)
+    pdf.cell(0, 5, f"Coherence: {data['coherence']}", 0, 1)
+    pdf.set_x(110)
+    pdf.cell(0, 5, f"Reasoning: {data['reasoning']}", 0, 1)
+    pdf.ln(25)
+
+    # Detailed metrics
+    pdf.set_font('Arial', 'B', 14)
+    pdf.set_text_color(0, 0, 0)
+    pdf.cell(0, 10, 'Detailed Diagnostics', 0, 1, 'L')
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(5)
+    pdf.set_font('Arial', '', 10)
+    for i, (name, value) in enumerate(_diagnostic_rows(data['diagnostics'])):
+        if i % 2 == 0:
+            pdf.set_fill_color(250, 250, 250)
+            pdf.rect(10, pdf.get_y(), 190, 8, 'F')
+        pdf.cell(90, 8, name, 0, 0)
+        pdf.cell(90, 8, value, 0, 1)
+    pdf.ln(10)
+
+    # Flagged sentences
+    flagged = data.get('top_flagged_sentences') or []
+    if flagged:
+        pdf.add_page()
+        pdf.set_font('Arial', 'B', 14)
+        pdf.cell(0, 10, 'Areas for Improvement', 0, 1, 'L')
+        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+        pdf.ln(5)
+        for i, item in enumerate(flagged):
+            sentence = item if isinstance(item, str) else item.get('sentence', '')
+            sentence = sentence.encode('latin-1', 'replace').decode('latin-1')
+            pdf.set_fill_color(255, 243, 224)
+            pdf.rect(10, pdf.get_y(), 190, 8, 'F')
+            pdf.set_font('Arial', 'B', 10)
+            pdf.cell(0, 8, f"Flagged Sentence #{i + 1}", 0, 1)
+            pdf.set_font('Arial', '', 10)
+            pdf.multi_cell(0, 6, sentence)
+            pdf.ln(5)
+
+    out = pdf.output(dest='S')
+    # fpdf 1.x returns a latin-1 str, fpdf2 returns a bytearray.
+    return out.encode('latin-1') if isinstance(out, str) else bytes(out)
+
+
+def render_html(data: dict) -> bytes:
+    esc = html.escape
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>PaperIQ Analysis Report</title>',
+        '<style>body{font-family:Arial,sans-serif;max-width:900px;margin:2em auto;color:#222}'
+        'h1{color:#2e7d32}table{border-collapse:collapse;width:100%}'
+        'td,th{padding:4px 8px;border-bottom:1px solid #eee;text-align:left}'
+        '.flag{background:#fff3e0;padding:8px;margin:8px 0}</style></head><body>',
+        '<h1>PaperIQ Analysis Report</h1>',
+        f"<h2>Composite score: {esc(str(data['composite']))}/100</h2>",
+        '<table>',
+    ]
+    for key in SCORES[1:]:
+        parts.append(f"<tr><th>{esc(key.title())}</th><td>{esc(str(data[key]))}</td></tr>")
+    parts.append('</table><h2>Detailed Diagnostics</h2><table>')
+    for name, value in _diagnostic_rows(data['diagnostics']):
+        parts.append(f"<tr><th>{esc(name)}</th><td>{esc(value)}</td></tr>")
+    parts.append('</table>')
+
+    flagged = data.get('top_flagged_sentences') or []
+    if flagged:
+        parts.append('<h2>Areas for Improvement</h2>')
+        for i, item in enumerate(flagged):
+            parts.append(
+                f"<div class=\"flag\"><b>Flagged Sentence #{i + 1}</b>"
+                f"<p>{esc(item.get('sentence', ''))}</p>"
+                f"<p><i>{esc(item.get('reason', ''))}</i> {esc(item.get('suggestion', ''))}</p></div>"
+            )
+
+    sentences = data.get('sentiment_analysis') or []
+    if sentences:
+        parts.append('<h2>Sentence Sentiment</h2><table><tr><th>#</th><th>Sentence</th>'
+                     '<th>Polarity</th><th>Subjectivity</th></tr>')
+        for i, s in enumerate(sentences):
+            parts.append(f"<tr><td>{i + 1}</td><td>{esc(s['text'])}</td>"
+                         f"<td>{s['polarity']:.2f}</td><td>{s['subjectivity']:.2f}</td></tr>")
+        parts.append('</table>')
+    parts.append('</body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+def render_csv(data: dict) -> bytes:
+    """
+    Long-format CSV, one value per row: section, index, field, value.
+    Sections are score, diagnostic, flagged (index = rank) and sentence
+    (index = position in the document).
+    """
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(('section', 'index', 'field', 'value'))
+    for key in SCORES:
+        writer.writerow(('score', '', key, data[key]))
+    for key, value in data['diagnostics'].items():
+        writer.writerow(('diagnostic', '', key, value))
+    for rank, item in enumerate(data.get('top_flagged_sentences') or []):
+        for field in ('sentence', 'score', 'reason', 'suggestion'):
+            writer.writerow(('flagged', rank, field, item.get(field, '')))
+    for i, s in enumerate(data.get('sentiment_analysis') or []):
+        writer.writerow(('sentence', i, 'text', s['text']))
+        writer.writerow(('sentence', i, 'polarity', s['polarity']))
+        writer.writerow(('sentence', i, 'subjectivity', s['subjectivity']))
+    return out.getvalue().encode('utf-8')
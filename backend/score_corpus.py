@@ -0,0 +1,322 @@
+"""
+Offline scoring for a whole document archive.
+
+    python -m backend.score_corpus papers/ -o scores.jsonl
+    python -m backend.score_corpus manifest.txt -o scores.parquet --workers 8
+    python -m backend.score_corpus papers/ -o scores.jsonl --restart
+
+Walks a directory (recursively) or reads a manifest (one path per line) of
+PDF, DOCX and TXT files, extracts text with the same ingestion pipeline as
+the apps and scores it across a process pool with the columnar feature
+functions. Results are streamed to JSONL, or to a directory of Parquet
+parts (requires pyarrow), and progress is checkpointed in
+<output>.checkpoint: re-running the same command after an interruption
+skips everything already written. --restart scores the archive again.
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+
+from .analysis import SCORING_VERSION
+from .columnar import FEATURE_DTYPE, SCORE_DTYPE, feature_table, score_table
+from .ingest import ingest_document, serial_pdf_extraction
+
+EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+
+def discover(source):
+    """Files to score: every supported file under a directory, or the paths listed in a manifest."""
+    if os.path.isdir(source):
+        paths = []
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            paths.extend(os.path.join(root, name) for name in sorted(files)
+                         if name.lower().endswith(EXTENSIONS))
+        return paths
+    base = os.path.dirname(source)
+    paths = []
+    with open(source, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                paths.append(line if os.path.isabs(line) else os.path.join(base, line))
+    return paths
+
+
+def score_files(paths, sentiment=True):
+    """
+    Extract and score a chunk of files (runs in a worker process).
+    Returns one row per path; unreadable or too-short documents carry an
+    error and no scores.
+    """
+    rows = []
+    texts = []
+    scored = []
+    for path in paths:
+        row = {'path': path, 'bytes': 0, 'chars': 0, 'error': None}
+        rows.append(row)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            row['error'] = str(e)
+            continue
+        row['bytes'] = len(data)
+        text, message = ingest_document(data, os.path.basename(path))
+        if text is None:
+            row['error'] = message.lstrip('❌ ')
+        elif len(text.strip()) < 20:
+            row['error'] = 'Text too short. Provide at least 20 characters.'
+        else:
+            row['chars'] = len(text)
+            texts.append(text)
+            scored.append(row)
+
+    if texts:
+        features = feature_table(texts, sentiment=sentiment)
+        scores = score_table(features)
+        for i, row in enumerate(scored):
+            for name in SCORE_DTYPE.names:
+                row[name] = float(scores[name][i])
+            diagnostics = {}
+            for name in FEATURE_DTYPE.names:
+                value = features[name][i].item()
+                diagnostics[name] = None if value != value else value  # NaN: sentiment skipped
+            row['diagnostics'] = diagnostics
+    return rows
+
+
+class JsonlWriter:
+    """Appends rows to a JSONL file; a checkpoint position is the file size."""
+
+    def __init__(self, path, position=0):
+        self.path = path
+        self._file = open(path, 'ab')
+        # Rows written after the last checkpoint are scored again, so drop them.
+        self._file.truncate(position)
+        self._file.seek(position)
+
+    def write(self, rows):
+        for row in rows:
+            self._file.write(json.dumps(row, ensure_ascii=False).encode('utf-8') + b'\n')
+
+    def commit(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Writes rows as numbered Parquet parts in a directory; a checkpoint position is the part count."""
+
+    def __init__(self, path, position=0):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow: pip install pyarrow (or write .jsonl)")
+        self.path = path
+        self.parts = position
+        self._rows = []
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith('part-') and int(name[5:10]) >= position:
+                os.remove(os.path.join(path, name))
+
+    def write(self, rows):
+        self._rows.extend(rows)
+
+    def commit(self):
+        if self._rows:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            final = os.path.join(self.path, f'part-{self.parts:05d}.parquet')
+            pq.write_table(pa.Table.from_pylist(self._rows), final + '.tmp')
+            os.replace(final + '.tmp', final)
+            self.parts += 1
+            self._rows = []
+        return self.parts
+
+    def close(self):
+        pass
+
+
+def load_checkpoint(path):
+    """Returns (settings, completed paths, writer position) from a checkpoint file."""
+    settings = None
+    done = set()
+    position = 0
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # torn last line from an interrupted write
+            if settings is None:
+                settings = record
+                continue
+            done.update(record['done'])
+            position = record['position']
+    return settings, done, position
+
+
+class Progress:
+    """Throughput and ETA, printed to stderr at most every `interval` seconds."""
+
+    def __init__(self, total, skipped=0, interval=5.0):
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._last = 0.0
+
+    def update(self, rows):
+        self.done += len(rows)
+        self.failed += sum(1 for row in rows if row['error'])
+        self.bytes += sum(row['bytes'] for row in rows)
+
+    def report(self, force=False):
+        now = time.perf_counter()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        elapsed = max(now - self.started, 1e-9)
+        rate = self.done / elapsed
+        remaining = self.total - self.skipped - self.done
+        eta = format_duration(remaining / rate) if rate else '?'
+        finished = self.skipped + self.done
+        print(f"{finished}/{self.total} files ({finished / max(self.total, 1):.1%}), {self.failed} failed | "
+              f"{rate:.1f} files/s, {self.bytes / elapsed / 1e6:.2f} MB/s | "
+              f"elapsed {format_duration(elapsed)}, ETA {eta}", file=sys.stderr, flush=True)
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def _init_worker():
+    # Ctrl-C is handled once, in the parent, which then stops the pool.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Workers already run in parallel; a per-worker PDF pool would multiply processes.
+    serial_pdf_extraction()
+
+
+def iter_results(chunks, score, workers):
+    """Yields each chunk's rows as it completes, keeping at most 2 chunks per worker in flight."""
+    if workers <= 1:
+        yield from map(score, chunks)
+        return
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        pending = set()
+        chunks = iter(chunks)
+        for chunk in chunks:
+            pending.add(pool.submit(score, chunk))
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score a document archive offline.')
+    parser.add_argument('source', help='directory to walk, or a manifest file with one path per line')
+    parser.add_argument('-o', '--output', required=True, help='.jsonl file or .parquet directory')
+    parser.add_argument('--format', choices=('jsonl', 'parquet'), help='default: from the output name')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=16, help='files per worker task')
+    parser.add_argument('--commit-every', type=int, default=500, help='rows between checkpoints')
+    parser.add_argument('--no-sentiment', action='store_true', help='skip document sentiment (much faster)')
+    parser.add_argument('--restart', action='store_true', help='discard earlier output and checkpoint')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='seconds between progress lines')
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('parquet' if args.output.endswith('.parquet') else 'jsonl')
+    checkpoint_path = args.output.rstrip('/') + '.checkpoint'
+    settings = {'scoring_version': SCORING_VERSION, 'sentiment': not args.no_sentiment, 'format': fmt}
+
+    if args.restart:
+        for path in (args.output, checkpoint_path):
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+    done = set()
+    position = 0
+    resuming = os.path.exists(checkpoint_path)
+    if resuming:
+        previous, done, position = load_checkpoint(checkpoint_path)
+        if previous != settings:
+            print(f"{checkpoint_path} was written with {previous}, not {settings}; "
+                  f"use --restart to score everything again", file=sys.stderr)
+            return 1
+    elif os.path.exists(args.output):
+        print(f"{args.output} exists without a checkpoint; use --restart to overwrite it", file=sys.stderr)
+        return 1
+    writer = (ParquetWriter if fmt == 'parquet' else JsonlWriter)(args.output, position)
+    if not resuming:
+        with open(checkpoint_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(settings) + '\n')
+
+    paths = discover(args.source)
+    todo = [p for p in paths if p not in done]
+    if done:
+        print(f"Resuming: {len(paths) - len(todo)} of {len(paths)} files already scored", file=sys.stderr)
+    chunks = [todo[i:i + args.chunk_size] for i in range(0, len(todo), args.chunk_size)]
+
+    progress = Progress(len(paths), skipped=len(paths) - len(todo), interval=args.progress_interval)
+    score = partial(score_files, sentiment=not args.no_sentiment)
+    uncommitted = []
+
+    def commit():
+        position = writer.commit()
+        with open(checkpoint_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'position': position, 'done': uncommitted}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        uncommitted.clear()
+
+    try:
+        for rows in iter_results(chunks, score, args.workers):
+            writer.write(rows)
+            uncommitted.extend(row['path'] for row in rows)
+            progress.update(rows)
+            if len(uncommitted) >= args.commit_every:
+                commit()
+            progress.report()
+        commit()
+    except KeyboardInterrupt:
+        # Rows since the last checkpoint may be half written; they are
+        # dropped and scored again on resume.
+        progress.report(force=True)
+        print("Interrupted; run the same command again to resume.", file=sys.stderr)
+        return 130
+    finally:
+        writer.close()
+    progress.report(force=True)
+    print(f"Wrote {progress.done} files to {args.output}: {progress.done - progress.failed} scored, "
+          f"{progress.failed} failed", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
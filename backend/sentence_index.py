@@ -0,0 +1,88 @@
+"""
+Per-sentence views of a cached analysis, for paged and filtered listings.
+
+An /analyze result carries one sentiment record per sentence, but only the
+top five flagged sentences. SentenceIndex re-derives the flags of every
+sentence from the sentence texts (with the same rules sentence_contributions()
+applies) and keeps polarity, subjectivity and flags as NumPy columns, so a
+filtered page is a mask and a slice rather than a pass over Python dicts.
+"""
+from typing import Optional
+
+import numpy as np
+
+from .analysis import FLAG_RULES, flag_details, flag_rules, long_sentence_threshold, sentence_stats
+
+RULE_BITS = {key: 1 << i for i, (key, *_rest) in enumerate(FLAG_RULES)}
+
+
+class SentenceIndex:
+    """Sentence texts, sentiment and flags of one analysis result."""
+
+    def __init__(self, data: dict):
+        records = data['sentiment_analysis']
+        n = len(records)
+        self.texts = [r['text'] for r in records]
+        self.polarity = np.fromiter((r['polarity'] for r in records), dtype=np.float64, count=n)
+        self.subjectivity = np.fromiter((r['subjectivity'] for r in records), dtype=np.float64, count=n)
+
+        long_threshold = long_sentence_threshold(data['diagnostics'])
+        self.flags = np.zeros(n, dtype=np.int64)
+        self.flag_scores = np.zeros(n, dtype=np.float64)
+        self._broken = {}
+        for i, text in enumerate(self.texts):
+            tokens, unique, causal, _modal = sentence_stats(text)
+            broken = flag_rules(len(tokens), unique, causal, long_threshold)
+            if broken:
+                self._broken[i] = broken
+                self.flags[i] = sum(RULE_BITS[key] for key in broken)
+                self.flag_scores[i] = flag_details(broken)['score']
+        # Highest score first, document order within a score, as sentence_contributions() sorts.
+        self.flagged_order = np.argsort(-self.flag_scores, kind='stable')[:len(self._broken)]
+
+    def __len__(self):
+        return len(self.texts)
+
+    def rule_counts(self) -> dict:
+        """Number of sentences breaking each flagging rule."""
+        return {key: int(np.count_nonzero(self.flags & bit)) for key, bit in RULE_BITS.items()}
+
+    def sentiment(self, i: int) -> dict:
+        return {
+            'index': i,
+            'text': self.texts[i],
+            'polarity': float(self.polarity[i]),
+            'subjectivity': float(self.subjectivity[i]),
+            'flagged': bool(self.flags[i]),
+        }
+
+    def flagged(self, i: int) -> dict:
+        broken = self._broken[i]
+        return {'index': i, 'sentence': self.texts[i], 'rules': broken, **flag_details(broken)}
+
+    def sentiment_page(self, offset: int, limit: int,
+                       min_polarity: float = -1.0, max_polarity: float = 1.0,
+                       min_subjectivity: float = 0.0, max_subjectivity: float = 1.0,
+                       flagged: Optional[bool] = None):
+        """
+        Sentences in document order whose scores fall in the given (inclusive)
+        ranges, optionally only flagged or only unflagged ones.
+        Returns: (number of matching sentences, records for [offset, offset + limit))
+        """
+        mask = ((self.polarity >= min_polarity) & (self.polarity <= max_polarity)
+                & (self.subjectivity >= min_subjectivity) & (self.subjectivity <= max_subjectivity))
+        if flagged is not None:
+            mask &= (self.flags != 0) == flagged
+        matches = np.flatnonzero(mask)
+        return len(matches), [self.sentiment(int(i)) for i in matches[offset:offset + limit]]
+
+    def flagged_page(self, offset: int, limit: int, rule: Optional[str] = None):
+        """
+        Flagged sentences, worst first, optionally only those breaking `rule`
+        (a FLAG_RULES key).
+        Returns: (number of matching sentences, records for [offset, offset + limit))
+        """
+        order = self.flagged_order
+        if rule is not None:
+            order = order[(self.flags[order] & RULE_BITS[rule]) != 0]
+        return len(order), [self.flagged(int(i)) for i in order[offset:offset + limit]]
@@ -0,0 +1,237 @@
+"""
+Sentence and document sentiment for PaperIQ.
+
+Reproduces TextBlob's default PatternAnalyzer scores exactly, but tokenizes
+the text once and scores every sentence against a flattened copy of the
+pattern lexicon instead of building one TextBlob per sentence.
+
+TextBlob (and NLTK under it) is imported on first use rather than at module
+load, so API workers start without paying for it; call load_lexicon() to
+load it ahead of the first request.
+"""
+pattern_sentiment = None
+PUNCTUATION = RE_EMOTICONS = RE_SARCASM = None
+
+_lexicon = None
+_emoticons = None
+
+
+def _import_textblob():
+    global pattern_sentiment, PUNCTUATION, RE_EMOTICONS, RE_SARCASM
+    from textblob.en import sentiment
+    from textblob._text import EMOTICONS, PUNCTUATION, RE_EMOTICONS, RE_SARCASM
+    pattern_sentiment = sentiment
+    return EMOTICONS
+
+
+def load_lexicon():
+    """Flatten the pattern sentiment lexicon into {word: (p, s, i, is_modifier)}."""
+    global _lexicon, _emoticons
+    if _lexicon is None:
+        EMOTICONS = _import_textblob()
+        # Membership test triggers pattern's lazy XML load.
+        'good' in pattern_sentiment
+        modifiers = pattern_sentiment.modifiers
+        lexicon = {}
+        for word, senses in dict.items(pattern_sentiment):
+            if None not in senses:
+                continue
+            p, s, i = senses[None]
+            lexicon[word] = (p, s, i, any(m in senses for m in modifiers))
+        emoticons = {}
+        for (_type, p), faces in EMOTICONS.items():
+            for face in faces:
+                emoticons.setdefault(face.lower(), p)
+        _emoticons = emoticons
+        _lexicon = lexicon
+    return _lexicon
+
+
+def tokenize(text):
+    """Token stream exactly as pattern's Sentiment sees it (before lowercasing)."""
+    if pattern_sentiment is None:
+        load_lexicon()
+    return " ".join(pattern_sentiment.tokenizer(text)).split()
+
+
+def fold(tokens, a, m=None, n=None):
+    """
+    Run pattern's Sentiment.assessments() state machine over tokens,
+    appending [polarity, subjectivity, intensity, negated] entries to `a`.
+    (m, n) is the pending modifier/negation carried in from earlier tokens.
+    Returns: the (m, n) state after the last token
+    """
+    lexicon = load_lexicon()
+    negations = pattern_sentiment.negations
+    modifier = pattern_sentiment.modifier
+    for w in tokens:
+        w = w.lower()
+        entry = lexicon.get(w)
+        if entry is not None:
+            p, s, i, is_modifier = entry
+            if m is None:
+                a.append([p, s, i, 1])
+            else:
+                last = a[-1]
+                last[0] = max(-1.0, min(p * last[2], +1.0))
+                last[1] = max(-1.0, min(s * last[2], +1.0))
+                last[2] = i
+            if n is not None:
+                a[-1][2] = 1.0 / a[-1][2]
+                a[-1][3] = -1
+            m = w if is_modifier else None
+            n = w if w in negations else None
+        else:
+            if w in negations:
+                n = w
+            elif n and len(w.strip("'")) > 1:
+                n = None
+            if n is not None and m is not None and modifier(m):
+                a[-1][3] = -1
+                n = None
+            elif m and len(w) > 2:
+                m = None
+            if w == "!" and a:
+                a[-1][0] = max(-1.0, min(a[-1][0] * 1.25, +1.0))
+            if w == "(!)":
+                a.append([0.0, 1.0, 1.0, 1])
+            if w.isalpha() is False and len(w) <= 5 and w not in PUNCTUATION:
+                p = _emoticons.get(w)
+                if p is not None:
+                    a.append([p, 1.0, 1.0, 1])
+    return m, n
+
+
+def finalize(a):
+    """Average assessment entries into (polarity, subjectivity)."""
+    polarity = 0
+    subjectivity = 0
+    for p, s, _i, negated in a:
+        polarity += p * -0.5 if negated < 0 else p
+        subjectivity += s
+    count = float(len(a) or 1)
+    return polarity / count, subjectivity / count
+
+
+def assess(tokens):
+    """Polarity and subjectivity of a token stream, as pattern scores a string."""
+    a = []
+    fold(tokens, a)
+    return finalize(a)
+
+
+def iter_sentence_sentiment(sentences):
+    """Yields (tokens, (polarity, subjectivity)) for each sentence as it is scored."""
+    for sentence in sentences:
+        tokens = tokenize(sentence)
+        yield tokens, assess(tokens)
+
+
+def document_sentiment(text, streams):
+    """
+    Document (polarity, subjectivity) from the per-sentence token streams.
+
+    The joined streams are reused unless an emoticon or sarcasm mark could
+    merge tokens differently across sentence boundaries, in which case the
+    full text is re-tokenized so the result always matches
+    TextBlob(text).sentiment.
+    """
+    doc_tokens = [w for tokens in streams for w in tokens]
+    joined = " ".join(doc_tokens)
+    if RE_SARCASM.search(joined) or RE_EMOTICONS.search(joined):
+        doc_tokens = tokenize(text)
+    return assess(doc_tokens)
+
+
+def score_sentiment(text, sentences):
+    """
+    Returns (polarity, subjectivity, sentence_scores) for a document,
+    tokenizing each sentence once for both levels.
+    """
+    streams = []
+    sentence_scores = []
+    for tokens, score in iter_sentence_sentiment(sentences):
+        streams.append(tokens)
+        sentence_scores.append(score)
+    polarity, subjectivity = document_sentiment(text, streams)
+    return polarity, subjectivity, sentence_scores
+
+
+# Entry that stands in for the previous sentence's last assessment while a
+# sentence is scored on its own; if it changes, the sentence reaches back
+# into its predecessor (a leading "!") and cannot be folded from cache.
+_SENTINEL = (0.5, 0.5, 1.0, 1)
+
+
+class SentenceSentiment:
+    """Cached sentiment work for one sentence, reusable across document edits."""
+    __slots__ = ('tokens', 'score', 'entries', 'exit_state', 'clean_start', 'merges')
+
+    def __init__(self, sentence):
+        self.tokens = tokenize(sentence)
+        a = [list(_SENTINEL)]
+        self.exit_state = fold(self.tokens, a)
+        self.clean_start = tuple(a[0]) == _SENTINEL
+        self.entries = a[1:]
+        self.score = finalize(self.entries)
+        joined = " ".join(self.tokens)
+        self.merges = bool(RE_SARCASM.search(joined) or RE_EMOTICONS.search(joined))
+
+
+def _junction_merges(records, memo=None, width=5):
+    """
+    True if an emoticon or sarcasm mark could span a sentence boundary.
+    `memo` caches the answer per window of records across calls.
+    """
+    last = len(records) - 1
+    for i in range(1, len(records)):
+        # Records contributing the `width` tokens on either side of the boundary.
+        lo = i - 1
+        count = len(records[lo].tokens)
+        while count < width and lo > 0:
+            lo -= 1
+            count += len(records[lo].tokens)
+        hi = i
+        count = len(records[hi].tokens)
+        while count < width and hi < last:
+            hi += 1
+            count += len(records[hi].tokens)
+
+        key = tuple(records[lo:hi + 1])
+        hit = memo.get(key) if memo is not None else None
+        if hit is None:
+            left = [w for r in records[lo:i] for w in r.tokens][-width:]
+            right = [w for r in records[i:hi + 1] for w in r.tokens][:width]
+            window = " ".join(left + right)
+            hit = bool(RE_SARCASM.search(window) or RE_EMOTICONS.search(window))
+            if memo is not None:
+                memo[key] = hit
+        if hit:
+            return True
+    return False
+
+
+def fold_document(text, records, memo=None):
+    """
+    Document (polarity, subjectivity) from cached SentenceSentiment records.
+
+    Sentences entered with no pending modifier or negation contribute their
+    cached entries directly; only the rest are re-run through the state
+    machine, so unchanged sentences cost no token-level work. `memo` is an
+    optional dict reused between calls for the same document.
+    """
+    if any(r.merges for r in records) or _junction_merges(records, memo):
+        return assess(tokenize(text))
+    a = []
+    m = n = None
+    for r in records:
+        if m is None and n is None and r.clean_start:
+            if r.entries:
+                # Later sentences may only modify the last entry, so share the
+                # rest and copy that one.
+                a.extend(r.entries[:-1])
+                a.append(list(r.entries[-1]))
+            m, n = r.exit_state
+        else:
+            m, n = fold(r.tokens, a, m, n)
+    return finalize(a)
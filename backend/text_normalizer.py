@@ -0,0 +1,144 @@
+"""
+Single-pass cleanup of PDF extraction artifacts for PaperIQ.
+
+All rules are compiled once into a single alternation regex: character
+swaps (curly quotes, dashes), ligatures (which also swallow the whitespace
+PDF extractors put in front of them) and broken-word fixes, so cleaning a
+page costs one scan of the text instead of one per rule. A leading
+lookahead on the characters a rule can start with lets the regex engine
+skip everything else quickly.
+
+Extra rules can be loaded from a JSON file, e.g. via PAPERIQ_CLEAN_RULES:
+
+    {
+        "translate": {"‘": "'"},
+        "ligatures": {"ﬅ": "st"},
+        "patterns": [["analy\\s+sis", "analysis", "i"]]
+    }
+"""
+import json
+import os
+import re
+from typing import Iterable, Optional
+
+# Ligature glyphs and the letters they stand for; any whitespace before the
+# glyph is dropped along with it.
+LIGATURES = {
+    'Ɵ': 'ti',
+    'Ʃ': 'tt',
+    'Ō': 'ft',
+    'ﬂ': 'fl',
+    'ﬁ': 'fi',
+    'ﬀ': 'ff',
+    'ﬃ': 'ffi',
+    'ﬄ': 'ffl',
+}
+
+# Typographic characters replaced one-for-one.
+TRANSLATE = {
+    '’': "'",
+    '“': '"',
+    '”': '"',
+    '–': '-',
+    '—': '-',
+}
+
+# Words commonly split by extraction: (pattern, replacement, flags) where
+# flags is a string of inline regex flags such as "i".
+PATTERNS = [
+    (r'wri\s+ting', 'writing', 'i'),
+    (r'interac\s+tive', 'interactive', 'i'),
+    (r'descrip\s+tive', 'descriptive', 'i'),
+    (r'dra\s+fts', 'drafts', 'i'),
+]
+
+
+def _first_char(pattern: str, ignore_case: bool) -> Optional[set]:
+    """Characters a pattern can start with, if it starts with a plain letter or digit."""
+    if not pattern or not pattern[0].isalnum() or '|' in pattern:
+        return None
+    c = pattern[0]
+    if len(pattern) > 1 and pattern[1] in '*?{':
+        return None
+    return {c.lower(), c.upper()} if ignore_case else {c}
+
+
+class TextNormalizer:
+    """One compiled regex covering every cleanup rule."""
+
+    def __init__(self, ligatures: Optional[dict] = None, translate: Optional[dict] = None,
+                 patterns: Optional[Iterable] = None):
+        self.ligatures = dict(LIGATURES if ligatures is None else ligatures)
+        self.translate = dict(TRANSLATE if translate is None else translate)
+        self.patterns = [tuple(p) for p in (PATTERNS if patterns is None else patterns)]
+        self._compile()
+
+    def _compile(self):
+        alternatives = []
+        first_chars = set()
+        self._replacements = {}
+        if self.ligatures:
+            # Longest glyphs first so multi-character keys win over their prefixes.
+            glyphs = sorted(self.ligatures, key=len, reverse=True)
+            alternatives.append(r'(?P<lig>\s*(?P<glyph>%s))' % '|'.join(map(re.escape, glyphs)))
+            first_chars.update(g[0] for g in glyphs)
+            first_chars.add(r'\s')
+        if self.translate:
+            if any(len(c) != 1 for c in self.translate):
+                raise ValueError("translate rules map single characters")
+            alternatives.append('(?P<tr>[%s])' % ''.join(map(re.escape, self.translate)))
+            first_chars.update(self.translate)
+        for i, rule in enumerate(self.patterns):
+            pattern, replacement = rule[0], rule[1]
+            flags = rule[2] if len(rule) > 2 else ''
+            re.compile(pattern)  # report a bad rule on its own, not as part of the alternation
+            if first_chars is not None:
+                first = _first_char(pattern, 'i' in flags)
+                first_chars = first_chars | first if first else None
+            if flags:
+                pattern = f'(?{flags}:{pattern})'
+            alternatives.append(f'(?P<p{i}>{pattern})')
+            self._replacements[f'p{i}'] = replacement
+        if not alternatives:
+            self._regex = None
+            return
+        regex = '|'.join(alternatives)
+        if first_chars:
+            # Lets the regex engine skip positions no rule can start at.
+            escaped = sorted(c if c == r'\s' else re.escape(c) for c in first_chars)
+            regex = '(?=[%s])(?:%s)' % (''.join(escaped), regex)
+        self._regex = re.compile(regex)
+
+    def _replace(self, match):
+        group = match.lastgroup
+        if group == 'tr':
+            return self.translate[match.group()]
+        if group == 'lig':
+            return self.ligatures[match.group('glyph')]
+        return self._replacements[group]
+
+    def extend(self, ligatures: Optional[dict] = None, translate: Optional[dict] = None,
+               patterns: Optional[Iterable] = None):
+        """Add rules and recompile."""
+        self.ligatures.update(ligatures or {})
+        self.translate.update(translate or {})
+        self.patterns.extend(tuple(p) for p in patterns or ())
+        self._compile()
+
+    def load_rules(self, path: str):
+        """Add rules from a JSON file with optional "ligatures", "translate" and "patterns" keys."""
+        with open(path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        self.extend(rules.get('ligatures'), rules.get('translate'), rules.get('patterns'))
+
+    def __call__(self, text: str) -> str:
+        if self._regex is None:
+            return text
+        return self._regex.sub(self._replace, text)
+
+
+default_normalizer = TextNormalizer()
+
+RULES_FILE = os.environ.get('PAPERIQ_CLEAN_RULES')
+if RULES_FILE:
+    default_normalizer.load_rules(RULES_FILE)
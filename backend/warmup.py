@@ -0,0 +1,63 @@
+"""
+Start-up warm-up for PaperIQ API workers.
+
+The first analysis in a fresh process pays for loading the TextBlob
+lexicon, compiling pattern's tokenizer regexes and starting executor
+workers. The API runs the pipeline once on a built-in sample document while
+it starts, and /health reports "warming" until that is done so load
+balancers keep traffic away from cold workers.
+"""
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+# Short, but touches every stage: modals and causal connectors for the
+# reasoning proxy, a long run-on sentence for flagging, negations, modifiers,
+# "!" and an emoticon for the sentiment state machine.
+SAMPLE_DOCUMENT = (
+    "This study examines whether structured feedback improves the clarity of student essays. "
+    "We collected 240 essays from three universities and scored them with a validated rubric; "
+    "because the cohorts differed in size, the analysis is weighted, and the results should "
+    "therefore be read as indicative rather than conclusive and the effect may not generalize "
+    "to other disciplines or to writers who are not native speakers of English. "
+    "The improvement was remarkably consistent across raters! "
+    "However, the control group did not perform very badly either, so the gap is modest. "
+    "Future work could examine longer essays and more diverse prompts :)"
+)
+
+
+class WarmUp:
+    """Runs warm-up steps once and reports progress for /health and /metrics."""
+
+    def __init__(self, enabled: bool = True):
+        self.state = 'pending' if enabled else 'disabled'
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """True once requests should be routed here (a failed warm-up does not block traffic)."""
+        return self.state in ('ready', 'failed', 'disabled')
+
+    def run(self, steps: Iterable[Callable[[], object]]):
+        with self._lock:
+            if self.state != 'pending':
+                return
+            self.state = 'warming'
+        started = time.perf_counter()
+        try:
+            for step in steps:
+                step()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        self.seconds = time.perf_counter() - started
+        self.state = 'failed' if self.error else 'ready'
+
+    def status(self) -> dict:
+        info = {'state': self.state}
+        if self.seconds is not None:
+            info['seconds'] = round(self.seconds, 3)
+        if self.error:
+            info['error'] = self.error
+        return info
@@ -0,0 +1,106 @@
+"""
+Benchmark the single-pass clean_text against the previous 17-pass version.
+
+    python benchmarks/bench_clean_text.py [--pages 200] [--repeat 5]
+
+Checks that both produce identical output on a synthetic extraction-like
+corpus, then reports per-page and per-document timings.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend.text_normalizer import TextNormalizer  # noqa: E402
+
+
+def legacy_clean_text(text):
+    """clean_text as it was before the single-pass normalizer."""
+    regex_replacements = [
+        (r'\s*Ɵ', 'ti'),
+        (r'\s*Ʃ', 'tt'),
+        (r'\s*Ō', 'ft'),
+        (r'\s*ﬂ', 'fl'),
+        (r'\s*ﬁ', 'fi'),
+        (r'\s*ﬀ', 'ff'),
+        (r'\s*ﬃ', 'ffi'),
+        (r'\s*ﬄ', 'ffl'),
+    ]
+    for pattern, repl in regex_replacements:
+        text = re.sub(pattern, repl, text)
+
+    simple_replacements = {
+        '’': "'",
+        '“': '"',
+        '”': '"',
+        '–': '-',
+        '—': '-'
+    }
+    for k, v in simple_replacements.items():
+        text = text.replace(k, v)
+
+    text = re.sub(r'wri\s+ting', 'writing', text, flags=re.IGNORECASE)
+    text = re.sub(r'interac\s+tive', 'interactive', text, flags=re.IGNORECASE)
+    text = re.sub(r'descrip\s+tive', 'descriptive', text, flags=re.IGNORECASE)
+    text = re.sub(r'dra\s+fts', 'drafts', text, flags=re.IGNORECASE)
+    return text
+
+
+WORDS = (
+    "the results of this study suggest that our method improves accuracy "
+    "because the model captures long range structure therefore we argue "
+    "that further evaluation is needed for writing analysis"
+).split()
+ARTIFACTS = ['Ɵ', ' Ɵ', 'Ʃ', ' Ō', 'ﬂ', ' ﬁ', 'ﬀ', 'ﬃ', ' ﬄ', '’', '“', '”', '–', '—', '\n', '  ',
+             'wri ting', 'Interac  tive', 'descrip\ntive', 'dra fts']
+
+
+def make_page(rng, words=450):
+    parts = []
+    for _ in range(words):
+        parts.append(rng.choice(WORDS))
+        if rng.random() < 0.08:
+            parts.append(rng.choice(ARTIFACTS))
+    return ' '.join(parts)
+
+
+def best_of(fn, pages, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for page in pages:
+            fn(page)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = [make_page(rng) for _ in range(args.pages)]
+    normalizer = TextNormalizer()
+
+    mismatches = sum(legacy_clean_text(p) != normalizer(p) for p in pages)
+    if mismatches:
+        sys.exit(f"{mismatches} of {len(pages)} pages differ from the legacy output")
+
+    chars = sum(map(len, pages))
+    old = best_of(legacy_clean_text, pages, args.repeat)
+    new = best_of(normalizer, pages, args.repeat)
+    print(f"{len(pages)} pages, {chars / 1e6:.2f}M chars, best of {args.repeat}")
+    print(f"  legacy (17 passes): {old * 1000:8.1f} ms  {old / len(pages) * 1e6:7.0f} us/page")
+    print(f"  single pass:        {new * 1000:8.1f} ms  {new / len(pages) * 1e6:7.0f} us/page")
+    print(f"  speedup: {old / new:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Cold-start timings for the PaperIQ API and Streamlit apps.
+
+    python benchmarks/bench_startup.py                 # import times, best of 5
+    python benchmarks/bench_startup.py --serve         # also time uvicorn until /health is ready
+    python benchmarks/bench_startup.py --importtime    # slowest modules behind backend.main
+
+Every measurement runs in a fresh interpreter, so nothing is already in
+sys.modules. The Streamlit apps are measured by importing the modules each
+script imports at its top level (what a new session pays before the first
+render); the heavy libraries that are now loaded on first use are listed
+separately to show the cost that was moved off the start-up path.
+"""
+import argparse
+import ast
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+FRONTEND = os.path.join(ROOT, 'frontend')
+sys.path.insert(0, FRONTEND)  # so installed() finds the apps' own modules
+APPS = ('streamlit_app.py', 'streamlit_app_auth.py', 'streamlit_app_with_docs.py')
+DEFERRED = ('textblob', 'plotly.graph_objects', 'plotly.express', 'pandas', 'numpy', 'PyPDF2', 'docx', 'fpdf')
+
+
+def top_level_imports(path):
+    """Modules imported at the top level of a script, excluding streamlit itself."""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return [m for m in modules if m.split('.')[0] != 'streamlit']
+
+
+def installed(module):
+    try:
+        return importlib.util.find_spec(module.split('.')[0]) is not None
+    except ValueError:
+        return False
+
+
+def time_import(modules, cwd=ROOT, repeat=5):
+    """Best-of-`repeat` wall time, in seconds, to import `modules` in a new interpreter."""
+    code = ('import time; t = time.perf_counter()\n'
+            + ''.join(f'import {m}\n' for m in modules)
+            + 'print(time.perf_counter() - t)')
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, FRONTEND]))
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env,
+                             capture_output=True, text=True, check=True)
+        seconds = float(out.stdout.strip().splitlines()[-1])
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def time_serve(timeout=60):
+    """Seconds from launching uvicorn until /health answers 200 (warmed up), then for the first /analyze."""
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'backend.main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError('API did not become ready')
+            try:
+                urllib.request.urlopen(base + '/health', timeout=1).read()
+                break
+            except OSError:
+                time.sleep(0.02)
+        ready = time.perf_counter() - started
+        request = urllib.request.Request(
+            base + '/analyze', data=b'{"text": "This is a good, clear sentence. It works well."}',
+            headers={'Content-Type': 'application/json'})
+        first = time.perf_counter()
+        urllib.request.urlopen(request, timeout=timeout).read()
+        return ready, time.perf_counter() - first
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def print_importtime(limit):
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import backend.main'],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        rows.append((int(cumulative), name))
+    print("\nSlowest imports behind backend.main (cumulative):")
+    for cumulative, name in sorted(rows, reverse=True)[:limit]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PaperIQ cold-start timings')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--serve', action='store_true', help='time uvicorn start-up and the first request')
+    parser.add_argument('--importtime', action='store_true', help='show the slowest imports behind backend.main')
+    parser.add_argument('--limit', type=int, default=15)
+    args = parser.parse_args(argv)
+
+    print("Start-up imports (best of %d):" % args.repeat)
+    print(f"  {'backend.main':<34} {time_import(['backend.main'], repeat=args.repeat) * 1000:8.1f} ms")
+    for app in APPS:
+        modules = [m for m in top_level_imports(os.path.join(FRONTEND, app)) if installed(m)]
+        seconds = time_import(modules, cwd=FRONTEND, repeat=args.repeat)
+        print(f"  {app:<34} {seconds * 1000:8.1f} ms  ({', '.join(modules)})")
+
+    print("\nLoaded on first use:")
+    for module in DEFERRED:
+        if installed(module):
+            print(f"  {module:<34} {time_import([module], repeat=args.repeat) * 1000:8.1f} ms")
+        else:
+            print(f"  {module:<34} {'not installed':>11}")
+
+    if args.serve:
+        ready, first = time_serve()
+        print(f"\nuvicorn until /health is ready:    {ready * 1000:8.1f} ms")
+        print(f"first /analyze:                    {first * 1000:8.1f} ms")
+    if args.importtime:
+        print_importtime(args.limit)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""
+PaperIQ benchmark suite.
+
+    python benchmarks/run_benchmarks.py                      # full run
+    python benchmarks/run_benchmarks.py --quick              # smaller budget, no thesis
+    python benchmarks/run_benchmarks.py --save-baseline      # refresh benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare --fail-on-regression
+
+Microbenchmarks every analysis function on a deterministic synthetic corpus
+(abstract, paper, 500-page thesis), then runs /analyze end to end through an
+in-process ASGI client. Reports p50/p95/p99 latency, throughput and peak
+traced memory per document size, and optionally compares p50 latency with a
+stored baseline.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import backend.main as main  # noqa: E402
+from backend import analysis  # noqa: E402
+from backend.sentiment import load_lexicon, score_sentiment  # noqa: E402
+from corpus import make_corpus  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def micro_cases(text):
+    """(name, fn, args) for each function, with inputs prepared outside the timed call."""
+    doc = analysis.Document(text)
+    words = doc.words
+    features, _doc, sentence_sentiments = analysis.compute_features(text)
+    scores = analysis.score_paper(features)
+    top_flagged = analysis.sentence_contributions(doc, features)[:5]
+    return [
+        ('split_sentences', lambda t: list(analysis.split_sentences(t)), (text,)),
+        ('Document', analysis.Document, (text,)),
+        ('tokenize_words', analysis.tokenize_words, (text,)),
+        ('type_token_ratio', analysis.type_token_ratio, (words,)),
+        ('avg_word_length', analysis.avg_word_length, (words,)),
+        ('avg_sentence_length', analysis.avg_sentence_length, (doc.token_counts,)),
+        ('lexical_sophistication', analysis.lexical_sophistication, (words,)),
+        ('coherence_score', analysis.coherence_score, (doc.token_counts,)),
+        ('reasoning_proxy', analysis.reasoning_proxy, (doc,)),
+        ('structural_features', analysis.structural_features, (doc,)),
+        ('score_sentiment', score_sentiment, (text, doc.sentences)),
+        ('compute_features', analysis.compute_features, (text,)),
+        ('score_paper', analysis.score_paper, (features,)),
+        ('sentence_contributions', analysis.sentence_contributions, (doc, features)),
+        ('build_response', main.build_response, (scores, features, top_flagged, sentence_sentiments)),
+        ('analyze_text', main.analyze_text, (text,)),
+        ('analyze_to_json', main.analyze_to_json, (text,)),
+    ]
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(samples, chars):
+    samples = sorted(samples)
+    mean = statistics.fmean(samples)
+    return {
+        'n': len(samples),
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'mean_ms': mean * 1000,
+        'ops_per_s': 1 / mean if mean else 0.0,
+        'mb_per_s': chars / mean / 1e6 if mean else 0.0,
+    }
+
+
+def time_calls(fn, args, budget, min_runs, max_runs):
+    """Per-call latencies, running until both the time budget and min_runs are met."""
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < max_runs and (len(samples) < min_runs or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def peak_memory(fn, args):
+    """Peak Python heap allocated by one call, in MB."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1e6
+
+
+def run_micro(corpus, budget, only=None):
+    results = {}
+    for kind, text in corpus.items():
+        # Large documents get fewer repetitions; p99 needs a few samples at least.
+        min_runs, max_runs = (3, 20) if len(text) > 500_000 else (5, 2000)
+        for name, fn, args in micro_cases(text):
+            if only and name not in only:
+                continue
+            fn(*args)  # warm-up
+            stats = summarize(time_calls(fn, args, budget, min_runs, max_runs), len(text))
+            stats['peak_mb'] = peak_memory(fn, args)
+            results[f'micro/{name}/{kind}'] = stats
+            print_row(f'{name} [{kind}]', stats)
+    return results
+
+
+async def _e2e(corpus, requests, concurrency, cached):
+    import httpx
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        for kind, text in corpus.items():
+            n = max(3, requests // 10) if len(text) > 500_000 else requests
+            payload = {'text': text}
+            samples = []
+
+            async def one():
+                if not cached:
+                    main.result_cache.clear()
+                started = time.perf_counter()
+                r = await client.post('/analyze', json=payload)
+                r.raise_for_status()
+                samples.append(time.perf_counter() - started)
+
+            await one()  # warm-up, and fills the cache for the cached run
+            # Peak memory from one traced request; tracing would distort the timings.
+            gc.collect()
+            tracemalloc.start()
+            await one()
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            samples.clear()
+            wall = time.perf_counter()
+            for start in range(0, n, concurrency):
+                await asyncio.gather(*(one() for _ in range(min(concurrency, n - start))))
+            wall = time.perf_counter() - wall
+
+            stats = summarize(samples, len(text))
+            stats['ops_per_s'] = n / wall
+            stats['mb_per_s'] = n * len(text) / wall / 1e6
+            stats['peak_mb'] = peak / 1e6
+            label = 'hit' if cached else 'miss'
+            results[f'e2e/analyze-{label}/{kind}'] = stats
+            print_row(f'/analyze {label} [{kind}] x{n} c={concurrency}', stats)
+    return results
+
+
+def run_e2e(corpus, requests, concurrency):
+    main.analysis_executor.max_pending = 0  # the harness should measure latency, not 503s
+    results = asyncio.run(_e2e(corpus, requests, concurrency, cached=False))
+    results.update(asyncio.run(_e2e(corpus, requests, concurrency, cached=True)))
+    return results
+
+
+def print_row(label, stats):
+    print(f"  {label:<46} p50 {stats['p50_ms']:9.3f}ms  p95 {stats['p95_ms']:9.3f}ms  "
+          f"p99 {stats['p99_ms']:9.3f}ms  {stats['ops_per_s']:9.1f}/s  "
+          f"{stats['mb_per_s']:7.2f} MB/s  peak {stats['peak_mb']:7.2f} MB")
+
+
+def compare(results, baseline, tolerance):
+    """Print p50 changes against the baseline; returns the keys that regressed."""
+    regressions = []
+    print(f"\nComparison with baseline (p50, tolerance {tolerance:.0%}):")
+    for key, stats in results.items():
+        base = baseline.get('results', {}).get(key)
+        if not base or not base['p50_ms']:
+            continue
+        change = stats['p50_ms'] / base['p50_ms'] - 1
+        marker = ''
+        # Sub-10us timings are dominated by noise; report them but never fail on them.
+        if change > tolerance and base['p50_ms'] >= 0.01:
+            marker = '  REGRESSION'
+            regressions.append(key)
+        print(f"  {key:<52} {base['p50_ms']:10.3f} -> {stats['p50_ms']:10.3f} ms  {change:+7.1%}{marker}")
+    return regressions
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description='PaperIQ benchmark suite')
+    parser.add_argument('--quick', action='store_true', help='abstract and paper only, short budget')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--kinds', nargs='+', choices=('abstract', 'paper', 'thesis'))
+    parser.add_argument('--only', nargs='+', help='microbenchmark only these functions')
+    parser.add_argument('--budget', type=float, help='seconds per microbenchmark (default 1, quick 0.2)')
+    parser.add_argument('--no-micro', action='store_true')
+    parser.add_argument('--no-e2e', action='store_true')
+    parser.add_argument('--requests', type=int, default=50, help='/analyze requests per document size')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write results to --baseline')
+    parser.add_argument('--compare', action='store_true', help='compare with --baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p50 slowdown (0.2 = 20%%)')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    kinds = args.kinds or (('abstract', 'paper') if args.quick else ('abstract', 'paper', 'thesis'))
+    budget = args.budget if args.budget is not None else (0.2 if args.quick else 1.0)
+    requests = min(args.requests, 10) if args.quick else args.requests
+
+    load_lexicon()
+    corpus = make_corpus(kinds, seed=args.seed)
+    for kind, text in corpus.items():
+        print(f"{kind}: {len(text):,} chars, {len(text.split()):,} words")
+
+    results = {}
+    if not args.no_micro:
+        print("\nMicrobenchmarks:")
+        results.update(run_micro(corpus, budget, args.only))
+    if not args.no_e2e:
+        print("\nEnd to end (/analyze via ASGI):")
+        results.update(run_e2e(corpus, requests, args.concurrency))
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seed': args.seed,
+            'kinds': list(kinds),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
@@ -0,0 +1,132 @@
+"""
+Shared HTTP client for calls from the Streamlit apps to the PaperIQ API.
+
+One pooled requests.Session per process keeps connections to the backend
+alive across clicks and reruns, retries transient failures with backoff,
+applies a timeout to every call, and gzips large request bodies. Analysis
+requests (POST) are only retried when the backend has not started them.
+"""
+import gzip
+import json
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = float(os.environ.get("PAPERIQ_API_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("PAPERIQ_API_TIMEOUT", "60"))
+RETRIES = int(os.environ.get("PAPERIQ_API_RETRIES", "3"))
+BACKOFF = float(os.environ.get("PAPERIQ_API_BACKOFF", "0.5"))
+POOL_SIZE = int(os.environ.get("PAPERIQ_API_POOL_SIZE", "10"))
+# Request bodies at least this large (in bytes) are sent gzip-compressed; 0 disables.
+GZIP_MIN_BYTES = int(os.environ.get("PAPERIQ_API_GZIP_MIN_BYTES", str(64 * 1024)))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class AnalysisRetry(Retry):
+    """
+    Retries connection errors for every method and 502/503 for idempotent
+    ones (GET). A POST is only sent again on a 503 that carries Retry-After:
+    the backend's "queue full" answer, where nothing was started. A 504 is
+    an analysis that already ran out of time, so it is never repeated.
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if not self._is_method_retryable(method):
+            return bool(self.total and status_code == 503 and has_retry_after)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def get_session() -> requests.Session:
+    """The process-wide session, created on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = AnalysisRetry(
+                    total=RETRIES,
+                    connect=RETRIES,
+                    read=0,  # never replay a request the server may still be working on
+                    status=RETRIES,
+                    backoff_factor=BACKOFF,
+                    status_forcelist=(502, 503),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def post_json(url: str, payload: dict, timeout: Optional[float] = None) -> requests.Response:
+    """POST a JSON payload, gzip-compressing it when it is large."""
+    body = json.dumps(payload).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    if GZIP_MIN_BYTES and len(body) >= GZIP_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=5)
+        headers['Content-Encoding'] = 'gzip'
+    return get_session().post(url, data=body, headers=headers,
+                              timeout=(CONNECT_TIMEOUT, timeout or READ_TIMEOUT))
+
+
+def get(url: str, timeout: Optional[float] = None, params: Optional[dict] = None) -> requests.Response:
+    return get_session().get(url, params=params, timeout=(CONNECT_TIMEOUT, timeout or READ_TIMEOUT))
+
+
+def base_url(api_url: str) -> str:
+    """API root for an endpoint URL such as http://host:8000/analyze."""
+    url = api_url.rstrip('/')
+    if url.endswith('/analyze'):
+        url = url[:-len('/analyze')]
+    return url
+
+
+def health(api_url: str, timeout: float = 3) -> requests.Response:
+    """GET /health on the API that serves api_url."""
+    return get(base_url(api_url) + '/health', timeout=timeout)
+
+
+def analysis_page(api_url: str, analysis_id: str, kind: str, params: dict) -> Optional[dict]:
+    """
+    One page of /analysis/{analysis_id}/{kind} ('sentences' or 'flagged').
+    Returns None when the analysis is no longer cached on the server.
+    """
+    resp = get(f"{base_url(api_url)}/analysis/{analysis_id}/{kind}", params=params)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
+def analysis_result(api_url: str, analysis_id: str) -> Optional[dict]:
+    """The full result of an earlier analysis, or None once the server no longer caches it."""
+    resp = get(f"{base_url(api_url)}/analysis/{analysis_id}")
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
+def download_report(api_url: str, analysis_id: str, path: str, fmt: str = 'pdf') -> bool:
+    """
+    Save the server-rendered report of an earlier analysis to `path`.
+    Returns False when the server no longer caches the analysis.
+    """
+    resp = get_session().get(f"{base_url(api_url)}/report/{analysis_id}", params={'format': fmt},
+                             timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), stream=True)
+    with resp:
+        if resp.status_code == 404:
+            return False
+        resp.raise_for_status()
+        with open(path, 'wb') as f:
+            for block in resp.iter_content(64 * 1024):
+                f.write(block)
+    return True
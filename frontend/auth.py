@@ -1,35 +1,58 @@
-import json
 import os
 import hashlib
+import threading
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
+
+from history_store import HistoryStore
+from user_store import UserStore
 
 # Database file paths
 DB_DIR = Path(__file__).parent / "data"
-USERS_DB = DB_DIR / "users.json"
-HISTORY_DB = DB_DIR / "history.json"
+USERS_DB = DB_DIR / "users.db"
+# Pre-sqlite accounts file, imported automatically the first time users.db is opened
+LEGACY_USERS_DB = DB_DIR / "users.json"
+HISTORY_DB = DB_DIR / "history.db"
+# Pre-sqlite history file, imported automatically the first time history.db is opened
+LEGACY_HISTORY_DB = DB_DIR / "history.json"
 
 # Create data directory if it doesn't exist
 DB_DIR.mkdir(exist_ok=True)
 
+_history_store = None
+_history_store_lock = threading.Lock()
+_user_store = None
+_user_store_lock = threading.Lock()
+
 
 def hash_password(password: str) -> str:
     """Hash password using SHA256"""
     return hashlib.sha256(password.encode()).hexdigest()
 
 
+def get_user_store() -> UserStore:
+    """Open the accounts database, importing the legacy JSON accounts on first use"""
+    global _user_store
+    if _user_store is None:
+        with _user_store_lock:
+            if _user_store is None:
+                store = UserStore(USERS_DB)
+                if LEGACY_USERS_DB.exists():
+                    # A no-op once the store has recorded the import
+                    store.import_json(LEGACY_USERS_DB)
+                _user_store = store
+    return _user_store
+
+
 def load_users() -> dict:
     """Load users from database"""
-    if USERS_DB.exists():
-        with open(USERS_DB, 'r') as f:
-            return json.load(f)
-    return {}
+    return get_user_store().all()
 
 
 def save_users(users: dict):
     """Save users to database"""
-    with open(USERS_DB, 'w') as f:
-        json.dump(users, f, indent=2)
+    get_user_store().replace_all(users)
 
 
 def register_user(username: str, email: str, password: str) -> tuple[bool, str]:
@@ -46,23 +69,18 @@ def register_user(username: str, email: str, password: str) -> tuple[bool, str]:
     if len(password) < 6:
         return False, "Password must be at least 6 characters"
     
-    users = load_users()
-    
-    if username in users:
-        return False, "Username already exists"
-    
-    # Check if email already registered
-    for user_data in users.values():
-        if user_data['email'] == email:
-            return False, "Email already registered"
-    
-    users[username] = {
+    # Username and email uniqueness are checked under the store's write lock
+    taken = get_user_store().add(username, {
         'email': email,
         'password': hash_password(password),
         'created_at': datetime.now().isoformat()
-    }
+    })
+    
+    if taken == 'username':
+        return False, "Username already exists"
+    if taken == 'email':
+        return False, "Email already registered"
     
-    save_users(users)
     return True, "Registration successful!"
 
 
@@ -74,62 +92,55 @@ def login_user(username: str, password: str) -> tuple[bool, str]:
     if not username or not password:
         return False, "Username and password required"
     
-    users = load_users()
+    user = get_user_store().get(username)
     
-    if username not in users:
+    if user is None:
         return False, "Username not found"
     
-    if users[username]['password'] != hash_password(password):
+    if user['password'] != hash_password(password):
         return False, "Incorrect password"
     
     return True, "Login successful!"
 
 
-def load_history() -> dict:
-    """Load analysis history from database"""
-    if HISTORY_DB.exists():
-        with open(HISTORY_DB, 'r') as f:
-            return json.load(f)
-    return {}
-
-
-def save_history(history: dict):
-    """Save analysis history to database"""
-    with open(HISTORY_DB, 'w') as f:
-        json.dump(history, f, indent=2)
+def get_history_store() -> HistoryStore:
+    """Open the history database, importing the legacy JSON history on first use"""
+    global _history_store
+    if _history_store is None:
+        with _history_store_lock:
+            if _history_store is None:
+                store = HistoryStore(HISTORY_DB)
+                if LEGACY_HISTORY_DB.exists():
+                    # A no-op once the store has recorded the import
+                    store.import_json(LEGACY_HISTORY_DB)
+                _history_store = store
+    return _history_store
 
 
 def add_to_history(username: str, text: str, results: dict) -> bool:
     """Add analysis result to user's history"""
-    history = load_history()
-    
-    if username not in history:
-        history[username] = []
-    
-    history_entry = {
-        'timestamp': datetime.now().isoformat(),
-        'text_preview': text[:100] + "..." if len(text) > 100 else text,
-        'full_text': text,
-        'results': results
-    }
-    
-    history[username].append(history_entry)
-    save_history(history)
+    get_history_store().add(username, datetime.now().isoformat(), text, results)
     return True
 
 
-def get_user_history(username: str) -> list:
-    """Get analysis history for a user"""
-    history = load_history()
-    return history.get(username, [])
+def get_user_history(username: str, offset: int = 0, limit: Optional[int] = None, full: bool = False) -> list:
+    """
+    Get analysis history for a user, newest first
+    Pass offset/limit to read one page at a time; entries carry 'full_text' only with full=True.
+    """
+    return get_history_store().page(username, offset, limit, full=full)
 
 
-def delete_history_entry(username: str, index: int) -> bool:
-    """Delete a specific history entry"""
-    history = load_history()
-    
-    if username in history and 0 <= index < len(history[username]):
-        del history[username][index]
-        save_history(history)
-        return True
-    return False
+def get_history_entry(username: str, entry_id: int) -> Optional[dict]:
+    """One history entry with its full text, or None if it does not exist"""
+    return get_history_store().get(username, entry_id)
+
+
+def count_user_history(username: str) -> int:
+    """Number of saved analyses for a user"""
+    return get_history_store().count(username)
+
+
+def delete_history_entry(username: str, entry_id: int) -> bool:
+    """Delete a specific history entry by its id"""
+    return get_history_store().delete(username, entry_id)
@@ -0,0 +1,103 @@
+"""
+Plotly figure construction for the Streamlit results views.
+
+Figures are built once per analysis and kept as figure dicts with
+st.cache_data, keyed by the analysis id (or a hash of the result), so a
+rerun replays the cached JSON instead of rebuilding traces. Per-sentence
+series are bounded before they reach the browser: a rolling mean shows
+the trend, the raw points are reduced with Largest-Triangle-Three-Buckets
+(LTTB) above PAPERIQ_CHART_MAX_POINTS, and large series use WebGL
+(scattergl) traces.
+
+Imported on first use by the chart blocks, like plotly itself.
+"""
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from downsample import lttb, rolling_mean
+from report_cache import report_key
+
+# Raw points drawn per series; longer series are downsampled with LTTB.
+CHART_MAX_POINTS = int(os.environ.get("PAPERIQ_CHART_MAX_POINTS", "1000"))
+# Series with more points than this (before downsampling) use WebGL traces.
+CHART_WEBGL_POINTS = int(os.environ.get("PAPERIQ_CHART_WEBGL_POINTS", "500"))
+# Figures kept across reruns and sessions.
+CHART_CACHE_ENTRIES = int(os.environ.get("PAPERIQ_CHART_CACHE_ENTRIES", "128"))
+
+
+def figure_key(data, analysis_id=None):
+    """The analysis id, or a hash of the result computed once per result rather than on every rerun."""
+    if analysis_id:
+        return analysis_id
+    cached = st.session_state.get('figure_key')
+    if cached is None or cached[0] is not data:
+        cached = (data, report_key(data, 'figures'))
+        st.session_state['figure_key'] = cached
+    return cached[1]
+
+
+@st.cache_data(max_entries=CHART_CACHE_ENTRIES, show_spinner=False)
+def _figure_dict(key, name, _build):
+    # `_build` is not hashed: (key, name) identifies the figure.
+    return _build().to_dict()
+
+
+def plotly_chart(key, name, build, **kwargs):
+    """
+    st.plotly_chart for the figure `build()` returns, built only the first
+    time (key, name) is drawn. `key` identifies the analysis (figure_key())
+    and `name` the chart within it.
+    """
+    st.plotly_chart(_figure_dict(key, name, build), **kwargs)
+
+
+def series_trace(x, y, name, color, max_points=CHART_MAX_POINTS, **kwargs):
+    """A markers trace of (x, y), downsampled with LTTB and drawn with WebGL when the series is large."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    trace = go.Scattergl if len(x) > CHART_WEBGL_POINTS else go.Scatter
+    keep = lttb(x, y, max_points)
+    return trace(x=x[keep], y=y[keep], name=name, mode='markers',
+                 marker=dict(color=color, size=5, opacity=0.45), **kwargs)
+
+
+def sentence_sentiment_figure(records):
+    """Per-sentence polarity and subjectivity with their rolling means, bounded in size for long documents."""
+    n = len(records)
+    x = np.arange(1, n + 1, dtype=np.float64)
+    polarity = np.fromiter((r['polarity'] for r in records), dtype=np.float64, count=n)
+    subjectivity = np.fromiter((r['subjectivity'] for r in records), dtype=np.float64, count=n)
+    # About 1% of the document, so the trend reads the same at any length.
+    window = max(5, n // 100)
+    line = go.Scattergl if n > CHART_WEBGL_POINTS else go.Scatter
+    # The rolling means are smooth, so an even stride loses nothing visible.
+    stride = max(1, -(-n // CHART_MAX_POINTS))
+
+    fig = go.Figure()
+    fig.add_trace(series_trace(x, polarity, 'Polarity', '#2e7d32'))
+    fig.add_trace(series_trace(x, subjectivity, 'Subjectivity', '#1e88e5'))
+    fig.add_trace(line(x=x[::stride], y=rolling_mean(polarity, window)[::stride], mode='lines',
+                       name=f'Polarity ({window}-sentence mean)', line=dict(color='#2e7d32', width=2)))
+    fig.add_trace(line(x=x[::stride], y=rolling_mean(subjectivity, window)[::stride], mode='lines',
+                       name=f'Subjectivity ({window}-sentence mean)', line=dict(color='#1e88e5', width=2)))
+    fig.update_layout(
+        title="Sentiment Across the Document",
+        xaxis=dict(title="Sentence"),
+        yaxis=dict(title="Score", range=[-1.05, 1.05]),
+        legend=dict(orientation='h', y=-0.2),
+        margin=dict(t=60, b=40),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+    )
+    return fig
+
+
+def sentence_sentiment_chart(data, key):
+    """Draw the per-sentence sentiment chart for a result, if it has per-sentence sentiment."""
+    records = data.get('sentiment_analysis') or []
+    if len(records) < 2:
+        return
+    plotly_chart(key, 'sentence_sentiment', lambda: sentence_sentiment_figure(records), use_container_width=True)
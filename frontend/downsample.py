@@ -0,0 +1,42 @@
+"""
+Series reduction for the per-sentence charts.
+
+Plain NumPy, with no Plotly or Streamlit imports, so charts.py can bound
+what it sends to the browser and the reduction can be checked on its own.
+"""
+import numpy as np
+
+
+def lttb(x, y, n_out):
+    """
+    Indices of `n_out` points of the series (x, y) chosen by
+    Largest-Triangle-Three-Buckets: the first and last points, and from each
+    of n_out - 2 equal buckets the point forming the largest triangle with
+    the previously chosen point and the mean of the next bucket. Keeps the
+    peaks and troughs a plain stride would drop.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    chosen = np.empty(n_out, dtype=np.int64)
+    chosen[0] = 0
+    chosen[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        chosen[i + 1] = a
+    return chosen
+
+
+def rolling_mean(y, window):
+    """Trailing mean over `window` points (shorter at the start of the series)."""
+    sums = np.cumsum(np.concatenate(([0.0], y)))
+    ends = np.arange(1, len(y) + 1)
+    starts = np.maximum(0, ends - window)
+    return (sums[ends] - sums[starts]) / (ends - starts)
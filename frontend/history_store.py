@@ -0,0 +1,190 @@
+"""
+Analysis history storage for PaperIQ.
+
+Entries live in a sqlite database in WAL mode, indexed by (username, id),
+so appends, deletes and paginated reads only touch the rows involved
+instead of rewriting one JSON file holding every user's history.
+
+Migrate an existing history.json with:
+
+    python frontend/history_store.py migrate [history.json] [history.db]
+"""
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+PREVIEW_CHARS = 100
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    text_preview TEXT NOT NULL,
+    full_text TEXT NOT NULL,
+    results TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_user ON history (username, id);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    applied TEXT NOT NULL
+);
+'''
+# Marker row recording that a legacy history.json has been imported
+JSON_IMPORT = 'history.json'
+
+
+def make_preview(text: str) -> str:
+    return text[:PREVIEW_CHARS] + "..." if len(text) > PREVIEW_CHARS else text
+
+
+class HistoryStore:
+    """Per-user analysis history in sqlite; entries are dicts with an 'id' key."""
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    @staticmethod
+    def _entry(row, full: bool = True) -> dict:
+        entry = {
+            'id': row['id'],
+            'timestamp': row['timestamp'],
+            'text_preview': row['text_preview'],
+            'results': json.loads(row['results']),
+        }
+        if full:
+            entry['full_text'] = row['full_text']
+        return entry
+
+    def add(self, username: str, timestamp: str, text: str, results: dict) -> int:
+        """Append an entry and return its id."""
+        with self._lock:
+            cursor = self._db.execute(
+                'INSERT INTO history (username, timestamp, text_preview, full_text, results) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (username, timestamp, make_preview(text), text, json.dumps(results))
+            )
+            self._db.commit()
+            return cursor.lastrowid
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM history LIMIT 1').fetchone() is None
+
+    def count(self, username: str) -> int:
+        with self._lock:
+            return self._db.execute(
+                'SELECT COUNT(*) FROM history WHERE username = ?', (username,)
+            ).fetchone()[0]
+
+    def page(self, username: str, offset: int = 0, limit: Optional[int] = None,
+             newest_first: bool = True, full: bool = True) -> list[dict]:
+        """
+        Return up to `limit` entries starting at `offset` (all when limit is None).
+        With full=False the stored text is left out.
+        """
+        order = 'DESC' if newest_first else 'ASC'
+        columns = '*' if full else 'id, timestamp, text_preview, results'
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT {columns} FROM history WHERE username = ? ORDER BY id {order} LIMIT ? OFFSET ?',
+                (username, -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [self._entry(row, full) for row in rows]
+
+    def get(self, username: str, entry_id: int) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                'SELECT * FROM history WHERE username = ? AND id = ?', (username, entry_id)
+            ).fetchone()
+        return self._entry(row) if row is not None else None
+
+    def delete(self, username: str, entry_id: int) -> bool:
+        """Delete one entry; False if it does not exist or belongs to someone else."""
+        with self._lock:
+            cursor = self._db.execute(
+                'DELETE FROM history WHERE username = ? AND id = ?', (username, entry_id)
+            )
+            self._db.commit()
+            return cursor.rowcount > 0
+
+    def import_json(self, json_path) -> Optional[int]:
+        """
+        Import a legacy history.json ({username: [entry, ...]}), keeping each
+        user's entries in their original order. Returns the number imported,
+        or None if it was imported before.
+
+        The rows and the JSON_IMPORT marker are written in one IMMEDIATE
+        transaction, so concurrent callers (threads or processes) import the
+        file once, and an import interrupted before its commit leaves no rows
+        and no marker and runs again next time.
+        """
+        with open(json_path, 'r') as f:
+            history = json.load(f)
+        rows = [
+            (username, entry.get('timestamp', ''), entry.get('text_preview') or make_preview(entry.get('full_text', '')),
+             entry.get('full_text', ''), json.dumps(entry.get('results', {})))
+            for username, entries in history.items()
+            for entry in entries
+        ]
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                done = self._db.execute('SELECT 1 FROM migrations WHERE name = ?', (JSON_IMPORT,)).fetchone()
+                # Databases filled before the marker existed already hold the import
+                if not done and self._db.execute('SELECT 1 FROM history LIMIT 1').fetchone() is None:
+                    self._db.executemany(
+                        'INSERT INTO history (username, timestamp, text_preview, full_text, results) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        rows
+                    )
+                    imported = len(rows)
+                else:
+                    imported = None
+                if not done:
+                    self._db.execute(
+                        "INSERT INTO migrations (name, applied) VALUES (?, datetime('now'))", (JSON_IMPORT,)
+                    )
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def main(argv):
+    if not argv or argv[0] != 'migrate':
+        print(__doc__.strip())
+        return 1
+    data_dir = Path(__file__).parent / "data"
+    json_path = Path(argv[1]) if len(argv) > 1 else data_dir / "history.json"
+    db_path = Path(argv[2]) if len(argv) > 2 else data_dir / "history.db"
+    if not json_path.exists():
+        print(f"{json_path} not found")
+        return 1
+    store = HistoryStore(db_path)
+    count = store.import_json(json_path)
+    store.close()
+    if count is None:
+        print(f"{db_path} already holds an imported history; not importing twice")
+        return 1
+    print(f"Imported {count} entries from {json_path} into {db_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
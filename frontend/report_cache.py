@@ -0,0 +1,112 @@
+"""
+Rendered PDF report cache for PaperIQ.
+
+Reports are keyed by a hash of the analysis result, rendered once on a
+background thread and kept as files on disk, so a Streamlit rerun (a tab
+switch, a widget change) never rebuilds a report it has already built and
+no copy of the PDF stays in memory between reruns. The directory holds at
+most `max_files` reports; the least recently used are removed first. A
+failed render is retried once `retry_after` seconds have passed.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+REPORT_DIR = os.environ.get("PAPERIQ_REPORT_DIR") or os.path.join(tempfile.gettempdir(), "paperiq-reports")
+REPORT_CACHE_FILES = int(os.environ.get("PAPERIQ_REPORT_CACHE_FILES", "64"))
+# Seconds a failed render's error is shown before the report is rendered again.
+REPORT_RETRY_SECONDS = float(os.environ.get("PAPERIQ_REPORT_RETRY_SECONDS", "30"))
+
+
+def report_key(data: dict, kind: str = 'pdf') -> str:
+    """Hash of an analysis result (and report kind) that identifies its report."""
+    h = hashlib.sha256(kind.encode())
+    h.update(b'\0')
+    h.update(json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    return h.hexdigest()
+
+
+class ReportCache:
+    """Renders reports on a thread pool into files named by report_key()."""
+
+    def __init__(self, directory: str = REPORT_DIR, max_files: int = REPORT_CACHE_FILES, workers: int = 2,
+                 retry_after: float = REPORT_RETRY_SECONDS):
+        self.directory = directory
+        self.max_files = max_files
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='paperiq-report')
+        self._rendering = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str, suffix: str = '.pdf') -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key: str, suffix: str = '.pdf') -> Optional[str]:
+        """Path of a finished report, or None."""
+        path = self.path(key, suffix)
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        return path
+
+    def submit(self, key: str, render: Callable[[str], None], suffix: str = '.pdf') -> Future:
+        """
+        Future for the report's path. `render(path)` writes the report and
+        runs at most once per key, however many reruns or sessions ask; after
+        a failure, once more when `retry_after` seconds have passed.
+        """
+        path = self.get(key, suffix)
+        if path is not None:
+            done = Future()
+            done.set_result(path)
+            return done
+        with self._lock:
+            future = self._rendering.get(key)
+            failed = self._failed.get(key)
+            if future is None or (failed is not None and time.monotonic() - failed >= self.retry_after):
+                self._failed.pop(key, None)
+                future = self._pool.submit(self._render, key, render, suffix)
+                self._rendering[key] = future
+            return future
+
+    def _render(self, key, render, suffix):
+        path = self.path(key, suffix)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            render(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            # The failed future stays in place, so reruns show the error
+            # instead of rendering again, until retry_after has passed.
+            with self._lock:
+                self._failed[key] = time.monotonic()
+            raise
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        with self._lock:
+            self._rendering.pop(key, None)
+        self._evict()
+        return path
+
+    def _evict(self):
+        try:
+            entries = [e for e in os.scandir(self.directory) if not e.name.endswith('.tmp')]
+        except FileNotFoundError:
+            return
+        if len(entries) <= self.max_files:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_files]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,124 @@
+"""
+Offloaded analysis results for Streamlit session history.
+
+A full /analyze result carries every sentence's text and sentiment, so
+keeping each one in st.session_state['history'] lets a single session hold
+hundreds of MB in a process shared by all users. History entries instead
+hold a compact summary and a key: the result itself is written once,
+gzip-compressed, to a ResultStore directory shared by every session, and
+read back on "View Report". Each session also keeps its most recently
+viewed results in a SessionResults LRU bounded by a byte budget.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+RESULT_DIR = os.environ.get("PAPERIQ_RESULT_DIR") or os.path.join(tempfile.gettempdir(), "paperiq-results")
+RESULT_STORE_MB = float(os.environ.get("PAPERIQ_RESULT_STORE_MB", "512"))
+# Results held in memory per session, by their serialized size.
+SESSION_RESULTS_MB = float(os.environ.get("PAPERIQ_SESSION_RESULTS_MB", "16"))
+# History entries (summaries) kept per session; older ones are dropped.
+SESSION_HISTORY_MAX = int(os.environ.get("PAPERIQ_SESSION_HISTORY_MAX", "100"))
+
+
+def result_key(body: bytes) -> str:
+    """Content hash of a serialized result."""
+    return hashlib.sha256(body).hexdigest()
+
+
+class ResultStore:
+    """Serialized results as gzip files named by result_key(); least recently used removed first."""
+
+    def __init__(self, directory: str = RESULT_DIR, max_mb: float = RESULT_STORE_MB):
+        self.directory = directory
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.json.gz')
+
+    def put(self, body: bytes) -> str:
+        """Store a serialized (JSON) result and return its key."""
+        key = result_key(body)
+        path = self.path(key)
+        if os.path.exists(path):
+            os.utime(path)
+            return key
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(gzip.compress(body, compresslevel=5))
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._evict()
+        return key
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                body = gzip.decompress(f.read())
+            os.utime(path)  # mark as recently used
+        except (FileNotFoundError, OSError, EOFError):
+            return None
+        return json.loads(body)
+
+    def _evict(self):
+        with self._lock:
+            try:
+                entries = [e for e in os.scandir(self.directory) if e.name.endswith('.json.gz')]
+            except FileNotFoundError:
+                return
+            stats = [(e, e.stat()) for e in entries]
+            total = sum(st.st_size for _e, st in stats)
+            if total <= self.max_bytes:
+                return
+            stats.sort(key=lambda item: item[1].st_mtime)
+            for entry, st in stats:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+                total -= st.st_size
+
+
+class SessionResults:
+    """
+    Full results one session holds in memory, least recently viewed evicted
+    first once their serialized sizes exceed `max_mb`. The newest result is
+    always kept, however large.
+    """
+
+    def __init__(self, max_mb: float = SESSION_RESULTS_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.bytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, data: dict, size: int):
+        if key in self._entries:
+            self.bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (data, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _key, (_data, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted
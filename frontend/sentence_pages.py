@@ -0,0 +1,167 @@
+"""
+Paged sentence listings for the Streamlit results views.
+
+Rendering one element per sentence makes a long thesis cost thousands of
+widgets on every rerun. These views ask the API for one filtered page at a
+time (/analysis/{id}/sentences and /analysis/{id}/flagged, using the
+X-Analysis-Id of the /analyze response) and render only that page: the
+sentiment page as a single table, the flagged page as a few expanders.
+Results without an analysis id, or whose analysis has left the server
+cache, are paged the same way from the result held in the session (which
+only has the top five flagged sentences).
+"""
+import html
+import os
+
+import streamlit as st
+
+import api_client
+
+SENTENCE_PAGE_SIZE = int(os.environ.get("PAPERIQ_SENTENCE_PAGE_SIZE", "25"))
+FLAGGED_PAGE_SIZE = int(os.environ.get("PAPERIQ_FLAGGED_PAGE_SIZE", "10"))
+
+# Flagging rules as the API names them, with the reason text they produce.
+RULES = {
+    'long': ("Too long", "Sentence is too long and complex"),
+    'repetitive': ("Repetitive vocabulary", "Repetitive vocabulary"),
+    'transitions': ("Missing transitions", "Lack of transition words"),
+}
+FLAGGED_CHOICES = {"All sentences": None, "Flagged only": True, "Not flagged": False}
+
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def fetch_page(api_url, analysis_id, kind, params):
+    """A page from the API (None if the analysis has expired there); params is a sorted tuple of items."""
+    return api_client.analysis_page(api_url, analysis_id, kind, dict(params))
+
+
+def local_sentiment_page(data, params):
+    records = data.get('sentiment_analysis') or []
+    flagged_texts = {s.get('sentence') if isinstance(s, dict) else s
+                     for s in data.get('top_flagged_sentences') or []}
+    matches = []
+    for i, s in enumerate(records):
+        if not (params['min_polarity'] <= s['polarity'] <= params['max_polarity']
+                and params['min_subjectivity'] <= s['subjectivity'] <= params['max_subjectivity']):
+            continue
+        flagged = s['text'] in flagged_texts
+        if params.get('flagged') is not None and flagged != params['flagged']:
+            continue
+        matches.append({'index': i, **s, 'flagged': flagged})
+    return {'total': len(matches), 'items': matches[params['offset']:params['offset'] + params['limit']]}
+
+
+def local_flagged_page(data, params):
+    items = [s if isinstance(s, dict) else {'sentence': s} for s in data.get('top_flagged_sentences') or []]
+    rules = {key: sum(1 for s in items if reason in s.get('reason', '')) for key, (_label, reason) in RULES.items()}
+    rule = params.get('rule')
+    if rule is not None:
+        items = [s for s in items if RULES[rule][1] in s.get('reason', '')]
+    return {'total': len(items), 'items': items[params['offset']:params['offset'] + params['limit']], 'rules': rules}
+
+
+def load_page(data, analysis_id, api_url, kind, key, filters, page_size):
+    """
+    The current page of a listing, for the page number kept in session
+    state under `key`. Changing the filters (or the analysis) goes back to
+    the first page.
+    Returns: (page number, page dict with 'total' and 'items')
+    """
+    signature = (analysis_id, *sorted(filters.items()))
+    if st.session_state.get(f'{key}_filters') != signature:
+        st.session_state[f'{key}_filters'] = signature
+        st.session_state[key] = 0
+    page = st.session_state.get(key, 0)
+    local = local_sentiment_page if kind == 'sentences' else local_flagged_page
+    while True:
+        params = {**filters, 'offset': page * page_size, 'limit': page_size}
+        result = None
+        if analysis_id:
+            query = tuple(sorted((k, v) for k, v in params.items() if v is not None))
+            try:
+                result = fetch_page(api_url, analysis_id, kind, query)
+            except Exception:
+                result = None  # API unreachable: fall back to the result in the session
+        if result is None:
+            result = local(data, params)
+        # The listing can shrink under a stored page number (e.g. a new analysis).
+        if page == 0 or params['offset'] < result['total']:
+            break
+        page = (result['total'] - 1) // page_size if result['total'] else 0
+    st.session_state[key] = page
+    return page, result
+
+
+def pager(key, page, total, page_size, noun):
+    pages = max(1, -(-total // page_size))
+    prev_col, info_col, next_col = st.columns([1, 3, 1])
+    with prev_col:
+        if st.button("◀ Previous", key=f'{key}_prev', disabled=page == 0, use_container_width=True):
+            st.session_state[key] = page - 1
+            st.rerun()
+    with info_col:
+        st.caption(f"Page {page + 1} of {pages} · {total} {noun}")
+    with next_col:
+        if st.button("Next ▶", key=f'{key}_next', disabled=page + 1 >= pages, use_container_width=True):
+            st.session_state[key] = page + 1
+            st.rerun()
+
+
+def render_sentence_sentiment(data, analysis_id, api_url, key='sentiment'):
+    """Filterable, paged table of per-sentence polarity and subjectivity."""
+    f1, f2, f3 = st.columns(3)
+    with f1:
+        polarity = st.slider("Polarity", -1.0, 1.0, (-1.0, 1.0), 0.05, key=f'{key}_polarity')
+    with f2:
+        subjectivity = st.slider("Subjectivity", 0.0, 1.0, (0.0, 1.0), 0.05, key=f'{key}_subjectivity')
+    with f3:
+        flagged = FLAGGED_CHOICES[st.selectbox("Sentences", list(FLAGGED_CHOICES), key=f'{key}_flagged')]
+    filters = {
+        'min_polarity': polarity[0], 'max_polarity': polarity[1],
+        'min_subjectivity': subjectivity[0], 'max_subjectivity': subjectivity[1],
+        'flagged': flagged,
+    }
+    page, result = load_page(data, analysis_id, api_url, 'sentences', f'{key}_page', filters, SENTENCE_PAGE_SIZE)
+    if not result['items']:
+        st.info("No sentences match these filters.")
+        return
+
+    rows = []
+    for s in result['items']:
+        color = '#2e7d32' if s['polarity'] > 0.05 else '#c62828' if s['polarity'] < -0.05 else 'inherit'
+        flag = ' 🚩' if s.get('flagged') else ''
+        rows.append(
+            f"<tr><td>{s['index'] + 1}{flag}</td><td>{html.escape(s['text'])}</td>"
+            f"<td style='color:{color}'>{s['polarity']:+.2f}</td><td>{s['subjectivity']:.2f}</td></tr>"
+        )
+    # One element for the whole page instead of one per sentence.
+    st.markdown(
+        "<table style='width:100%'><tr><th>#</th><th>Sentence</th><th>Polarity</th><th>Subjectivity</th></tr>"
+        + ''.join(rows) + "</table>",
+        unsafe_allow_html=True,
+    )
+    pager(f'{key}_page', page, result['total'], SENTENCE_PAGE_SIZE, "sentences")
+
+
+def render_flagged_sentences(data, analysis_id, api_url, key='flagged'):
+    """Paged flagged sentences, worst first, filterable by the rule they break."""
+    rule = st.selectbox("Issue", [None, *RULES], key=f'{key}_rule',
+                        format_func=lambda r: "All issues" if r is None else RULES[r][0])
+    page, result = load_page(data, analysis_id, api_url, 'flagged', f'{key}_page', {'rule': rule}, FLAGGED_PAGE_SIZE)
+    if result.get('rules'):
+        st.caption(" · ".join(f"{RULES[r][0]}: {n}" for r, n in result['rules'].items()))
+
+    if not result['items']:
+        if rule is None:
+            st.success("No critical issues found!")
+        else:
+            st.info("No sentences break this rule.")
+        return
+
+    for s in result['items']:
+        sentence = s.get('sentence', '')
+        with st.expander(f"Flagged: \"{sentence[:50]}...\"", expanded=True):
+            st.write(f"**Full Sentence:** {sentence}")
+            st.write(f"**Issue:** {s.get('reason', 'N/A')}")
+            st.info(f"**Suggestion:** {s.get('suggestion', 'N/A')}")
+    pager(f'{key}_page', page, result['total'], FLAGGED_PAGE_SIZE, "flagged sentences")
@@ -1,10 +1,8 @@
 import streamlit as st
-import requests
 import os
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-import numpy as np
+
+import api_client
+from document_processor import extract_text_from_file, get_supported_formats
 
 # Prefer environment variable, fall back to st.secrets if present. Accessing
 # `st.secrets` can raise when no secrets are configured, so protect it.
@@ -19,6 +17,14 @@ except Exception:
 st.set_page_config(page_title="PaperIQ (Full)", layout="wide")
 st.title("PaperIQ — AI-Powered Research Insight Analyzer")
 text = st.text_area("Paste your paper / essay / abstract here", height=300)
+uploaded_file = st.file_uploader("...or upload a document", type=get_supported_formats())
+if uploaded_file is not None:
+    file_text, message = extract_text_from_file(uploaded_file)
+    if file_text:
+        st.caption(message)
+        text = file_text
+    else:
+        st.error(message)
 col1, col2 = st.columns([1,2])
 
 if st.button("Analyze"):
@@ -26,7 +32,7 @@ if st.button("Analyze"):
         st.warning("Please paste at least 20 characters of text.")
     else:
         try:
-            resp = requests.post(API_URL, json={"text": text}, timeout=15)
+            resp = api_client.post_json(API_URL, {"text": text})
             if resp.status_code != 200:
                 st.error(f"API error: {resp.status_code} - {resp.text}")
             else:
@@ -143,6 +149,11 @@ if st.button("Analyze"):
                         'Category': ['Language\nQuality', 'Coherence\n& Flow', 'Reasoning\nStrength'],
                         'Score': [data['language'], data['coherence'], data['reasoning']]
                     }
+                    # Charting libraries are imported on first use to keep cold starts fast.
+                    import plotly.graph_objects as go
+                    import plotly.express as px
+                    import pandas as pd
+
                     fig = go.Figure()
                     fig.add_trace(go.Scatterpolar(
                         r=scores['Score'],
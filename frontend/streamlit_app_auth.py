@@ -1,13 +1,10 @@
 import streamlit as st
-import requests
 import os
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-import numpy as np
 from datetime import datetime
-from auth import register_user, login_user, add_to_history, get_user_history, delete_history_entry
+import api_client
+from auth import register_user, login_user, add_to_history, get_user_history, get_history_entry, count_user_history, delete_history_entry
 from document_processor import extract_text_from_file, get_supported_formats
+from sentence_pages import render_flagged_sentences, render_sentence_sentiment
 
 # Page config
 st.set_page_config(page_title="PaperIQ", layout="wide", initial_sidebar_state="expanded")
@@ -27,6 +24,9 @@ try:
 except Exception:
     pass
 
+# Saved analyses shown per page on the history page
+HISTORY_PAGE_SIZE = 10
+
 
 def show_login_page():
     """Display login page"""
@@ -150,7 +150,8 @@ def show_analysis_page():
         else:
             with st.spinner("🔄 Analyzing your text..."):
                 try:
-                    resp = requests.post(API_URL, json={"text": text}, timeout=15)
+                    st.session_state.pop('last_analysis', None)
+                    resp = api_client.post_json(API_URL, {"text": text})
                     if resp.status_code != 200:
                         st.error(f"❌ API error: {resp.status_code} - {resp.text}")
                     else:
@@ -160,20 +161,24 @@ def show_analysis_page():
                         add_to_history(st.session_state.username, text, data)
                         st.success("✅ Analysis saved to your history!")
                         
-                        # Display results
-                        display_analysis_results(data)
+                        # Kept so the results survive the reruns their page controls trigger
+                        st.session_state['last_analysis'] = (data, resp.headers.get('X-Analysis-Id'))
                         
                 except Exception as e:
                     st.error(f"❌ Failed to call API: {e}")
+    
+    # Display results
+    if st.session_state.get('last_analysis'):
+        display_analysis_results(*st.session_state['last_analysis'])
 
 
-def display_analysis_results(data):
+def display_analysis_results(data, analysis_id=None):
     """Display analysis results with visualizations"""
     st.markdown("---")
     st.header("📊 Analysis Results")
     
     # Main scores tab and visualizations tab
-    tab1, tab2 = st.tabs(["📊 Scores & Analysis", "📈 Visualizations"])
+    tab1, tab2, tab3 = st.tabs(["📊 Scores & Analysis", "📈 Visualizations", "💭 Sentiment"])
     
     with tab1:
         col1, col2 = st.columns([1, 2])
@@ -251,12 +256,9 @@ def display_analysis_results(data):
                         st.warning("Consider improving text flow and transitions")
         
         with col2:
-            st.write('### Top flagged sentences')
-            if data['top_flagged_sentences']:
-                for s in data['top_flagged_sentences']:
-                    st.markdown(f"<div style='background-color:#2e7d32;color:white;padding:8px;border-radius:4px;margin:4px 0'>{s}</div>", unsafe_allow_html=True)
-            else:
-                st.info("✓ No significant issues found!")
+            st.write('### Flagged sentences')
+            # One page at a time, so long documents do not render every flagged sentence.
+            render_flagged_sentences(data, analysis_id, API_URL, key='auth_flagged')
     
     with tab2:
         st.markdown("""
@@ -286,39 +288,51 @@ def display_analysis_results(data):
             'Category': ['Language\nQuality', 'Coherence\n& Flow', 'Reasoning\nStrength'],
             'Score': [data['language'], data['coherence'], data['reasoning']]
         }
-        fig = go.Figure()
-        fig.add_trace(go.Scatterpolar(
-            r=scores['Score'],
-            theta=scores['Category'],
-            fill='toself',
-            name='Score Distribution',
-            fillcolor='rgba(46, 125, 50, 0.5)',
-            line=dict(color='#2e7d32', width=2)
-        ))
-        fig.update_layout(
-            polar=dict(
-                radialaxis=dict(
-                    visible=True,
-                    range=[0, 100],
-                    tickfont=dict(size=12),
-                    ticksuffix='%'
+        # Charting libraries are imported on first use to keep cold starts fast.
+        import plotly.graph_objects as go
+        import plotly.express as px
+        import pandas as pd
+        import charts
+
+        # Figures are built once per analysis; reruns reuse the cached figure JSON.
+        fig_key = charts.figure_key(data, analysis_id)
+
+        def radar_figure():
+            fig = go.Figure()
+            fig.add_trace(go.Scatterpolar(
+                r=scores['Score'],
+                theta=scores['Category'],
+                fill='toself',
+                name='Score Distribution',
+                fillcolor='rgba(46, 125, 50, 0.5)',
+                line=dict(color='#2e7d32', width=2)
+            ))
+            fig.update_layout(
+                polar=dict(
+                    radialaxis=dict(
+                        visible=True,
+                        range=[0, 100],
+                        tickfont=dict(size=12),
+                        ticksuffix='%'
+                    ),
+                    angularaxis=dict(
+                        tickfont=dict(size=14, family="Arial, sans-serif")
+                    )
                 ),
-                angularaxis=dict(
-                    tickfont=dict(size=14, family="Arial, sans-serif")
-                )
-            ),
-            showlegend=False,
-            title=dict(
-                text='Score Distribution by Category',
-                x=0.5,
-                y=0.95,
-                font=dict(size=20)
-            ),
-            margin=dict(t=100, b=50),
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+                showlegend=False,
+                title=dict(
+                    text='Score Distribution by Category',
+                    x=0.5,
+                    y=0.95,
+                    font=dict(size=20)
+                ),
+                margin=dict(t=100, b=50),
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)'
+            )
+            return fig
+
+        charts.plotly_chart(fig_key, 'radar', radar_figure, use_container_width=True)
 
         # Advanced metrics with explanations
         st.markdown("#### 📐 Advanced Metrics")
@@ -327,81 +341,98 @@ def display_analysis_results(data):
         Hover over the bars for detailed explanations.
         """)
         
-        metric_explanations_adv = {
-            'Average Word Length': 'Average number of characters per word. Higher values often indicate more technical/academic language.',
-            'Vocabulary Diversity': 'Ratio of unique words to total words (0-1). Higher values show more diverse vocabulary.',
-            'Language Sophistication': 'Measure of complex word usage (0-1). Higher values indicate more sophisticated language.'
-        }
+        def language_figure():
+            metric_explanations_adv = {
+                'Average Word Length': 'Average number of characters per word. Higher values often indicate more technical/academic language.',
+                'Vocabulary Diversity': 'Ratio of unique words to total words (0-1). Higher values show more diverse vocabulary.',
+                'Language Sophistication': 'Measure of complex word usage (0-1). Higher values indicate more sophisticated language.'
+            }
         
-        word_metrics = {
-            'Metric': list(metric_explanations_adv.keys()),
-            'Value': [
-                data['diagnostics']['avg_word_len'],
-                data['diagnostics']['ttr'],
-                data['diagnostics']['lex_soph']
-            ],
-            'Explanation': list(metric_explanations_adv.values())
-        }
-        df = pd.DataFrame(word_metrics)
+            word_metrics = {
+                'Metric': list(metric_explanations_adv.keys()),
+                'Value': [
+                    data['diagnostics']['avg_word_len'],
+                    data['diagnostics']['ttr'],
+                    data['diagnostics']['lex_soph']
+                ],
+                'Explanation': list(metric_explanations_adv.values())
+            }
+            df = pd.DataFrame(word_metrics)
         
-        fig = px.bar(df, 
-                    x='Metric', 
-                    y='Value',
-                    title='Detailed Language Analysis',
-                    labels={'Value': 'Score', 'Metric': ''},
-                    color_discrete_sequence=['#1e88e5'],
-                    custom_data=['Explanation'])
+            fig = px.bar(df, 
+                        x='Metric', 
+                        y='Value',
+                        title='Detailed Language Analysis',
+                        labels={'Value': 'Score', 'Metric': ''},
+                        color_discrete_sequence=['#1e88e5'],
+                        custom_data=['Explanation'])
                     
-        fig.update_traces(
-            hovertemplate="<b>%{x}</b><br>Score: %{y:.2f}<br><br>%{customdata[0]}"
-        )
+            fig.update_traces(
+                hovertemplate="<b>%{x}</b><br>Score: %{y:.2f}<br><br>%{customdata[0]}"
+            )
         
-        fig.update_layout(
-            title=dict(
-                font=dict(size=20),
-                x=0.5,
-                xanchor='center'
-            ),
-            hoverlabel=dict(
-                bgcolor="white",
-                font_size=14,
-                font_family="Arial"
-            ),
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(245,245,245,1)',
-            yaxis=dict(
-                title="Score",
-                tickformat='.2f',
-                gridcolor='rgba(200,200,200,0.2)',
-                range=[0, max(df['Value']) * 1.2]
-            ),
-            xaxis=dict(
-                title="",
-                showgrid=False
+            fig.update_layout(
+                title=dict(
+                    font=dict(size=20),
+                    x=0.5,
+                    xanchor='center'
+                ),
+                hoverlabel=dict(
+                    bgcolor="white",
+                    font_size=14,
+                    font_family="Arial"
+                ),
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(245,245,245,1)',
+                yaxis=dict(
+                    title="Score",
+                    tickformat='.2f',
+                    gridcolor='rgba(200,200,200,0.2)',
+                    range=[0, max(df['Value']) * 1.2]
+                ),
+                xaxis=dict(
+                    title="",
+                    showgrid=False
+                )
             )
-        )
-        st.plotly_chart(fig, use_container_width=True)
+            return fig
+
+        charts.plotly_chart(fig_key, 'language', language_figure, use_container_width=True)
+
+    with tab3:
+        st.markdown("### 💭 Sentence Sentiment")
+        st.info("**Polarity**: -1 (Negative) to +1 (Positive) · **Subjectivity**: 0 (Objective) to 1 (Subjective)")
+        import charts  # imported with plotly, on first use
+        charts.sentence_sentiment_chart(data, charts.figure_key(data, analysis_id))
+        render_sentence_sentiment(data, analysis_id, API_URL, key='auth_sentiment')
 
 
 def show_history_page():
     """Display user's analysis history"""
     st.title("📚 Your Analysis History")
     
-    history = get_user_history(st.session_state.username)
+    total = count_user_history(st.session_state.username)
     
-    if not history:
+    if not total:
         st.info("📭 No analysis history yet. Start by analyzing some text!")
     else:
-        st.write(f"You have **{len(history)}** saved analyses")
+        st.write(f"You have **{total}** saved analyses")
+        
+        # Only the current page of entries is loaded, newest first
+        pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1) if pages > 1 else 1
+        history = get_user_history(st.session_state.username, (page - 1) * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE)
         
-        # Display history in reverse order (newest first)
-        for idx, entry in enumerate(reversed(history)):
+        for entry in history:
             with st.expander(f"📄 {entry['text_preview']} - {entry['timestamp'][:10]}", expanded=False):
                 col1, col2 = st.columns([4, 1])
                 
                 with col1:
-                    st.write("**Full Text:**")
-                    st.write(entry['full_text'])
+                    # The text is only read from the store when asked for
+                    if st.checkbox("Show full text", key=f"full_text_{entry['id']}"):
+                        full_entry = get_history_entry(st.session_state.username, entry['id'])
+                        st.write("**Full Text:**")
+                        st.write(full_entry['full_text'] if full_entry else entry['text_preview'])
                     
                     st.markdown("---")
                     st.write("**Analysis Results:**")
@@ -419,8 +450,8 @@ def show_history_page():
                         st.metric("Reasoning", f"{results['reasoning']:.1f}/100")
                 
                 with col2:
-                    if st.button("🗑️", key=f"delete_{idx}", help="Delete this entry"):
-                        if delete_history_entry(st.session_state.username, len(history) - 1 - idx):
+                    if st.button("🗑️", key=f"delete_{entry['id']}", help="Delete this entry"):
+                        if delete_history_entry(st.session_state.username, entry['id']):
                             st.success("Deleted!")
                             st.rerun()
                         else:
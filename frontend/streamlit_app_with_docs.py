@@ -1,17 +1,11 @@
 import streamlit as st
-import requests
-import re
 import os
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-import numpy as np
-import docx
-import PyPDF2
-import io
-import json
-import streamlit.components.v1 as components
-from fpdf import FPDF
+
+import api_client
+from document_processor import ingest_document
+from report_cache import ReportCache, report_key
+from result_store import SESSION_HISTORY_MAX, ResultStore, SessionResults, result_key
+from sentence_pages import render_flagged_sentences, render_sentence_sentiment
 
 # --- Configuration & State Management ---
 st.set_page_config(
@@ -32,7 +26,10 @@ if 'current_user' not in st.session_state:
 if 'theme' not in st.session_state:
     st.session_state['theme'] = 'light'
 if 'history' not in st.session_state:
+    # Compact summaries; full results are offloaded (see result_store.py)
     st.session_state['history'] = []
+if 'results' not in st.session_state:
+    st.session_state['results'] = SessionResults()
 
 # Prefer environment variable, fall back to st.secrets if present.
 API_URL = os.environ.get("PAPERIQ_API_URL", "http://localhost:8000/analyze")
@@ -197,22 +194,43 @@ def inject_custom_css():
     """, unsafe_allow_html=True)
 
 # --- PDF Generation Helper ---
-class PDF(FPDF):
-    def header(self):
-        # Logo / Brand
-        self.set_font('Arial', 'B', 20)
-        self.set_text_color(46, 125, 50) # PaperIQ Green
-        self.cell(0, 10, 'PaperIQ Analysis Report', 0, 1, 'L')
-        self.ln(5)
-        
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.set_text_color(128, 128, 128)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-
-def create_pdf_report(data):
-    pdf = PDF()
+def new_pdf():
+    """FPDF document with the PaperIQ header and footer; fpdf is imported on first export."""
+    from fpdf import FPDF
+
+    class PDF(FPDF):
+        def header(self):
+            # Logo / Brand
+            self.set_font('Arial', 'B', 20)
+            self.set_text_color(46, 125, 50) # PaperIQ Green
+            self.cell(0, 10, 'PaperIQ Analysis Report', 0, 1, 'L')
+            self.ln(5)
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.set_text_color(128, 128, 128)
+            self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+    return PDF()
+
+def render_pdf_report(data, analysis_id, path):
+    """
+    Write the PDF report for a result to `path`: rendered by the API
+    (GET /report/{analysis_id}) when it still has the analysis, otherwise
+    locally with create_pdf_report() as an offline fallback.
+    """
+    if analysis_id:
+        try:
+            if api_client.download_report(API_URL, analysis_id, path):
+                return
+        except Exception:
+            pass  # API unreachable: render here
+    create_pdf_report(data, path)
+
+def create_pdf_report(data, path):
+    """Render the PDF report for an analysis result to the file at `path`."""
+    pdf = new_pdf()
     pdf.add_page()
     
     # --- Executive Summary ---
@@ -296,7 +314,44 @@ def create_pdf_report(data):
             pdf.multi_cell(0, 6, sentence_text)
             pdf.ln(5)
             
-    return pdf.output(dest='S').encode('latin-1')
+    # Written straight to disk rather than returned as a string plus its encoded copy.
+    pdf.output(path, 'F')
+
+@st.cache_resource
+def get_report_cache():
+    """Report renderer and on-disk cache shared by every session and rerun."""
+    return ReportCache()
+
+@st.cache_resource
+def get_result_store():
+    """On-disk store of full analysis results, shared by every session."""
+    return ResultStore()
+
+def load_history_result(entry):
+    """
+    Full result of a history entry: from this session's memory, else the
+    shared result store, else the API (while it still caches the analysis).
+    """
+    results = st.session_state['results']
+    data = results.get(entry['key'])
+    if data is None:
+        data = get_result_store().get(entry['key'])
+        if data is None and entry.get('analysis_id'):
+            try:
+                data = api_client.analysis_result(API_URL, entry['analysis_id'])
+            except Exception:
+                data = None
+        if data is not None:
+            results.put(entry['key'], data, entry['size'])
+    return data
+
+def pdf_report_key(data):
+    """report_key() for the current results, hashed once per result rather than on every rerun."""
+    cached = st.session_state.get('report_key')
+    if cached is None or cached[0] is not data:
+        cached = (data, report_key(data))
+        st.session_state['report_key'] = cached
+    return cached[1]
 
 # --- Configuration & State Management ---
 st.set_page_config(
@@ -878,55 +933,20 @@ def show_profile_page():
             with st.expander(f"{act['date']} - {act['action']}"):
                 st.write(f"**Score:** {act['score']}/100")
                 if st.button("View Report", key=f"btn_history_{i}"):
-                    st.session_state['analysis_results'] = act['data']
-                    st.session_state['page'] = 'results'
-                    st.rerun()
+                    data = load_history_result(act)
+                    if data is None:
+                        st.error("This report is no longer available. Please analyze the document again.")
+                    else:
+                        st.session_state['analysis_results'] = data
+                        st.session_state['analysis_id'] = act.get('analysis_id')
+                        st.session_state['page'] = 'results'
+                        st.rerun()
     
     st.markdown("---")
     if st.button("← Back to Dashboard", use_container_width=True):
         st.session_state['page'] = 'app'
         st.rerun()
 
-def clean_text(text):
-    """
-    Cleans text by replacing common PDF extraction artifacts/ligatures.
-    Uses regex to handle potential whitespace before the ligature.
-    """
-    # Regex replacements for ligatures (consuming preceding whitespace)
-    regex_replacements = [
-        (r'\s*Ɵ', 'ti'),
-        (r'\s*Ʃ', 'tt'),
-        (r'\s*Ō', 'ft'),
-        (r'\s*ﬂ', 'fl'),
-        (r'\s*ﬁ', 'fi'),
-        (r'\s*ﬀ', 'ff'),
-        (r'\s*ﬃ', 'ffi'),
-        (r'\s*ﬄ', 'ffl'),
-    ]
-    
-    for pattern, repl in regex_replacements:
-        text = re.sub(pattern, repl, text)
-
-    # Simple string replacements for others
-    simple_replacements = {
-        '’': "'",
-        '“': '"',
-        '”': '"',
-        '–': '-',
-        '—': '-'
-    }
-    for k, v in simple_replacements.items():
-        text = text.replace(k, v)
-        
-    # Fix specific common broken words if they persist (fallback)
-    # This handles cases where the ligature might have been already converted but with a space
-    text = re.sub(r'wri\s+ting', 'writing', text, flags=re.IGNORECASE)
-    text = re.sub(r'interac\s+tive', 'interactive', text, flags=re.IGNORECASE)
-    text = re.sub(r'descrip\s+tive', 'descriptive', text, flags=re.IGNORECASE)
-    text = re.sub(r'dra\s+fts', 'drafts', text, flags=re.IGNORECASE)
-    
-    return text
-
 def show_main_app():
     # Header with Logout & Theme Toggle
     col_brand, col_spacer, col_user, col_theme = st.columns([2, 4, 3, 1])
@@ -960,10 +980,11 @@ def show_main_app():
         st.markdown("**API Status**")
         if st.button("Check API Health"):
             try:
-                health_url = API_URL.rstrip('/') + '/health'
-                r = requests.get(health_url, timeout=3)
+                r = api_client.health(API_URL)
                 if r.status_code == 200 and r.json().get('status') == 'ok':
                     st.success("System Operational")
+                elif r.status_code == 503 and r.json().get('status') == 'warming':
+                    st.warning("API is warming up, try again in a moment")
                 else:
                     st.error(f"Status: {r.status_code}")
             except Exception as e:
@@ -988,22 +1009,10 @@ def show_main_app():
         text = pasted_text or ""
         
         if uploaded_file is not None:
-            try:
-                if uploaded_file.type == "application/pdf":
-                    import PyPDF2
-                    pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                    text = ""
-                    for page in pdf_reader.pages:
-                        extracted = page.extract_text()
-                        if extracted:
-                            text += clean_text(extracted) + "\n"
-                
-                elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                    doc = docx.Document(uploaded_file)
-                    text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            
-            except Exception as e:
-                st.error(f"Error reading file: {str(e)}")
+            # Cached by file hash, so reruns (tab clicks, theme toggles) reuse the text.
+            text, message = ingest_document(uploaded_file.getvalue(), uploaded_file.name)
+            if text is None:
+                st.error(f"Error reading file: {message}")
                 text = ""
             
             st.markdown("### Document Preview")
@@ -1017,10 +1026,20 @@ def show_main_app():
                 with st.spinner("Analyzing..."):
                     try:
                         payload = {"text": text}
-                        response = requests.post(API_URL, json=payload)
+                        response = api_client.post_json(API_URL, payload)
                         if response.status_code == 200:
+                            body = response.content
                             data = response.json()
                             st.session_state['analysis_results'] = data
+                            # Offload the full result; history keeps only a summary and its key.
+                            try:
+                                key = get_result_store().put(body)
+                            except OSError:
+                                key = result_key(body)  # kept in memory only
+                            st.session_state['results'].put(key, data, len(body))
+                            # The results page fetches sentence pages from the API by this id.
+                            analysis_id = response.headers.get('X-Analysis-Id')
+                            st.session_state['analysis_id'] = analysis_id
                             
                             # Add to history
                             from datetime import datetime
@@ -1032,8 +1051,11 @@ def show_main_app():
                                 "date": timestamp,
                                 "action": action_desc,
                                 "score": int(data['composite']),
-                                "data": data
+                                "key": key,
+                                "size": len(body),
+                                "analysis_id": analysis_id
                             })
+                            del st.session_state['history'][SESSION_HISTORY_MAX:]
                             
                             st.session_state['page'] = 'results'
                             st.rerun()
@@ -1140,6 +1162,7 @@ def show_results_page():
         return
 
     data = st.session_state['analysis_results']
+    analysis_id = st.session_state.get('analysis_id')
 
     # --- Top Level Metrics ---
     col1, col2, col3, col4 = st.columns(4)
@@ -1157,19 +1180,36 @@ def show_results_page():
     # Download Buttons
     d_col1, d_col2, d_col3 = st.columns([1, 2, 1])
     with d_col2:
-        try:
-            pdf_bytes = create_pdf_report(data)
-            st.download_button("Download PDF Report", data=pdf_bytes, file_name="papereval.pdf", mime="application/pdf", use_container_width=True)
-        except Exception as e:
-            st.error(f"PDF Generation Error: {str(e)}")
+        # The report is fetched from the API (or rendered here if it cannot)
+        # in the background while the page is shown and is reused on later
+        # reruns; only an explicit click waits for it.
+        report = get_report_cache().submit(pdf_report_key(data), lambda path: render_pdf_report(data, analysis_id, path))
+        if not report.done():
+            if st.button("Prepare PDF Report", use_container_width=True):
+                with st.spinner("Rendering report..."):
+                    report.exception()
+                st.rerun()
+        else:
+            try:
+                with open(report.result(), 'rb') as f:
+                    st.download_button("Download PDF Report", data=f, file_name="papereval.pdf", mime="application/pdf", use_container_width=True)
+            except Exception as e:
+                st.error(f"PDF Generation Error: {str(e)}")
 
     # --- Charts & Detailed Analysis ---
     tab1, tab2, tab3, tab4, tab5 = st.tabs(["📈 Visualizations", "🚩 Issues", "💡 Suggestions", "📋 Detailed Metrics", "💭 Sentiment"])
     
     with tab1:
-        c1, c2 = st.columns(2)
-        with c1:
-            # Radar Chart
+        # Charting libraries are imported on first use to keep cold starts fast.
+        import plotly.graph_objects as go
+        import plotly.express as px
+        import pandas as pd
+        import charts
+
+        # Figures are built once per analysis; reruns reuse the cached figure JSON.
+        fig_key = charts.figure_key(data, analysis_id)
+
+        def radar_figure():
             categories = ['Language', 'Coherence', 'Reasoning', 'Lexical Sophistication', 'Text Standard']
             values = [
                 data['language'], 
@@ -1190,35 +1230,29 @@ def show_results_page():
                 showlegend=False,
                 title="Metric Radar"
             )
-            st.plotly_chart(fig, use_container_width=True)
-            
-        with c2:
-            # Bar Chart for Diagnostics
+            return fig
+
+        def diagnostics_figure():
             diag = data['diagnostics']
             metrics_df = pd.DataFrame({
                 'Metric': ['Avg Sentence Len', 'Avg Word Len'],
                 'Value': [diag['avg_sentence_len'], diag['avg_word_len']]
             })
-            fig_bar = px.bar(metrics_df, x='Metric', y='Value', title="Text Statistics", color='Metric')
-            st.plotly_chart(fig_bar, use_container_width=True)
+            return px.bar(metrics_df, x='Metric', y='Value', title="Text Statistics", color='Metric')
+
+        c1, c2 = st.columns(2)
+        with c1:
+            # Radar Chart
+            charts.plotly_chart(fig_key, 'radar', radar_figure, use_container_width=True)
+            
+        with c2:
+            # Bar Chart for Diagnostics
+            charts.plotly_chart(fig_key, 'diagnostics', diagnostics_figure, use_container_width=True)
 
     with tab2:
         st.subheader("Flagged Sentences")
-        if data.get('top_flagged_sentences'):
-            for i, s in enumerate(data['top_flagged_sentences']):
-                # Handle if s is just a string
-                if isinstance(s, str):
-                    with st.expander(f"Flagged Sentence #{i+1}", expanded=True):
-                        st.write(f"**Sentence:** {s}")
-                        st.warning("This sentence was flagged for potential improvement.")
-                else:
-                    # Fallback if it is a dict
-                    with st.expander(f"Flagged: \"{s.get('sentence', '')[:50]}...\"", expanded=True):
-                        st.write(f"**Full Sentence:** {s.get('sentence', '')}")
-                        st.write(f"**Issue:** {s.get('reason', 'N/A')}")
-                        st.info(f"**Suggestion:** {s.get('suggestion', 'N/A')}")
-        else:
-            st.success("No critical issues found!")
+        # One page at a time, so long documents do not render every flagged sentence.
+        render_flagged_sentences(data, analysis_id, API_URL, key='results_flagged')
 
     with tab3:
         st.subheader("General Improvements")
@@ -1318,6 +1352,11 @@ def show_results_page():
         **Subjectivity**: 0 (Objective) to 1 (Subjective)
         """)
 
+        st.markdown("#### Sentence by Sentence")
+        import charts  # imported with plotly, on first use
+        charts.sentence_sentiment_chart(data, charts.figure_key(data, analysis_id))
+        render_sentence_sentiment(data, analysis_id, API_URL, key='results_sentiment')
+
 
 # --- Main Execution Flow ---
 
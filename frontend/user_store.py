@@ -0,0 +1,153 @@
+"""
+User account storage for PaperIQ.
+
+Accounts live in a sqlite database in WAL mode with a primary key on
+username and a unique index on email, so a sign-up inserts one row
+instead of rewriting a file holding every account, and concurrent
+sign-ups from threads or app processes are serialized by sqlite.
+
+Migrate an existing users.json with:
+
+    python frontend/user_store.py migrate [users.json] [users.db]
+"""
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    email TEXT UNIQUE,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    applied TEXT NOT NULL
+);
+'''
+# Marker row recording that a legacy users.json has been imported
+JSON_IMPORT = 'users.json'
+
+
+class UserStore:
+    """Accounts in sqlite, indexed by username and email; records are dicts."""
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def _insert(self, users: dict):
+        self._db.executemany(
+            'INSERT INTO users (username, email, record) VALUES (?, ?, ?)',
+            [(name, data.get('email'), json.dumps(data)) for name, data in users.items()]
+        )
+
+    def get(self, username: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute('SELECT record FROM users WHERE username = ?', (username,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def all(self) -> dict:
+        """Every account, keyed by username."""
+        with self._lock:
+            rows = self._db.execute('SELECT username, record FROM users ORDER BY rowid').fetchall()
+        return {name: json.loads(record) for name, record in rows}
+
+    def add(self, username: str, record: dict) -> Optional[str]:
+        """
+        Insert a new account.
+        Returns: None on success, or 'username' / 'email' naming the taken field
+        """
+        with self._lock:
+            # IMMEDIATE takes the write lock first, so the checks and the
+            # insert see the same accounts as every other process.
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                if self._db.execute('SELECT 1 FROM users WHERE username = ?', (username,)).fetchone():
+                    taken = 'username'
+                elif self._db.execute('SELECT 1 FROM users WHERE email = ?', (record.get('email'),)).fetchone():
+                    taken = 'email'
+                else:
+                    self._insert({username: record})
+                    taken = None
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return taken
+
+    def replace_all(self, users: dict):
+        """Overwrite every account."""
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._db.execute('DELETE FROM users')
+                self._insert(users)
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+
+    def import_json(self, json_path) -> Optional[int]:
+        """
+        Import a legacy users.json ({username: record}). Returns the number
+        of accounts imported, or None if it was imported before. As with
+        HistoryStore.import_json, the rows and the marker share one
+        transaction, so the file is imported exactly once.
+        """
+        with open(json_path, 'r') as f:
+            users = json.load(f)
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                done = self._db.execute('SELECT 1 FROM migrations WHERE name = ?', (JSON_IMPORT,)).fetchone()
+                if not done and self._db.execute('SELECT 1 FROM users LIMIT 1').fetchone() is None:
+                    self._insert(users)
+                    imported = len(users)
+                else:
+                    imported = None
+                if not done:
+                    self._db.execute(
+                        "INSERT INTO migrations (name, applied) VALUES (?, datetime('now'))", (JSON_IMPORT,)
+                    )
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def main(argv):
+    if not argv or argv[0] != 'migrate':
+        print(__doc__.strip())
+        return 1
+    data_dir = Path(__file__).parent / "data"
+    json_path = Path(argv[1]) if len(argv) > 1 else data_dir / "users.json"
+    db_path = Path(argv[2]) if len(argv) > 2 else data_dir / "users.db"
+    if not json_path.exists():
+        print(f"{json_path} not found")
+        return 1
+    store = UserStore(db_path)
+    count = store.import_json(json_path)
+    store.close()
+    if count is None:
+        print(f"{db_path} already holds imported accounts; not importing twice")
+        return 1
+    print(f"Imported {count} accounts from {json_path} into {db_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
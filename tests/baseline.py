@@ -0,0 +1,147 @@
+"""
+The original heuristics from backend/main.py, before the single-pass
+document model: one TextBlob per sentence and one for the whole text.
+The optimized paths are checked against these.
+"""
+import re
+
+from textblob import TextBlob
+
+
+def sentence_split(text):
+    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    sentences = [s.replace('\n', ' ').strip() for s in sentences if len(s.strip())>0]
+    return sentences
+
+def tokenize_words(text):
+    words = re.findall(r'\b[\w\']+\b', text.lower())
+    return words
+
+def type_token_ratio(words):
+    if not words:
+        return 0.0
+    return len(set(words)) / len(words)
+
+def avg_word_length(words):
+    if not words:
+        return 0.0
+    return sum(len(w) for w in words) / len(words)
+
+def avg_sentence_length(sentences):
+    if not sentences:
+        return 0.0
+    lengths = [len(tokenize_words(s)) for s in sentences]
+    return sum(lengths) / len(lengths)
+
+def lexical_sophistication(words):
+    if not words:
+        return 0.0
+    long_words = sum(1 for w in words if len(w) > 6)
+    return long_words / len(words)
+
+def coherence_score(sentences):
+    if not sentences:
+        return 0.0
+    lens = [len(tokenize_words(s)) for s in sentences]
+    mean = sum(lens)/len(lens)
+    var = sum((l-mean)**2 for l in lens)/len(lens)
+    score = max(0.0, 1.0 - (var / (mean+1)**2))
+    return score
+
+def reasoning_proxy(sentences, words):
+    causal = sum(1 for s in sentences if re.search(r'\b(because|therefore|thus|hence|consequently|so)\b', s.lower()))
+    modal = sum(1 for w in words if w in {"may","might","could","should","would"})
+    score = (causal / (len(sentences)+1)) - (modal / (len(words)+1))
+    return max(0.0, min(1.0, 0.5 + score))
+
+def compute_features(text):
+    sentences = sentence_split(text)
+    words = tokenize_words(text)
+    features = {}
+    features['word_count'] = len(words)
+    features['sentence_count'] = len(sentences)
+    features['avg_sentence_len'] = avg_sentence_length(sentences)
+    features['avg_word_len'] = avg_word_length(words)
+    features['ttr'] = type_token_ratio(words)
+    features['lex_soph'] = lexical_sophistication(words)
+    features['coherence'] = coherence_score(sentences)
+    features['reasoning_proxy'] = reasoning_proxy(sentences, words)
+
+    blob = TextBlob(text)
+    features['sentiment_polarity'] = blob.sentiment.polarity
+    features['sentiment_subjectivity'] = blob.sentiment.subjectivity
+
+    sentence_sentiments = []
+    for sentence in sentences:
+        sent_blob = TextBlob(sentence)
+        sentence_sentiments.append({
+            'text': sentence,
+            'polarity': sent_blob.sentiment.polarity,
+            'subjectivity': sent_blob.sentiment.subjectivity
+        })
+
+    return features, sentences, words, sentence_sentiments
+
+def score_paper(features):
+    lang = 100 * (0.2*min(1.0, features['ttr']*1.5) + 0.3*min(1.0, features['lex_soph']*3) + 0.5*min(1.0, features['avg_word_len']/5))
+    coh = 100 * features['coherence']
+    reason = 100 * features['reasoning_proxy']
+    composite = round((0.4*lang + 0.3*coh + 0.3*reason), 2)
+    return {
+        'language': round(lang,2),
+        'coherence': round(coh,2),
+        'reasoning': round(reason,2),
+        'composite': composite
+    }
+
+def sentence_contributions(sentences, overall_features):
+    contributions = []
+    for s in sentences:
+        words = tokenize_words(s)
+        if not words:
+            continue
+
+        ttr = len(set(words))/len(words)
+        long = 1.0 if len(words) > max(40, overall_features['avg_sentence_len']*2) else 0.0
+        causal = 1.0 if re.search(r'\b(because|therefore|thus|hence|consequently|so)\b', s.lower()) else 0.0
+
+        neg = 0.0
+        reasons = []
+        suggestions = []
+
+        if long > 0:
+            neg += 1.2
+            reasons.append("Sentence is too long and complex")
+            suggestions.append("Split into multiple shorter sentences to improve readability.")
+
+        if ttr < 0.5 and len(words) > 10:
+            neg += 1.0
+            reasons.append("Repetitive vocabulary")
+            suggestions.append("Use synonyms to improve lexical diversity.")
+
+        if causal == 0 and len(words) > 30:
+            neg += 0.5
+            reasons.append("Lack of transition words")
+            suggestions.append("Use transition words (e.g., 'because', 'therefore') to improve flow.")
+
+        if neg > 0:
+            contributions.append({
+                "sentence": s,
+                "score": neg,
+                "reason": "; ".join(reasons),
+                "suggestion": " ".join(suggestions)
+            })
+
+    contributions.sort(key=lambda x: x['score'], reverse=True)
+    return contributions
+
+def analyze(text):
+    """The /analyze response body as a dict."""
+    features, sentences, _words, sentence_sentiments = compute_features(text)
+    scores = score_paper(features)
+    return {
+        **scores,
+        'diagnostics': features,
+        'top_flagged_sentences': sentence_contributions(sentences, features)[:5],
+        'sentiment_analysis': sentence_sentiments,
+    }
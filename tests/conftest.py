@@ -0,0 +1,39 @@
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The backend is imported as a package from the repository root; the
+# Streamlit modules import each other by name from frontend/.
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'frontend'))
+
+VOCAB = (
+    "the study shows that results may indicate significant improvement because data therefore "
+    "suggests hence thus consequently so analysis model could should would might novel approach "
+    "framework evaluation robust excellent poor terrible good great bad interesting unclear "
+    "experimental methodology we it's don't not very"
+).split()
+
+
+@pytest.fixture(scope='session')
+def texts():
+    """Hand-written edge cases plus seeded random documents of 1-60 sentences."""
+    rng = random.Random(3)
+    docs = [
+        "This is a short sentence. Another one here!  And a question? Yes.",
+        "Wow this is great!!! Really, really good. But the experiment was terrible... "
+        "I can't believe it's so bad.\n\nNew para: happy results?",
+        "  The  word-based model (see Fig. 1) works. It is not very good. Very very nice indeed.  ",
+    ]
+    for _ in range(30):
+        sentences = [
+            " ".join(rng.choice(VOCAB) for _ in range(rng.randint(1, 60))).capitalize()
+            + rng.choice(['.', '!', '?', '...'])
+            for _ in range(rng.randint(1, 60))
+        ]
+        docs.append(rng.choice([' ', '\n', '  ']).join(sentences))
+    return docs
@@ -0,0 +1,101 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import urllib3.util.retry
+
+import api_client
+
+
+class Script(BaseHTTPRequestHandler):
+    """Answers each request with the next (status, headers) of server.script; the last one repeats."""
+
+    def respond(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.server.requests.append((self.command, dict(self.headers), body))
+        status, headers = self.server.script[min(len(self.server.requests), len(self.server.script)) - 1]
+        payload = json.dumps({'status': status}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(api_client, '_session', None)
+    monkeypatch.setattr(api_client, 'RETRIES', 2)
+    monkeypatch.setattr(api_client, 'BACKOFF', 0)
+    sleeps = []
+    monkeypatch.setattr(urllib3.util.retry.time, 'sleep', sleeps.append)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Script)
+    httpd.requests = []
+    httpd.sleeps = sleeps
+    httpd.url = f'http://127.0.0.1:{httpd.server_address[1]}'
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    if api_client._session is not None:
+        api_client._session.close()
+
+
+QUEUE_FULL = (503, {'Retry-After': '1'})
+
+
+def test_a_post_is_retried_when_the_queue_was_full(server):
+    server.script = [QUEUE_FULL, (200, {})]
+    response = api_client.post_json(server.url + '/analyze', {'text': 'x'})
+    assert response.status_code == 200
+    assert len(server.requests) == 2
+    # Retry-After is honoured instead of the (zero) backoff.
+    assert server.sleeps == [1]
+
+
+@pytest.mark.parametrize('status, headers', [(503, {}), (504, {}), (502, {})])
+def test_a_post_that_may_have_started_is_not_retried(server, status, headers):
+    server.script = [(status, headers), (200, {})]
+    assert api_client.post_json(server.url + '/analyze', {'text': 'x'}).status_code == status
+    assert len(server.requests) == 1
+
+
+def test_a_get_is_retried_on_502_and_503(server):
+    server.script = [(502, {}), (503, {}), (200, {})]
+    assert api_client.get(server.url + '/health').status_code == 200
+    assert len(server.requests) == 3
+
+
+def test_retries_are_exhausted(server):
+    server.script = [QUEUE_FULL]
+    response = api_client.post_json(server.url + '/analyze', {'text': 'x'})
+    # The last answer is returned rather than raised; the caller sees the 503.
+    assert response.status_code == 503
+    assert len(server.requests) == api_client.RETRIES + 1
+    assert server.sleeps == [1] * api_client.RETRIES
+
+
+def test_large_bodies_are_gzipped(server, monkeypatch):
+    monkeypatch.setattr(api_client, 'GZIP_MIN_BYTES', 100)
+    server.script = [(200, {})]
+    api_client.post_json(server.url + '/analyze', {'text': 'short'})
+    api_client.post_json(server.url + '/analyze', {'text': 'long ' * 100})
+    (_, small_headers, small), (_, large_headers, large) = server.requests
+    assert 'Content-Encoding' not in small_headers and json.loads(small) == {'text': 'short'}
+    assert large_headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(large)) == {'text': 'long ' * 100}
+
+
+def test_base_url():
+    assert api_client.base_url('http://host:8000/analyze/') == 'http://host:8000'
+    assert api_client.base_url('http://host:8000') == 'http://host:8000'
@@ -0,0 +1,119 @@
+import json
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from fastapi.testclient import TestClient
+
+import baseline
+from backend import main
+from backend.cache import ResultCache
+from backend.executor import AnalysisExecutor
+
+SHORT = "Too short."
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'result_cache', ResultCache(max_entries=64))
+    monkeypatch.setattr(main, 'analysis_executor', AnalysisExecutor(mode='thread', max_pending=4))
+    return TestClient(main.app)
+
+
+def batch(client, items):
+    response = client.post('/analyze/batch', json={'items': items})
+    assert response.status_code == 200
+    return response.json()['results']
+
+
+def check(results, texts):
+    """Each result is in input order and matches the baseline, or is an error for a short text."""
+    assert [r['index'] for r in results] == list(range(len(texts)))
+    for result, text in zip(results, texts):
+        if len(text.strip()) < 20:
+            assert result['result'] is None and result['error'].startswith('Text too short')
+        else:
+            assert result['error'] is None
+            assert result['result'] == baseline.analyze(text)
+            assert result['analysis_id'] == main.cache_key(text, main.SCORING_VERSION)
+
+
+def test_results_keep_input_order_with_per_item_errors(client, monkeypatch, texts):
+    monkeypatch.setattr(main, 'BATCH_WORKERS', 1)
+    items = texts[:6] + [SHORT] + texts[6:9]
+    check(batch(client, items), items)
+
+
+def test_ids_and_cached_items(client, monkeypatch, texts):
+    monkeypatch.setattr(main, 'BATCH_WORKERS', 1)
+    client.post('/analyze', json={'text': texts[2]})
+    results = batch(client, [{'id': 'a', 'text': texts[1]}, texts[2], {'id': 'c', 'text': SHORT}])
+    assert [r['id'] for r in results] == ['a', None, 'c']
+    check(results, [texts[1], texts[2], SHORT])
+
+
+def test_the_process_pool_gives_the_same_results(client, monkeypatch, texts):
+    monkeypatch.setattr(main, 'BATCH_WORKERS', 2)
+    monkeypatch.setattr(main, '_batch_pool', None)
+    items = texts[:12] + [SHORT]
+    try:
+        check(batch(client, items), items)
+        assert main._batch_pool is not None
+        assert main.get_batch_pool() is main._batch_pool
+    finally:
+        main._batch_pool.shutdown()
+
+
+class BrokenPool:
+    """Returns the first outcomes, then fails as if a worker had been killed."""
+
+    def __init__(self, good):
+        self.good = good
+        self.shut_down = False
+
+    def map(self, fn, texts, chunksize=1):
+        for text in texts[:self.good]:
+            yield fn(text)
+        raise BrokenProcessPool("A process in the process pool was terminated abruptly")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def test_a_broken_pool_fails_only_the_unfinished_items(client, monkeypatch, texts):
+    monkeypatch.setattr(main, 'BATCH_WORKERS', 2)
+    pool = BrokenPool(good=2)
+    monkeypatch.setattr(main, '_batch_pool', pool)
+    items = [SHORT] + texts[:4]
+
+    results = batch(client, items)
+    check(results[:3], items[:3])
+    assert all(r['result'] is None and 'worker process' in r['error'] for r in results[3:])
+    # The broken pool is replaced on the next request, and the failed items were not cached.
+    assert pool.shut_down and main._batch_pool is None
+    assert main.result_cache.get(main.cache_key(texts[3], main.SCORING_VERSION))[0] is None
+    assert main.analysis_executor.pending == 0
+
+
+def test_batch_answers_503_when_the_queue_is_full(client, monkeypatch, texts):
+    monkeypatch.setattr(main, 'BATCH_WORKERS', 1)
+    executor = main.analysis_executor
+    for _ in range(executor.max_pending):
+        executor.acquire()
+    response = client.post('/analyze/batch', json={'items': texts[:2]})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == main.RETRY_AFTER
+
+    # Fully cached batches need no slot.
+    for _ in range(executor.max_pending):
+        executor.release()
+    batch(client, texts[:2])
+    for _ in range(executor.max_pending):
+        executor.acquire()
+    check(batch(client, texts[:2]), texts[:2])
+
+
+def test_too_many_items(client, monkeypatch):
+    monkeypatch.setattr(main, 'BATCH_MAX_ITEMS', 2)
+    response = client.post('/analyze/batch', json={'items': ['a', 'b', 'c']})
+    assert response.status_code == 400
+    assert json.loads(response.content)['detail'].startswith('Too many items')
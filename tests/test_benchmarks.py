@@ -0,0 +1,55 @@
+import pytest
+
+import baseline
+from backend.analysis import compute_features
+from benchmarks import run_benchmarks
+from benchmarks.corpus import SIZES, make_corpus, make_document
+
+
+def test_corpus_is_deterministic():
+    assert make_document('paper', seed=1) == make_document('paper', seed=1)
+    assert make_document('paper', seed=1) != make_document('paper', seed=2)
+    assert make_corpus(('abstract',)) == {'abstract': make_document('abstract')}
+
+
+@pytest.mark.parametrize('kind', ['abstract', 'paper'])
+def test_documents_reach_their_target_size(kind):
+    words = len(make_document(kind).split())
+    # Paragraphs are added whole, so the last one can overshoot a little.
+    assert SIZES[kind] <= words < SIZES[kind] + 500
+
+
+def test_corpus_analysis_matches_the_baseline():
+    for kind in ('abstract', 'paper'):
+        text = make_document(kind)
+        features, doc, sentence_sentiments = compute_features(text)
+        expected, sentences, _words, expected_sentiments = baseline.compute_features(text)
+        assert features == expected
+        assert doc.sentences == sentences
+        assert sentence_sentiments == expected_sentiments
+
+
+def test_every_micro_case_runs():
+    names = []
+    for name, fn, args in run_benchmarks.micro_cases(make_document('abstract')):
+        fn(*args)
+        names.append(name)
+    assert 'compute_features' in names and 'analyze_to_json' in names
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert run_benchmarks.percentile(values, 0.5) == 2.5
+    assert run_benchmarks.percentile(values, 1.0) == 4.0
+    assert run_benchmarks.percentile([], 0.5) == 0.0
+
+
+def test_compare_flags_regressions_beyond_the_tolerance(capsys):
+    baseline_results = {'results': {
+        'slow': {'p50_ms': 10.0},
+        'fine': {'p50_ms': 10.0},
+        'tiny': {'p50_ms': 0.001},
+    }}
+    results = {'slow': {'p50_ms': 13.0}, 'fine': {'p50_ms': 10.5}, 'tiny': {'p50_ms': 0.01}, 'new': {'p50_ms': 1.0}}
+    assert run_benchmarks.compare(results, baseline_results, tolerance=0.2) == ['slow']
+    assert 'REGRESSION' in capsys.readouterr().out
@@ -0,0 +1,118 @@
+import sqlite3
+import time
+
+from fastapi.testclient import TestClient
+
+from backend import cache as cache_module
+from backend import main
+from backend.cache import ResultCache, cache_key
+
+
+def disk_keys(path):
+    db = sqlite3.connect(path)
+    try:
+        return {row[0] for row in db.execute('SELECT key FROM results')}
+    finally:
+        db.close()
+
+
+def test_cache_key_ignores_surrounding_whitespace():
+    assert cache_key("  A text.\nMore.  \n", 'v1') == cache_key("A text.\nMore.", 'v1')
+    assert cache_key("A text.\nMore.", 'v1') != cache_key("A text. More.", 'v1')
+    assert cache_key("A text.", 'v1') != cache_key("A text.", 'v2')
+    assert cache_key("A text.", 'v1') != cache_key("A Text.", 'v1')
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', b'1')
+    cache.put('b', b'2')
+    assert cache.get('a') == (b'1', 'memory')  # 'b' is now the oldest
+    cache.put('c', b'3')
+    assert cache.get('b') == (None, None)
+    assert cache.get('a') == (b'1', 'memory')
+    assert cache.get('c') == (b'3', 'memory')
+
+
+def test_stats_count_hits_and_misses():
+    cache = ResultCache(max_entries=4)
+    cache.put('a', b'1')
+    cache.get('a')
+    cache.get('missing')
+    stats = cache.stats()
+    assert (stats['memory_hits'], stats['disk_hits'], stats['misses']) == (1, 0, 1)
+    assert stats['hit_ratio'] == 0.5
+
+
+def test_peek_is_not_counted():
+    cache = ResultCache(max_entries=4)
+    cache.put('a', b'1')
+    assert cache.peek('a') == (b'1', 'memory')
+    assert cache.peek('missing') == (None, None)
+    stats = cache.stats()
+    assert (stats['memory_hits'], stats['misses']) == (0, 0)
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResultCache(max_entries=1, db_path=path)
+    cache.put('a', b'1')
+    cache.put('b', b'2')
+    # 'a' left memory but is still on disk, and is promoted back on a hit.
+    assert cache.get('a') == (b'1', 'disk')
+    assert cache.get('a') == (b'1', 'memory')
+
+    reopened = ResultCache(max_entries=1, db_path=path)
+    assert reopened.get('b') == (b'2', 'disk')
+    assert reopened.stats()['disk_hits'] == 1
+
+
+def test_disk_tier_keeps_the_newest_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, 'SWEEP_EVERY', 4)
+    path = str(tmp_path / 'cache.db')
+    cache = ResultCache(max_entries=0, db_path=path, max_disk_entries=3)
+    for i in range(8):
+        cache.put(f'k{i}', b'x')
+    # Swept after the 4th and 8th writes.
+    assert disk_keys(path) == {'k5', 'k6', 'k7'}
+
+    cache.put('k8', b'x')
+    assert len(disk_keys(path)) == 4  # over the limit until the next sweep
+    ResultCache(max_entries=0, db_path=path, max_disk_entries=2)  # opening sweeps too
+    assert disk_keys(path) == {'k7', 'k8'}
+
+
+def test_disk_tier_drops_rows_older_than_max_age(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResultCache(max_entries=0, db_path=path)
+    cache.put('old', b'x')
+    cache.put('new', b'x')
+    db = sqlite3.connect(path)
+    db.execute('UPDATE results SET created = ? WHERE key = ?', (time.time() - 3600, 'old'))
+    db.commit()
+    db.close()
+
+    cache = ResultCache(max_entries=0, db_path=path, max_age=60)
+    assert cache.get('old') == (None, None)
+    assert cache.get('new') == (b'x', 'disk')
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResultCache(max_entries=4, db_path=path)
+    cache.put('a', b'1')
+    cache.clear()
+    assert cache.get('a') == (None, None)
+    assert disk_keys(path) == set()
+
+
+def test_analyze_serves_repeat_submissions_from_the_cache(monkeypatch):
+    monkeypatch.setattr(main, 'result_cache', ResultCache(max_entries=8))
+    client = TestClient(main.app)
+    text = "The model improves accuracy. Therefore the results hold across every benchmark."
+    first = client.post('/analyze', json={'text': text})
+    second = client.post('/analyze', json={'text': "\n  " + text + "  "})
+    assert (first.status_code, second.status_code) == (200, 200)
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+    assert first.headers['X-Analysis-Id'] == second.headers['X-Analysis-Id']
+    assert first.content == second.content
@@ -0,0 +1,100 @@
+import math
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import baseline
+from conftest import ROOT
+from backend import main
+from backend.columnar import (FEATURE_DTYPE, SCORE_DTYPE, _sequential_sums, feature_table, score_table,
+                              to_arrow, to_columns, to_dataframe)
+
+EDGE_CASES = ["", "   ", "!!! ???", "One.", "no punctuation at all", "Ends here.\n\n\nAnd again ... ok"]
+
+
+def rows(table):
+    return [dict(zip(table.dtype.names, row.tolist())) for row in table]
+
+
+@pytest.fixture(scope='module')
+def corpus(texts):
+    return EDGE_CASES + texts
+
+
+def test_feature_table_matches_baseline_compute_features(corpus):
+    table = feature_table(corpus)
+    assert table.dtype == FEATURE_DTYPE
+    for row, text in zip(rows(table), corpus):
+        assert row == baseline.compute_features(text)[0]
+
+
+def test_score_table_matches_baseline_score_paper(corpus):
+    scores = score_table(feature_table(corpus))
+    assert scores.dtype == SCORE_DTYPE
+    for row, text in zip(rows(scores), corpus):
+        assert row == baseline.score_paper(baseline.compute_features(text)[0])
+
+
+def test_pool_gives_the_same_table(corpus):
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        pooled = feature_table(corpus, pool=pool, chunksize=4)
+    assert rows(pooled) == rows(feature_table(corpus))
+
+
+def test_without_sentiment_the_sentiment_columns_are_nan(corpus):
+    table = feature_table(corpus[:5], sentiment=False)
+    assert np.isnan(table['sentiment_polarity']).all()
+    assert np.isnan(table['sentiment_subjectivity']).all()
+    assert rows(table[['ttr', 'coherence']]) == rows(feature_table(corpus[:5])[['ttr', 'coherence']])
+    assert to_columns(table)['sentiment_polarity'] == [None] * 5
+
+
+def test_sequential_sums_add_left_to_right_like_sum():
+    rng = np.random.default_rng(0)
+    counts = rng.integers(1, 40, size=200)
+    values = rng.random(int(counts.sum())) * 10.0 ** rng.integers(-8, 8, size=int(counts.sum()))
+    starts = np.cumsum(counts) - counts
+    sums = _sequential_sums(values, starts, counts)
+    expected = [sum(values[s:s + c].tolist()) for s, c in zip(starts, counts)]
+    # Exactly equal, not just close: pairwise summation would differ in the last bit.
+    assert sums.tolist() == expected
+
+
+def test_sequential_sums_keep_the_input_order():
+    values = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+    starts = np.array([0, 1, 4])
+    counts = np.array([1, 3, 2])
+    assert _sequential_sums(values, starts, counts).tolist() == [1.0, 9.0, 11.0]
+
+
+def test_features_endpoint_returns_columns(texts):
+    client = TestClient(main.app)
+    response = client.post('/analyze/features', json={'items': texts[:4]})
+    assert response.status_code == 200
+    body = response.json()
+    for i, text in enumerate(texts[:4]):
+        expected = baseline.compute_features(text)[0]
+        assert {name: column[i] for name, column in body['features'].items()} == expected
+        assert {name: column[i] for name, column in body['scores'].items()} == baseline.score_paper(expected)
+
+    without = client.post('/analyze/features?sentiment=false', json={'items': texts[:2]}).json()
+    assert without['features']['sentiment_polarity'] == [None, None]
+    assert not any(math.isnan(v) for v in without['features']['ttr'])
+
+
+def test_dataframe_and_arrow_views(corpus):
+    table = feature_table(corpus[:3])
+    pytest.importorskip('pandas')
+    assert list(to_dataframe(table).columns) == list(FEATURE_DTYPE.names)
+    pytest.importorskip('pyarrow')
+    assert to_arrow(table).num_rows == 3
+
+
+def test_the_api_imports_columnar_on_first_use():
+    code = "import sys, backend.main; print('backend.columnar' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == 'False'
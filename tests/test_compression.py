@@ -0,0 +1,120 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import baseline
+from backend import compression, main
+from backend.cache import ResultCache
+from backend.compression import GzipRequestMiddleware
+
+MAX_SIZE = 1000
+
+
+@pytest.fixture
+def echo():
+    app = FastAPI()
+    app.add_middleware(GzipRequestMiddleware, max_size=MAX_SIZE)
+
+    @app.post('/echo')
+    async def echo_body(request: Request):
+        body = await request.body()
+        return {'body': body.decode(), 'length': request.headers['content-length'],
+                'encoding': request.headers.get('content-encoding')}
+
+    return TestClient(app)
+
+
+def post(client, body, encoding='gzip'):
+    return client.post('/echo', content=body, headers={'Content-Encoding': encoding} if encoding else {})
+
+
+def test_gzip_bodies_are_inflated(echo):
+    response = post(echo, gzip.compress(b'x' * MAX_SIZE))
+    assert response.json() == {'body': 'x' * MAX_SIZE, 'length': str(MAX_SIZE), 'encoding': None}
+
+
+def test_other_bodies_pass_through(echo):
+    assert post(echo, b'plain', encoding=None).json()['body'] == 'plain'
+    assert post(echo, b'plain', encoding='identity').json()['encoding'] == 'identity'
+
+
+def test_oversized_bodies_are_rejected(echo):
+    # Highly compressible, so the compressed body itself is tiny.
+    response = post(echo, gzip.compress(b'x' * (MAX_SIZE + 1)))
+    assert response.status_code == 413
+    assert response.json() == {'detail': 'Decompressed request body is too large.'}
+    assert post(echo, gzip.compress(b'x' * 10 * 1024 * 1024)).status_code == 413
+
+
+def test_truncated_bodies_are_rejected(echo):
+    body = gzip.compress(json.dumps({'text': 'a' * 500}).encode())
+    response = post(echo, body[:len(body) // 2])
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'Truncated gzip request body.'}
+
+
+def test_invalid_gzip_is_rejected(echo):
+    response = post(echo, b'not gzip at all')
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'Invalid gzip request body.'}
+
+
+def test_analyze_accepts_a_gzipped_request(monkeypatch, texts):
+    monkeypatch.setattr(main, 'result_cache', ResultCache(max_entries=8))
+    body = gzip.compress(json.dumps({'text': texts[7]}).encode())
+    response = TestClient(main.app).post('/analyze', content=body, headers={
+        'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.json() == baseline.analyze(texts[7])
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('', None),
+    ('gzip', 'gzip'),
+    ('GZIP, deflate', 'gzip'),
+    ('gzip;q=0', None),
+    ('gzip; q=0.0, deflate', None),
+    ('gzip;q=bad', None),
+    ('*', 'gzip'),
+    ('*;q=0', None),
+    ('identity, *;q=0', None),
+    ('gzip;q=0, *', None),
+    ('deflate, gzip;q=0.1', 'gzip'),
+])
+def test_negotiate_encoding_without_brotli(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, 'brotli', None)
+    assert compression.negotiate_encoding(header) == expected
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, br', 'br'),
+    ('br;q=0.5, gzip', 'gzip'),
+    ('br;q=0, gzip', 'gzip'),
+    ('*', 'br'),
+    ('br;q=0, gzip;q=0', None),
+])
+def test_negotiate_encoding_with_brotli(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, 'brotli', object())
+    assert compression.negotiate_encoding(header) == expected
+
+
+@pytest.fixture
+def large_app():
+    app = FastAPI()
+    app.add_middleware(compression.NegotiatedGZipMiddleware, minimum_size=10)
+
+    @app.get('/large')
+    def large():
+        return {'data': 'x' * 1000}
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize('header, encoded', [('gzip', True), ('gzip;q=0', False), ('br;q=1, gzip;q=0', False), ('', False)])
+def test_other_endpoints_are_gzipped_only_when_accepted(large_app, header, encoded):
+    response = large_app.get('/large', headers={'Accept-Encoding': header})
+    assert response.json() == {'data': 'x' * 1000}
+    assert (response.headers.get('content-encoding') == 'gzip') == encoded
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from downsample import lttb, rolling_mean
+
+
+def reference_lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets written out point by point, as in the original description."""
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    chosen = [0]
+    a = 0
+    for i in range(n_out - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        next_x = sum(x[end:next_end]) / (next_end - end)
+        next_y = sum(y[end:next_end]) / (next_end - end)
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[a] - next_x) * (y[j] - y[a]) - (x[a] - x[j]) * (next_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        chosen.append(best)
+        a = best
+    return chosen + [n - 1]
+
+
+@pytest.mark.parametrize('n, n_out', [(10, 3), (10, 9), (101, 7), (1000, 100), (5003, 1000)])
+def test_lttb_keeps_the_ends_and_returns_n_out_points(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.arange(1, n + 1, dtype=np.float64)
+    y = rng.integers(-100, 100, size=n).astype(np.float64)
+    keep = lttb(x, y, n_out)
+    assert len(keep) == n_out
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert (np.diff(keep) > 0).all()
+    assert keep.tolist() == reference_lttb(x.tolist(), y.tolist(), n_out)
+
+
+def test_lttb_keeps_spikes():
+    y = np.zeros(10_000)
+    y[1234] = 1.0
+    y[7777] = -1.0
+    keep = lttb(np.arange(10_000, dtype=np.float64), y, 50)
+    assert 1234 in keep and 7777 in keep
+
+
+@pytest.mark.parametrize('n_out', [10, 11, 500, 2])
+def test_short_series_are_returned_unchanged(n_out):
+    x = np.arange(10, dtype=np.float64)
+    y = np.sin(x)
+    keep = lttb(x, y, n_out)
+    assert keep.tolist() == list(range(10))
+    assert (y[keep] == y).all()
+
+
+def test_empty_series():
+    assert lttb(np.array([]), np.array([]), 100).tolist() == []
+    assert rolling_mean(np.array([]), 5).tolist() == []
+
+
+@pytest.mark.parametrize('window', [1, 3, 7, 50])
+def test_rolling_mean_is_a_trailing_mean_shorter_at_the_start(window):
+    y = np.random.default_rng(window).random(40)
+    expected = [y[max(0, i - window + 1):i + 1].mean() for i in range(len(y))]
+    assert rolling_mean(y, window) == pytest.approx(expected, rel=1e-12, abs=1e-12)
+
+
+def test_rolling_mean_window_edges():
+    y = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    assert rolling_mean(y, 2).tolist() == [1.0, 1.5, 2.5, 3.5, 4.5]
+    assert rolling_mean(y, 1).tolist() == y.tolist()
+    assert rolling_mean(y, 5).tolist() == [1.0, 1.5, 2.0, 2.5, 3.0]
+    assert rolling_mean(y, 100).tolist() == rolling_mean(y, 5).tolist()
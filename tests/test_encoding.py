@@ -0,0 +1,110 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import baseline
+from backend import encoding, main
+from backend.cache import ResultCache
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'result_cache', ResultCache(max_entries=16))
+    monkeypatch.setattr(main, 'variant_cache', ResultCache(max_entries=16))
+    return TestClient(main.app)
+
+
+def check_offsets(data, submitted, expected):
+    """A compact result refers to the same sentences, by offsets into the submitted text."""
+    spans = data['sentences']['spans']
+    assert [submitted[start:end] for start, end in spans] == [s['text'] for s in expected['sentiment_analysis']]
+    assert data['sentences']['polarity'] == [s['polarity'] for s in expected['sentiment_analysis']]
+    assert data['sentences']['subjectivity'] == [s['subjectivity'] for s in expected['sentiment_analysis']]
+    flagged = []
+    for item in data['top_flagged_sentences']:
+        item = dict(item)
+        start, end = spans[item.pop('index')]
+        flagged.append({'sentence': submitted[start:end], **item})
+    assert flagged == expected['top_flagged_sentences']
+    assert {k: data[k] for k in ('composite', 'diagnostics')} == {k: expected[k] for k in ('composite', 'diagnostics')}
+
+
+def test_offsets_match_the_baseline_sentences(client, texts):
+    for text in texts[:12]:
+        if len(text.strip()) < 20:
+            continue
+        response = client.post('/analyze?sentences=offsets', json={'text': text})
+        check_offsets(response.json(), text, baseline.analyze(text))
+
+
+def test_offsets_follow_leading_whitespace_of_a_cached_text(client, texts):
+    text = texts[4].strip()
+    padded = "\n\n   " + text
+    first = client.post('/analyze?sentences=offsets', json={'text': text})
+    second = client.post('/analyze?sentences=offsets', json={'text': padded})
+    # One cached analysis, but offsets into each submitted text.
+    assert first.headers['X-Analysis-Id'] == second.headers['X-Analysis-Id']
+    assert second.headers['X-Cache'] == 'HIT'
+    expected = baseline.analyze(text)
+    check_offsets(first.json(), text, expected)
+    check_offsets(second.json(), padded, expected)
+    assert first.json()['sentences']['spans'] != second.json()['sentences']['spans']
+
+
+def test_encoded_variants_are_cached(client, monkeypatch, texts):
+    calls = []
+    encode_variant = main.encode_variant
+
+    def counting(*args):
+        calls.append(args[2:])
+        return encode_variant(*args)
+
+    monkeypatch.setattr(main, 'encode_variant', counting)
+    text = texts[6]
+    headers = {'Accept-Encoding': 'gzip'}
+    for _ in range(3):
+        response = client.post('/analyze', json={'text': text}, headers=headers)
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.json() == baseline.analyze(text)
+        client.post('/analyze?sentences=offsets', json={'text': text}, headers=headers)
+    assert calls == [('json', False, 'gzip'), ('json', True, 'gzip')]
+
+
+@pytest.mark.parametrize('header, encoded', [('gzip', True), ('gzip;q=0', False), ('identity', False), ('*;q=0.5', True)])
+def test_analyze_compression_follows_accept_encoding(client, texts, header, encoded):
+    response = client.post('/analyze', json={'text': texts[6]}, headers={'Accept-Encoding': header})
+    assert response.json() == baseline.analyze(texts[6])
+    assert (response.headers.get('Content-Encoding') == 'gzip') == encoded
+
+
+@pytest.mark.parametrize('accept, without, with_msgpack', [
+    ('', 'json', 'json'),
+    ('application/json', 'json', 'json'),
+    ('text/html', 'json', 'json'),
+    ('application/msgpack', None, 'msgpack'),
+    ('application/x-msgpack, application/json;q=0.5', 'json', 'msgpack'),
+    ('application/msgpack;q=0.5, application/json', 'json', 'json'),
+    ('application/msgpack;q=0', 'json', 'json'),
+    ('application/msgpack, */*;q=0.1', 'json', 'msgpack'),
+])
+def test_negotiate_format(monkeypatch, accept, without, with_msgpack):
+    monkeypatch.setattr(encoding, 'msgpack', None)
+    assert encoding.negotiate_format(accept) == without
+    monkeypatch.setattr(encoding, 'msgpack', object())
+    assert encoding.negotiate_format(accept) == with_msgpack
+
+
+def test_msgpack_only_clients_get_406_without_msgpack(client, monkeypatch, texts):
+    monkeypatch.setattr(encoding, 'msgpack', None)
+    response = client.post('/analyze', json={'text': texts[6]}, headers={'Accept': 'application/msgpack'})
+    assert response.status_code == 406
+    assert main.result_cache.stats()['entries'] == 0  # refused before analyzing
+    response = client.post('/analyze', json={'text': texts[6]},
+                           headers={'Accept': 'application/msgpack, application/json;q=0.5'})
+    assert response.headers['content-type'] == 'application/json'
+
+
+def test_msgpack_round_trip(client, texts):
+    msgpack = pytest.importorskip('msgpack')
+    response = client.post('/analyze', json={'text': texts[6]}, headers={'Accept': 'application/msgpack'})
+    assert response.headers['content-type'] == 'application/msgpack'
+    assert msgpack.unpackb(response.content) == baseline.analyze(texts[6])
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import baseline
+from backend import main
+from backend.cache import ResultCache
+from backend.executor import AnalysisExecutor, Saturated
+
+TEXT = "The proposed model improves accuracy. Therefore it may generalize to new data."
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        AnalysisExecutor(mode='fiber')
+
+
+@pytest.mark.parametrize('mode', ['inline', 'thread'])
+def test_run_returns_the_result_and_frees_the_slot(mode):
+    executor = AnalysisExecutor(mode=mode, workers=2)
+    assert asyncio.run(executor.run(sum, [1, 2, 3])) == 6
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+def test_acquire_raises_saturated_at_the_limit():
+    executor = AnalysisExecutor(mode='thread', max_pending=2)
+    executor.acquire()
+    executor.acquire()
+    with pytest.raises(Saturated):
+        executor.acquire()
+    executor.release()
+    executor.acquire()
+    assert executor.pending == 2
+
+
+def test_a_slot_is_released_once():
+    executor = AnalysisExecutor(mode='thread', max_pending=2)
+    slot = executor.slot()
+    executor.acquire()
+    slot.release()
+    slot.release()
+    assert executor.pending == 1
+
+
+def test_a_started_task_keeps_its_slot_after_a_timeout():
+    executor = AnalysisExecutor(mode='thread', workers=1, max_pending=1, timeout=0.05)
+    release = threading.Event()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(executor.run(release.wait, 5))
+    # The work is still running, so it still counts against the limit.
+    assert executor.pending == 1
+    with pytest.raises(Saturated):
+        asyncio.run(executor.run(sum, [1]))
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while executor.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'result_cache', ResultCache(max_entries=64))
+    return TestClient(main.app)
+
+
+def test_analyze_matches_the_baseline(client, texts):
+    for text in texts:
+        if len(text.strip()) < 20:
+            continue
+        response = client.post('/analyze', json={'text': text})
+        assert response.status_code == 200
+        assert response.json() == baseline.analyze(text)
+
+
+def test_analyze_answers_503_with_retry_after_when_the_queue_is_full(client, monkeypatch):
+    executor = AnalysisExecutor(mode='thread', max_pending=1)
+    monkeypatch.setattr(main, 'analysis_executor', executor)
+    executor.acquire()  # the only slot is taken
+
+    response = client.post('/analyze', json={'text': TEXT})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == main.RETRY_AFTER
+
+    executor.release()
+    assert client.post('/analyze', json={'text': TEXT}).status_code == 200
+    executor.shutdown()
+
+
+def test_analyze_answers_504_when_the_analysis_times_out(client, monkeypatch):
+    executor = AnalysisExecutor(mode='thread', timeout=0.05)
+    monkeypatch.setattr(main, 'analysis_executor', executor)
+    analyze_to_json = main.analyze_to_json
+
+    def slow(text):
+        time.sleep(0.5)
+        return analyze_to_json(text)
+
+    monkeypatch.setattr(main, 'analyze_to_json', slow)
+    response = client.post('/analyze', json={'text': TEXT})
+    assert response.status_code == 504
+    # A timed-out analysis is not cached.
+    assert main.result_cache.stats()['entries'] == 0
+    executor.shutdown()
+
+
+def test_analyze_rejects_short_text(client):
+    response = client.post('/analyze', json={'text': "Too short."})
+    assert response.status_code == 400
+    assert json.loads(response.content)['detail'].startswith('Text too short')
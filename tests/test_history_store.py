@@ -0,0 +1,157 @@
+import json
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import auth
+import history_store
+from history_store import HistoryStore
+
+
+@pytest.fixture
+def legacy_json(tmp_path):
+    path = tmp_path / 'history.json'
+    path.write_text(json.dumps({
+        'alice': [{'timestamp': f'2024-01-0{i + 1}', 'full_text': f'text {i} ' * 30,
+                   'results': {'composite': i}} for i in range(3)],
+        'bob': [{'timestamp': '2024-02-01', 'full_text': 'short', 'text_preview': 'preview', 'results': {}}],
+    }))
+    return path
+
+
+def import_into(db_path, json_path):
+    return HistoryStore(db_path).import_json(json_path)
+
+
+def test_pages_are_newest_first_and_text_is_optional(tmp_path):
+    store = HistoryStore(tmp_path / 'history.db')
+    ids = [store.add('alice', f't{i}', f'text {i}', {'composite': i}) for i in range(5)]
+    store.add('bob', 't', 'other user', {})
+
+    assert store.count('alice') == 5
+    page = store.page('alice', offset=1, limit=2)
+    assert [entry['id'] for entry in page] == [ids[3], ids[2]]
+    assert page[0]['full_text'] == 'text 3' and page[0]['results'] == {'composite': 3}
+    assert 'full_text' not in store.page('alice', limit=1, full=False)[0]
+    assert [e['id'] for e in store.page('alice', newest_first=False)] == ids
+
+
+def test_preview_is_truncated(tmp_path):
+    store = HistoryStore(tmp_path / 'history.db')
+    entry_id = store.add('alice', 't', 'x' * 150, {})
+    assert store.get('alice', entry_id)['text_preview'] == 'x' * history_store.PREVIEW_CHARS + '...'
+
+
+def test_delete_only_touches_the_owners_entries(tmp_path):
+    store = HistoryStore(tmp_path / 'history.db')
+    entry_id = store.add('alice', 't', 'text', {})
+    assert not store.delete('bob', entry_id)
+    assert store.get('alice', entry_id) is not None
+    assert store.delete('alice', entry_id)
+    assert store.get('alice', entry_id) is None
+    assert not store.delete('alice', entry_id)
+
+
+def test_import_keeps_order_and_runs_once(tmp_path, legacy_json):
+    store = HistoryStore(tmp_path / 'history.db')
+    assert store.import_json(legacy_json) == 4
+    assert store.import_json(legacy_json) is None
+    assert store.count('alice') == 3
+    assert [e['timestamp'] for e in store.page('alice', newest_first=False)] == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert store.page('bob')[0]['text_preview'] == 'preview'
+
+
+def test_concurrent_imports_from_threads_import_once(tmp_path, legacy_json):
+    db_path = tmp_path / 'history.db'
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(import_into(db_path, legacy_json))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results, key=str) == [4] + [None] * 7
+    assert HistoryStore(db_path).count('alice') == 3
+
+
+def test_concurrent_imports_from_processes_import_once(tmp_path, legacy_json):
+    db_path = str(tmp_path / 'history.db')
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(import_into, [db_path] * 4, [str(legacy_json)] * 4))
+    assert sorted(results, key=str) == [4] + [None] * 3
+    assert HistoryStore(db_path).count('alice') == 3
+
+
+def test_an_interrupted_import_is_retried(tmp_path, legacy_json):
+    db_path = tmp_path / 'history.db'
+    store = HistoryStore(db_path)
+    db = store._db
+
+    class CrashingConnection:
+        def __getattr__(self, name):
+            return getattr(db, name)
+
+        def executemany(self, *args):
+            db.executemany(*args)
+            raise KeyboardInterrupt  # e.g. the app was stopped mid-import
+
+    store._db = CrashingConnection()
+    with pytest.raises(KeyboardInterrupt):
+        store.import_json(legacy_json)
+    store._db = db
+    store.close()
+
+    store = HistoryStore(db_path)
+    assert store.count('alice') == 0
+    assert store.import_json(legacy_json) == 4
+
+
+def test_databases_filled_before_the_marker_are_not_imported_again(tmp_path, legacy_json):
+    db_path = tmp_path / 'history.db'
+    db = sqlite3.connect(db_path)
+    db.executescript(history_store.SCHEMA)
+    db.execute("INSERT INTO history (username, timestamp, text_preview, full_text, results) "
+               "VALUES ('alice', 't', 'p', 'imported earlier', '{}')")
+    db.execute('DELETE FROM migrations')
+    db.commit()
+    db.close()
+
+    store = HistoryStore(db_path)
+    assert store.import_json(legacy_json) is None
+    assert store.count('alice') == 1
+
+
+def test_migrate_command(tmp_path, legacy_json, capsys):
+    db_path = tmp_path / 'history.db'
+    assert history_store.main(['migrate', str(legacy_json), str(db_path)]) == 0
+    assert history_store.main(['migrate', str(legacy_json), str(db_path)]) == 1
+    assert 'Imported 4 entries' in capsys.readouterr().out
+
+
+@pytest.fixture
+def auth_history(tmp_path, legacy_json, monkeypatch):
+    monkeypatch.setattr(auth, 'HISTORY_DB', tmp_path / 'history.db')
+    monkeypatch.setattr(auth, 'LEGACY_HISTORY_DB', legacy_json)
+    monkeypatch.setattr(auth, '_history_store', None)
+
+
+def test_first_use_from_many_threads_opens_one_store(auth_history):
+    stores = []
+    threads = [threading.Thread(target=lambda: stores.append(auth.get_history_store())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(store) for store in stores}) == 1
+    assert auth.count_user_history('alice') == 3
+
+
+def test_history_pages_leave_out_the_full_text(auth_history):
+    auth.add_to_history('carol', 'the full text of an analysis', {'composite': 50})
+    entry, = auth.get_user_history('carol')
+    assert 'full_text' not in entry
+    assert auth.get_history_entry('carol', entry['id'])['full_text'] == 'the full text of an analysis'
+    assert auth.get_user_history('carol', full=True)[0]['full_text'] == 'the full text of an analysis'
+    assert auth.delete_history_entry('carol', entry['id'])
+    assert auth.count_user_history('carol') == 0
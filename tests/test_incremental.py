@@ -0,0 +1,86 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import baseline
+from backend import main
+from backend.incremental import DocumentSession, SessionStore
+
+
+def edit_sentence(text, rng):
+    """Replace one word of the text, as a user editing a draft would."""
+    words = text.split(' ')
+    i = rng.randrange(len(words))
+    words[i] = rng.choice(['excellent', 'poor', 'because', 'not', 'methodology', 'it.'])
+    return ' '.join(words)
+
+
+def test_every_version_matches_a_full_analysis(texts):
+    rng = random.Random(7)
+    session = DocumentSession('doc')
+    for text in texts[3:13]:
+        for _ in range(4):
+            features, doc, sentence_sentiments, _recomputed = session.analyze(text)
+            expected, sentences, _words, expected_sentiments = baseline.compute_features(text)
+            assert features == expected
+            assert doc.sentences == sentences
+            assert sentence_sentiments == expected_sentiments
+            text = edit_sentence(text, rng)
+
+
+def test_only_changed_sentences_are_recomputed():
+    session = DocumentSession('doc')
+    text = "The model is good. The data is poor. Results may vary. We are confident."
+    assert session.analyze(text)[3] == 4
+    assert session.analyze(text)[3] == 0
+    assert session.analyze(text.replace("poor", "excellent"))[3] == 1
+
+
+def test_apply_edit_replaces_a_range():
+    session = DocumentSession('doc')
+    session.analyze("The model is good.")
+    assert session.apply_edit(4, 9, "method") == "The method is good."
+
+
+@pytest.mark.parametrize('start, end', [(-1, 2), (5, 3), (0, 99)])
+def test_apply_edit_rejects_ranges_outside_the_text(start, end):
+    session = DocumentSession('doc')
+    session.analyze("The model is good.")
+    with pytest.raises(ValueError):
+        session.apply_edit(start, end, "x")
+
+
+def test_session_store_is_a_bounded_lru():
+    store = SessionStore(max_sessions=2)
+    a = store.get(None)
+    b = store.get(None)
+    assert store.get(a.doc_id) is a  # b is now the oldest
+    store.get(None)
+    assert len(store) == 2
+    assert store.get(b.doc_id, create=False) is None
+    assert store.get(a.doc_id, create=False) is a
+
+
+def test_incremental_endpoint_applies_edits():
+    client = TestClient(main.app)
+    text = "The model is good. The data is poor. Results may vary. We are confident in it."
+    first = client.post('/analyze/incremental', json={'text': text}).json()
+    assert first['sentences_recomputed'] == 4
+
+    start = text.index('poor')
+    second = client.post('/analyze/incremental', json={
+        'document_id': first['document_id'],
+        'edit': {'start': start, 'end': start + 4, 'replacement': 'excellent'},
+    }).json()
+    edited = text.replace('poor', 'excellent')
+    assert (second['sentences_reused'], second['sentences_recomputed']) == (3, 1)
+    assert {k: second[k] for k in baseline.analyze(edited)} == baseline.analyze(edited)
+
+
+def test_incremental_endpoint_errors():
+    client = TestClient(main.app)
+    assert client.post('/analyze/incremental', json={}).status_code == 400
+    unknown = client.post('/analyze/incremental', json={
+        'document_id': 'nope', 'edit': {'start': 0, 'end': 0, 'replacement': 'x'}})
+    assert unknown.status_code == 404
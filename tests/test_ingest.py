@@ -0,0 +1,117 @@
+import io
+import tempfile
+
+import pytest
+
+from backend import ingest
+
+
+def make_pdf(pages):
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_font('Arial', size=12)
+    for i in range(pages):
+        pdf.add_page()
+        pdf.cell(0, 10, f"Page {i + 1} reports an efficient method.")
+        pdf.ln()
+        pdf.cell(0, 10, "Therefore the results hold.")
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def make_docx(paragraphs):
+    import docx
+    document = docx.Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope='module')
+def pdf_pool():
+    yield
+    if ingest._pdf_pool is not None:
+        ingest._pdf_pool.shutdown()
+        ingest._pdf_pool = None
+
+
+def test_pdf_pages_are_extracted_in_order():
+    pages = list(ingest.iter_pdf_pages(make_pdf(3), workers=1))
+    assert [number for number, _text, _seconds in pages] == [1, 2, 3]
+    assert pages[1][1].startswith("Page 2 reports")
+
+
+def test_parallel_extraction_matches_serial(pdf_pool, monkeypatch, tmp_path):
+    monkeypatch.setattr(ingest, 'PDF_PARALLEL_MIN_PAGES', 4)
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    data = make_pdf(12)
+    serial = [page[:2] for page in ingest.iter_pdf_pages(data, workers=1)]
+    parallel = [page[:2] for page in ingest.iter_pdf_pages(data, workers=2)]
+    assert parallel == serial
+    assert ingest._pdf_pool is not None
+    # Workers read the PDF from a temporary file, removed once the pages are read.
+    assert list(tmp_path.glob('paperiq-*')) == []
+
+
+def test_closing_the_page_iterator_early_removes_its_file(pdf_pool, monkeypatch, tmp_path):
+    monkeypatch.setattr(ingest, 'PDF_PARALLEL_MIN_PAGES', 4)
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    pages = ingest.iter_pdf_pages(make_pdf(12), workers=2)
+    assert next(pages)[0] == 1
+    pages.close()
+    assert list(tmp_path.glob('paperiq-*')) == []
+
+
+def test_extract_text_from_pdf_records_page_timings():
+    timings = []
+    text = ingest.extract_text_from_pdf(make_pdf(2), page_timings=timings)
+    assert "Page 1 reports" in text and "Page 2 reports" in text
+    assert [number for number, _seconds in timings] == [1, 2]
+
+
+@pytest.mark.parametrize('name, data, expected', [
+    ('paper.PDF', b'', 'pdf'),
+    ('notes.txt', b'', 'txt'),
+    ('upload', b'%PDF-1.4 ...', 'pdf'),
+    ('upload', b'PK\x03\x04 word/document.xml', 'docx'),
+    ('image.png', b'\x89PNG', None),
+])
+def test_detect_file_type(name, data, expected):
+    assert ingest.detect_file_type(name, data) == expected
+
+
+def test_ingest_txt_normalizes_line_endings():
+    text, message = ingest.ingest_document(b"\r\n First line.\r\nSecond line.\x00 \n", 'a.txt')
+    assert text == "First line.\nSecond line."
+    assert message.startswith("✅")
+
+
+def test_ingest_latin1_txt():
+    text, _message = ingest.ingest_document("Caf\xe9 results are robust.".encode('latin-1'), 'b.txt')
+    assert text == "Café results are robust."
+
+
+def test_ingest_docx_keeps_paragraphs():
+    data = make_docx(["First paragraph.", "Second paragraph."])
+    text, _message = ingest.ingest_document(data, 'c.docx')
+    assert text == "First paragraph.\nSecond paragraph."
+
+
+def test_ingest_pdf():
+    text, message = ingest.ingest_document(make_pdf(2), 'd.pdf')
+    assert text.startswith("Page 1 reports an efficient method.")
+    assert "PDF" in message
+
+
+def test_ingest_rejects_unsupported_and_broken_files():
+    assert ingest.ingest_document(b"\x89PNG", 'image.png')[0] is None
+    text, message = ingest.ingest_document(b"%PDF-1.4 truncated", 'broken.pdf')
+    assert text is None and message.startswith("❌")
+
+
+def test_ingest_is_cached_by_content(monkeypatch):
+    data = b"A cached document about robust methods."
+    first = ingest.ingest_document(data, 'e.txt')
+    monkeypatch.setattr(ingest, '_ingest', lambda *args: pytest.fail("parsed twice"))
+    assert ingest.ingest_document(data, 'renamed.txt') == first
@@ -0,0 +1,125 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.cache import ResultCache
+from backend.metrics import CONTENT_TYPE, Counter, Gauge, Histogram, Registry, StageTimer, server_timing
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def unescape(value):
+    return re.sub(r'\\(.)', lambda m: '\n' if m.group(1) == 'n' else m.group(1), value)
+
+
+def parse(text):
+    """Exposition text -> {(name, ((label, value), ...)): float}, checking every line's syntax."""
+    assert text.endswith('\n')
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            assert re.match(r'^# (HELP|TYPE) \S+ .+$', line), line
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        name, labels, value = match.groups()
+        pairs = tuple((k, unescape(v)) for k, v in LABEL.findall(labels or ''))
+        if labels:
+            assert labels == '{' + ','.join(f'{k}="{v}"' for k, v in LABEL.findall(labels)) + '}', line
+        samples[(name, pairs)] = float(value)
+    return samples
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('h', 'Test histogram.', buckets=(5, 1, 10))
+    for value in (0.5, 1, 3, 7, 100):
+        histogram.observe(value)
+    samples = parse('\n'.join(histogram.render()) + '\n')
+    # Bounds are inclusive: 1 falls in le="1".
+    assert [samples[('h_bucket', (('le', le),))] for le in ('1', '5', '10', '+Inf')] == [2, 3, 4, 5]
+    assert samples[('h_sum', ())] == 111.5
+    assert samples[('h_count', ())] == 5
+
+
+def test_histogram_series_per_label_with_escaping():
+    histogram = Histogram('stage_seconds', 'Per stage.', buckets=(0.1,), labelnames=('stage',))
+    odd = 'a "quoted"\\back\nslash'
+    histogram.observe(0.05, stage='plain')
+    histogram.observe(1.0, stage=odd)
+    samples = parse('\n'.join(histogram.render()) + '\n')
+    assert samples[('stage_seconds_bucket', (('stage', 'plain'), ('le', '0.1')))] == 1
+    assert samples[('stage_seconds_bucket', (('stage', odd), ('le', '0.1')))] == 0
+    assert samples[('stage_seconds_bucket', (('stage', odd), ('le', '+Inf')))] == 1
+    assert samples[('stage_seconds_count', (('stage', odd),))] == 1
+    assert 'stage="a \\"quoted\\"\\\\back\\nslash"' in '\n'.join(histogram.render())
+
+
+def test_counters_and_gauges():
+    registry = Registry()
+    counter = registry.register(Counter('errors_total', 'Errors.', labelnames=('reason',)))
+    counter.inc(reason='timeout')
+    counter.inc(2, reason='timeout')
+    counter.inc(reason='saturated')
+    registry.register(Gauge('hits_total', 'Hits.', lambda: 7, kind='counter'))
+    registry.register(Gauge('ratio', 'Ratio.', lambda: 0.25))
+    text = registry.render()
+    assert '# TYPE hits_total counter' in text and '# TYPE ratio gauge' in text
+    samples = parse(text)
+    assert samples[('errors_total', (('reason', 'timeout'),))] == 3
+    assert samples[('errors_total', (('reason', 'saturated'),))] == 1
+    assert samples[('hits_total', ())] == 7 and samples[('ratio', ())] == 0.25
+
+
+def test_stage_timer_adds_up_repeated_stages_and_failures():
+    timer = StageTimer()
+    with timer('a'):
+        pass
+    first = timer.timings['a']
+    with pytest.raises(ValueError):
+        with timer('a'):
+            raise ValueError
+    assert timer.timings['a'] >= first
+    assert server_timing({'a': 0.0015, 'total': 0.25}) == 'a;dur=1.50, total;dur=250.00'
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'result_cache', ResultCache(max_entries=16))
+    return TestClient(main.app)
+
+
+TEXT = "The proposed model improves accuracy. Therefore it may generalize to new data."
+
+
+def test_metrics_endpoint_counts_analyses(client):
+    response = client.get('/metrics')
+    assert response.headers['content-type'] == CONTENT_TYPE
+    before = parse(response.text)
+    client.post('/analyze', json={'text': TEXT})
+    client.post('/analyze', json={'text': TEXT})
+    after = parse(client.get('/metrics').text)
+
+    def delta(name, *labels):
+        return after.get((name, labels), 0) - before.get((name, labels), 0)
+
+    assert delta('paperiq_analyze_seconds_count', ('cache', 'miss')) == 1
+    assert delta('paperiq_analyze_seconds_count', ('cache', 'hit')) == 1
+    assert delta('paperiq_stage_seconds_count', ('stage', 'score_paper')) == 1
+    assert delta('paperiq_document_chars_count') == 2
+    assert after[('paperiq_cache_memory_hits_total', ())] == 1
+    assert after[('paperiq_cache_entries', ())] == 1
+
+
+def test_server_timing_header(client, monkeypatch):
+    monkeypatch.setattr(main, 'SERVER_TIMING', False)
+    assert 'Server-Timing' not in client.post('/analyze', json={'text': TEXT + " Off."}).headers
+
+    monkeypatch.setattr(main, 'SERVER_TIMING', True)
+    entries = [client.post('/analyze', json={'text': TEXT}).headers['Server-Timing'] for _ in range(2)]
+    miss, hit = [dict(item.split(';dur=') for item in header.split(', ')) for header in entries]
+    assert {'score_paper', 'sentence_contributions', 'serialize', 'total'} <= set(miss)
+    assert all(float(ms) >= 0 for ms in miss.values())
+    assert set(hit) == {'cache-memory', 'total'}
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+
+import pytest
+
+from report_cache import ReportCache, report_key
+
+
+def write(text):
+    def render(path):
+        with open(path, 'w') as f:
+            f.write(text)
+    return render
+
+
+def test_report_key_ignores_key_order_but_not_kind():
+    assert report_key({'a': 1, 'b': [1, 2]}) == report_key({'b': [1, 2], 'a': 1})
+    assert report_key({'a': 1}) != report_key({'a': 2})
+    assert report_key({'a': 1}, 'pdf') != report_key({'a': 1}, 'figures')
+
+
+def test_a_report_is_rendered_once(tmp_path):
+    cache = ReportCache(str(tmp_path), workers=4)
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def render(path):
+        calls.append(path)
+        started.set()
+        release.wait(5)
+        write('report')(path)
+
+    futures = [cache.submit('k', render)]
+    started.wait(5)
+    futures += [cache.submit('k', render) for _ in range(5)]  # while the first is rendering
+    release.set()
+    paths = {future.result(5) for future in futures}
+    assert paths == {cache.path('k')}
+    assert cache.submit('k', render).result(5) == cache.path('k')  # served from disk
+    assert len(calls) == 1
+    assert open(cache.path('k')).read() == 'report'
+
+
+def test_get_returns_only_finished_reports(tmp_path):
+    cache = ReportCache(str(tmp_path))
+    assert cache.get('k') is None
+    cache.submit('k', write('x'), suffix='.html').result(5)
+    assert cache.get('k') is None
+    assert cache.get('k', suffix='.html') == cache.path('k', '.html')
+
+
+def test_a_failed_render_keeps_its_error_and_leaves_no_files(tmp_path):
+    cache = ReportCache(str(tmp_path))
+
+    def broken(path):
+        open(path, 'w').close()
+        raise RuntimeError("fpdf failed")
+
+    future = cache.submit('k', broken)
+    with pytest.raises(RuntimeError):
+        future.result(5)
+    assert cache.submit('k', write('x')) is future  # reruns show the same error
+    assert os.listdir(tmp_path) == []
+
+
+def test_a_failed_render_is_retried_after_retry_after(tmp_path):
+    cache = ReportCache(str(tmp_path), retry_after=0.05)
+    attempts = []
+
+    def flaky(path):
+        attempts.append(path)
+        if len(attempts) == 1:
+            raise ConnectionError("API unavailable")
+        write('report')(path)
+
+    failed = cache.submit('k', flaky)
+    with pytest.raises(ConnectionError):
+        failed.result(5)
+    assert cache.submit('k', flaky) is failed  # still within retry_after
+    time.sleep(0.1)
+    retried = cache.submit('k', flaky)
+    assert retried is not failed
+    assert retried.result(5) == cache.path('k')
+    assert open(cache.path('k')).read() == 'report'
+    assert len(attempts) == 2
+    assert cache.submit('k', flaky).result(5) == cache.path('k')  # now served from disk
+    assert len(attempts) == 2
+
+
+def test_least_recently_used_reports_are_removed(tmp_path):
+    cache = ReportCache(str(tmp_path), max_files=2)
+    for key in ('a', 'b'):
+        cache.submit(key, write(key)).result(5)
+    now = time.time()
+    os.utime(cache.path('a'), (now - 20, now - 20))
+    os.utime(cache.path('b'), (now - 10, now - 10))
+    assert cache.get('a')  # 'b' is now the least recently used
+    cache.submit('c', write('c')).result(5)
+    assert sorted(os.listdir(tmp_path)) == ['a.pdf', 'c.pdf']
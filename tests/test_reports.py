@@ -0,0 +1,157 @@
+import csv
+import io
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import baseline
+from backend import main
+from backend.cache import ResultCache
+from backend.executor import AnalysisExecutor
+
+# Markup in the text checks that the HTML report escapes sentences.
+TEXT = ("The <b>proposed</b> model & its baseline improve accuracy. Therefore it may generalize to new data. "
+        "We think the results are very good because the evaluation is robust.")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'result_cache', ResultCache(max_entries=16))
+    monkeypatch.setattr(main, 'report_cache', ResultCache(max_entries=16))
+    executor = AnalysisExecutor(mode='thread', workers=2)
+    monkeypatch.setattr(main, 'report_executor', executor)
+    yield TestClient(main.app)
+    executor.shutdown()
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    calls = []
+    render_report = main.render_report
+
+    def counting(body, fmt):
+        calls.append(fmt)
+        return render_report(body, fmt)
+
+    monkeypatch.setattr(main, 'render_report', counting)
+    return calls
+
+
+def analysis_id(client, text=TEXT):
+    return client.post('/analyze', json={'text': text}).headers['X-Analysis-Id']
+
+
+def test_csv_report_matches_the_analysis(client):
+    key = analysis_id(client)
+    response = client.get(f'/report/{key}', params={'format': 'csv'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'text/csv; charset=utf-8'
+    assert response.headers['content-disposition'] == f'attachment; filename="paperiq-{key[:12]}.csv"'
+
+    expected = baseline.analyze(TEXT)
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ['section', 'index', 'field', 'value']
+    values = {(section, index, field): value for section, index, field, value in rows[1:]}
+    for name in ('composite', 'language', 'coherence', 'reasoning'):
+        assert values[('score', '', name)] == str(expected[name])
+    for name, value in expected['diagnostics'].items():
+        assert values[('diagnostic', '', name)] == str(value)
+    for i, record in enumerate(expected['sentiment_analysis']):
+        assert values[('sentence', str(i), 'text')] == record['text']
+        assert float(values[('sentence', str(i), 'polarity')]) == record['polarity']
+    for rank, item in enumerate(expected['top_flagged_sentences']):
+        assert values[('flagged', str(rank), 'sentence')] == item['sentence']
+
+
+def test_html_report_escapes_the_text(client):
+    response = client.get(f'/report/{analysis_id(client)}', params={'format': 'html'})
+    assert response.headers['content-type'] == 'text/html; charset=utf-8'
+    body = response.text
+    assert body.startswith('<!DOCTYPE html>') and body.endswith('</html>')
+    assert 'The &lt;b&gt;proposed&lt;/b&gt; model &amp; its baseline' in body
+    assert '<b>proposed</b>' not in body
+    assert f"Composite score: {baseline.analyze(TEXT)['composite']}/100" in body
+
+
+def test_pdf_report(client):
+    pytest.importorskip('fpdf')
+    response = client.get(f'/report/{analysis_id(client)}')
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/pdf'
+    assert response.content.startswith(b'%PDF') and response.content.rstrip().endswith(b'%%EOF')
+
+
+def test_a_repeat_download_is_served_from_the_cache(client, renders):
+    key = analysis_id(client)
+    first = client.get(f'/report/{key}', params={'format': 'csv'})
+    second = client.get(f'/report/{key}', params={'format': 'csv'})
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+    assert first.content == second.content
+    assert renders == ['csv']
+    client.get(f'/report/{key}', params={'format': 'html'})
+    assert renders == ['csv', 'html']
+
+
+def test_unknown_and_expired_analyses_answer_404(client, monkeypatch, texts):
+    assert client.get('/report/' + 'f' * 64).status_code == 404
+    assert client.get('/report/not-an-id').status_code == 404
+
+    monkeypatch.setattr(main, 'result_cache', ResultCache(max_entries=1))
+    expired = analysis_id(client, texts[3])
+    analysis_id(client, texts[4])  # evicts the first analysis
+    response = client.get(f'/report/{expired}', params={'format': 'csv'})
+    assert response.status_code == 404
+    assert response.json()['detail'].startswith('Unknown or expired analysis_id')
+
+
+def test_bad_format_and_failed_render(client, monkeypatch):
+    key = analysis_id(client)
+    assert client.get(f'/report/{key}', params={'format': 'docx'}).status_code == 400
+
+    def broken(body, fmt):
+        raise RuntimeError("no fonts")
+
+    monkeypatch.setattr(main, 'render_report', broken)
+    response = client.get(f'/report/{key}', params={'format': 'csv'})
+    assert response.status_code == 500
+    assert response.json()['detail'] == 'Report rendering failed: no fonts'
+    assert main.report_cache.stats()['entries'] == 0
+
+
+def test_batch_zip_lists_missing_ids(client, texts, renders):
+    keys = [analysis_id(client, text) for text in (TEXT, texts[5])]
+    unknown = 'e' * 64
+    response = client.post('/report/batch', json={'analysis_ids': [keys[0], unknown, keys[1], keys[0]],
+                                                  'format': 'csv'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/zip'
+    assert response.headers['X-Missing'] == '1'
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == [f'paperiq-{keys[0]}.csv', f'paperiq-{keys[1]}.csv', 'missing.txt']
+    assert archive.read('missing.txt') == f'{unknown}\n'.encode()
+    assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in archive.infolist())
+    # Duplicates are rendered once, and the files match single downloads (now cache hits).
+    assert renders == ['csv', 'csv']
+    for key in keys:
+        single = client.get(f'/report/{key}', params={'format': 'csv'})
+        assert single.headers['X-Cache'] == 'HIT'
+        assert archive.read(f'paperiq-{key}.csv') == single.content
+
+
+def test_batch_pdfs_are_stored_and_complete_batches_have_no_missing_list(client):
+    pytest.importorskip('fpdf')
+    key = analysis_id(client)
+    response = client.post('/report/batch', json={'analysis_ids': [key]})
+    assert response.headers['X-Missing'] == '0'
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    info, = archive.infolist()
+    assert info.filename == f'paperiq-{key}.pdf' and info.compress_type == zipfile.ZIP_STORED
+    assert archive.read(info).startswith(b'%PDF')
+
+
+def test_batch_limits(client, monkeypatch):
+    assert client.post('/report/batch', json={'analysis_ids': [], 'format': 'docx'}).status_code == 400
+    monkeypatch.setattr(main, 'BATCH_MAX_ITEMS', 1)
+    assert client.post('/report/batch', json={'analysis_ids': ['a', 'b']}).status_code == 400
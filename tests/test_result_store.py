@@ -0,0 +1,68 @@
+import json
+import os
+import time
+
+from result_store import ResultStore, SessionResults, result_key
+
+
+def body(data):
+    return json.dumps(data).encode()
+
+
+def test_results_round_trip_by_content_key(tmp_path):
+    store = ResultStore(str(tmp_path))
+    data = {'composite': 71.5, 'sentiment_analysis': [{'text': 'A.', 'polarity': 0.1}]}
+    key = store.put(body(data))
+    assert key == result_key(body(data))
+    assert store.put(body(data)) == key  # stored once
+    assert len(os.listdir(tmp_path)) == 1
+    assert store.get(key) == data
+
+
+def test_missing_or_corrupt_results_read_as_none(tmp_path):
+    store = ResultStore(str(tmp_path))
+    assert store.get('0' * 64) is None
+    with open(store.path('bad'), 'wb') as f:
+        f.write(b'not gzip')
+    assert store.get('bad') is None
+
+
+def test_least_recently_used_results_are_removed_over_the_budget(tmp_path):
+    store = ResultStore(str(tmp_path))
+    # Random hex barely compresses, so every file is about the same size.
+    bodies = [body({'blob': os.urandom(20_000).hex()}) for _ in range(3)]
+    keys = [store.put(b) for b in bodies[:2]]
+    now = time.time()
+    os.utime(store.path(keys[0]), (now - 20, now - 20))
+    os.utime(store.path(keys[1]), (now - 10, now - 10))
+    store.max_bytes = sum(os.path.getsize(store.path(k)) for k in keys) + 100  # room for two
+    assert store.get(keys[0])  # keys[1] is now the least recently used
+    keys.append(store.put(bodies[2]))
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(store.path(k)) for k in (keys[0], keys[2]))
+    assert store.get(keys[1]) is None
+
+
+def test_session_results_keep_recent_results_within_the_budget():
+    session = SessionResults(max_mb=1)
+    mb = 1024 * 1024
+    session.put('a', {'n': 'a'}, mb // 2)
+    session.put('b', {'n': 'b'}, mb // 2)
+    assert session.get('a') == {'n': 'a'}  # 'b' is now the least recently viewed
+    session.put('c', {'n': 'c'}, mb // 2)
+    assert session.get('b') is None
+    assert len(session) == 2 and session.bytes == mb
+
+
+def test_session_results_always_keep_the_newest():
+    session = SessionResults(max_mb=1)
+    session.put('a', {'n': 'a'}, 10)
+    session.put('huge', {'n': 'huge'}, 5 * 1024 * 1024)
+    assert len(session) == 1 and session.get('huge') == {'n': 'huge'}
+
+
+def test_session_results_replace_an_entry_of_the_same_key():
+    session = SessionResults(max_mb=1)
+    session.put('a', {'v': 1}, 100)
+    session.put('a', {'v': 2}, 300)
+    assert session.get('a') == {'v': 2}
+    assert session.bytes == 300
@@ -0,0 +1,140 @@
+import json
+import os
+
+import pytest
+
+import baseline
+from backend import score_corpus
+
+
+@pytest.fixture
+def archive(tmp_path, texts):
+    root = tmp_path / 'archive'
+    (root / 'nested').mkdir(parents=True)
+    long_texts = [t for t in texts if len(t.strip()) >= 20]
+    for i, text in enumerate(long_texts[:20]):
+        folder = root / 'nested' if i % 3 == 0 else root
+        (folder / f'doc{i:02d}.txt').write_text(text, encoding='utf-8')
+    (root / 'short.txt').write_text("Too short.", encoding='utf-8')
+    (root / 'broken.pdf').write_bytes(b"%PDF-1.4 not really")
+    (root / 'notes.md').write_text("Not a supported type.", encoding='utf-8')
+    return root
+
+
+def run(*args):
+    return score_corpus.main([str(a) for a in args] + ['--progress-interval', '0'])
+
+
+def read_rows(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_discover_walks_supported_files_in_order(archive):
+    paths = score_corpus.discover(str(archive))
+    names = [os.path.relpath(p, archive) for p in paths]
+    assert len(names) == 22 and 'notes.md' not in names
+    # Each directory's files in name order, then its subdirectories.
+    assert names[:3] == ['broken.pdf', 'doc01.txt', 'doc02.txt']
+    assert names[-1] == os.path.join('nested', 'doc18.txt')
+
+
+def test_manifest_paths_are_relative_to_the_manifest(archive):
+    manifest = archive / 'manifest.txt'
+    manifest.write_text(f"# two files\ndoc01.txt\n\n{archive / 'nested' / 'doc00.txt'}\n")
+    assert score_corpus.discover(str(manifest)) == [str(archive / 'doc01.txt'), str(archive / 'nested' / 'doc00.txt')]
+
+
+def test_rows_match_the_baseline(archive, tmp_path):
+    output = tmp_path / 'scores.jsonl'
+    assert run(archive, '-o', output, '--workers', 1, '--chunk-size', 4) == 0
+    rows = read_rows(output)
+    assert len(rows) == 22
+    for row in rows:
+        name = os.path.basename(row['path'])
+        if name == 'short.txt':
+            assert row['error'].startswith('Text too short')
+        elif name == 'broken.pdf':
+            assert row['error'] == 'Failed to extract text from PDF'
+        else:
+            with open(row['path'], encoding='utf-8') as f:
+                text = f.read().strip()
+            features = baseline.compute_features(text)[0]
+            assert row['error'] is None
+            assert row['diagnostics'] == features
+            assert {k: row[k] for k in ('language', 'coherence', 'reasoning', 'composite')} == baseline.score_paper(features)
+
+
+def test_workers_produce_the_same_rows(archive, tmp_path):
+    run(archive, '-o', tmp_path / 'serial.jsonl', '--workers', 1, '--chunk-size', 3)
+    run(archive, '-o', tmp_path / 'parallel.jsonl', '--workers', 2, '--chunk-size', 3)
+    # Chunks are written as they complete, so only the order may differ.
+    parallel = sorted(read_rows(tmp_path / 'parallel.jsonl'), key=lambda row: row['path'])
+    assert parallel == sorted(read_rows(tmp_path / 'serial.jsonl'), key=lambda row: row['path'])
+
+
+def test_an_interrupted_run_resumes_where_it_stopped(archive, tmp_path, monkeypatch, capsys):
+    complete = tmp_path / 'complete.jsonl'
+    run(archive, '-o', complete, '--workers', 1, '--chunk-size', 2)
+
+    output = tmp_path / 'scores.jsonl'
+    score_files = score_corpus.score_files
+    calls = []
+
+    def interrupted(paths, sentiment=True):
+        calls.append(paths)
+        if len(calls) == 6:
+            raise KeyboardInterrupt
+        return score_files(paths, sentiment)
+
+    monkeypatch.setattr(score_corpus, 'score_files', interrupted)
+    assert run(archive, '-o', output, '--workers', 1, '--chunk-size', 2, '--commit-every', 4) == 130
+    # Two checkpoints of four rows each; the fifth chunk was written but not committed.
+    assert len(read_rows(output)) == 10
+
+    monkeypatch.setattr(score_corpus, 'score_files', score_files)
+    capsys.readouterr()
+    assert run(archive, '-o', output, '--workers', 1, '--chunk-size', 2, '--commit-every', 4) == 0
+    assert "Resuming: 8 of 22 files already scored" in capsys.readouterr().err
+    assert read_rows(output) == read_rows(complete)
+
+
+def test_a_torn_checkpoint_line_is_ignored(archive, tmp_path):
+    output = tmp_path / 'scores.jsonl'
+    complete = tmp_path / 'complete.jsonl'
+    run(archive, '-o', complete, '--workers', 1)
+    run(archive, '-o', output, '--workers', 1, '--commit-every', 8)
+    # As if the run died while writing its last checkpoint and output row.
+    checkpoint = str(output) + '.checkpoint'
+    with open(checkpoint, encoding='utf-8') as f:
+        lines = f.readlines()
+    with open(checkpoint, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:2])
+        f.write('{"position": 99')
+    with open(output, 'ab') as f:
+        f.write(b'{"path": "half a row')
+
+    assert run(archive, '-o', output, '--workers', 1) == 0
+    assert read_rows(output) == read_rows(complete)
+
+
+def test_changed_settings_or_stray_output_need_restart(archive, tmp_path):
+    output = tmp_path / 'scores.jsonl'
+    run(archive, '-o', output, '--workers', 1)
+    assert run(archive, '-o', output, '--workers', 1, '--no-sentiment') == 1
+
+    stray = tmp_path / 'stray.jsonl'
+    stray.write_text('old\n')
+    assert run(archive, '-o', stray, '--workers', 1) == 1
+    assert run(archive, '-o', stray, '--workers', 1, '--no-sentiment', '--restart') == 0
+    rows = read_rows(stray)
+    assert len(rows) == 22
+    assert all(row['diagnostics']['sentiment_polarity'] is None for row in rows if not row['error'])
+
+
+def test_parquet_output(archive, tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    output = tmp_path / 'scores.parquet'
+    assert run(archive, '-o', output, '--workers', 1, '--commit-every', 8) == 0
+    assert pq.read_table(str(output)).num_rows == 22
@@ -0,0 +1,113 @@
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+import baseline
+from conftest import ROOT
+from backend import main
+from backend.cache import ResultCache
+from backend.sentence_index import RULE_BITS, SentenceIndex
+
+REASONS = {'long': "Sentence is too long and complex", 'repetitive': "Repetitive vocabulary",
+           'transitions': "Lack of transition words"}
+# Long, repetitive and transition-free sentences, so every rule is broken somewhere.
+FLAGGED = " ".join([
+    "The model " * 12 + "works.",
+    "We measured " + " ".join(f"metric{i}" for i in range(80)) + " carefully.",
+    "Because " + " ".join(f"term{i}" for i in range(35)) + " matter, we proceed.",
+    "This is fine.",
+    "Data data data data data data data data data data data data is good.",
+])
+
+
+@pytest.fixture(scope='module')
+def results(texts):
+    return [(text, baseline.analyze(text)) for text in [FLAGGED] + texts if len(text.strip()) >= 20]
+
+
+def test_flagged_sentences_match_the_baseline_contributions(results):
+    flagged_any = False
+    for text, data in results:
+        index = SentenceIndex(data)
+        expected = baseline.sentence_contributions(baseline.sentence_split(text), data['diagnostics'])
+        total, items = index.flagged_page(0, len(index))
+        assert total == len(expected)
+        assert [{k: item[k] for k in ('sentence', 'score', 'reason', 'suggestion')} for item in items] == expected
+        assert [item['sentence'] for item in items[:5]] == [s['sentence'] for s in data['top_flagged_sentences']]
+        flagged_any = flagged_any or total > 0
+    assert flagged_any
+
+
+def test_rule_filter_and_counts(results):
+    for _text, data in results:
+        index = SentenceIndex(data)
+        _total, everything = index.flagged_page(0, len(index))
+        for rule, reason in REASONS.items():
+            total, items = index.flagged_page(0, len(index), rule)
+            assert items == [item for item in everything if reason in item['reason']]
+            assert index.rule_counts()[rule] == total
+            assert all(rule in item['rules'] for item in items)
+
+
+def test_sentiment_page_filters_and_pages(results):
+    _text, data = max(results, key=lambda r: len(r[1]['sentiment_analysis']))
+    index = SentenceIndex(data)
+    records = data['sentiment_analysis']
+    flagged_texts = {item['sentence'] for item in index.flagged_page(0, len(index))[1]}
+
+    total, items = index.sentiment_page(0, len(records))
+    assert total == len(records)
+    assert [{k: item[k] for k in ('text', 'polarity', 'subjectivity')} for item in items] == records
+
+    matches = [i for i, r in enumerate(records)
+               if -0.2 <= r['polarity'] <= 0.5 and r['subjectivity'] <= 0.6
+               and r['text'] not in flagged_texts]
+    total, items = index.sentiment_page(2, 3, min_polarity=-0.2, max_polarity=0.5,
+                                        max_subjectivity=0.6, flagged=False)
+    assert total == len(matches)
+    assert [item['index'] for item in items] == matches[2:5]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'result_cache', ResultCache(max_entries=8))
+    main.sentence_index.cache_clear()
+    yield TestClient(main.app)
+    main.sentence_index.cache_clear()
+
+
+def test_page_endpoints(client, results):
+    text, data = results[0]
+    analysis_id = client.post('/analyze', json={'text': text}).headers['X-Analysis-Id']
+    index = SentenceIndex(data)
+
+    page = client.get(f'/analysis/{analysis_id}/sentences', params={'offset': 1, 'limit': 2}).json()
+    assert page['total'] == len(data['sentiment_analysis'])
+    assert page['items'] == index.sentiment_page(1, 2)[1]
+
+    page = client.get(f'/analysis/{analysis_id}/flagged', params={'limit': 3}).json()
+    assert (page['total'], page['items']) == index.flagged_page(0, 3)
+    assert page['rules'] == index.rule_counts()
+
+    assert client.get(f'/analysis/{analysis_id}').json() == data
+    # Reading a result back is not a cache lookup for a submission.
+    assert main.result_cache.stats()['memory_hits'] == 0
+
+
+def test_page_endpoint_errors(client, results):
+    text, _data = results[1]
+    analysis_id = client.post('/analyze', json={'text': text}).headers['X-Analysis-Id']
+    assert client.get('/analysis/' + 'f' * 64 + '/sentences').status_code == 404
+    assert client.get('/analysis/not-an-id').status_code == 404
+    assert client.get(f'/analysis/{analysis_id}/sentences', params={'limit': 0}).status_code == 400
+    assert client.get(f'/analysis/{analysis_id}/sentences', params={'offset': -1}).status_code == 400
+    assert client.get(f'/analysis/{analysis_id}/flagged', params={'rule': 'nope'}).status_code == 400
+    assert set(RULE_BITS) == set(REASONS)
+
+
+def test_the_api_imports_numpy_on_first_use():
+    code = "import sys, backend.main; print(sorted(m for m in ('numpy', 'backend.sentence_index') if m in sys.modules))"
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == '[]'
@@ -0,0 +1,142 @@
+import asyncio
+import gc
+import json
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+import baseline
+from backend import main
+from backend.cache import ResultCache
+from backend.executor import AnalysisExecutor
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'result_cache', ResultCache(max_entries=64))
+    monkeypatch.setattr(main, 'analysis_executor', AnalysisExecutor(mode='thread', max_pending=4))
+    return TestClient(main.app)
+
+
+def parse_ndjson(body):
+    events = []
+    for line in body.splitlines():
+        payload = json.loads(line)
+        events.append((payload.pop('event'), payload))
+    return events
+
+
+def parse_sse(body):
+    events = []
+    for frame in body.strip().split('\n\n'):
+        event, data = frame.split('\n')
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def assemble(events):
+    """The /analyze response a client builds from the streamed events."""
+    names = [name for name, _payload in events]
+    assert names[0] == 'scores' and names[-2:] == ['diagnostics', 'done']
+    result = {'top_flagged_sentences': [], 'sentiment_analysis': []}
+    for name, payload in events:
+        if name == 'scores':
+            result.update(payload)
+        elif name == 'flagged':
+            assert payload.pop('rank') == len(result['top_flagged_sentences'])
+            result['top_flagged_sentences'].append(payload)
+        elif name == 'sentiment':
+            assert payload.pop('index') == len(result['sentiment_analysis'])
+            result['sentiment_analysis'].append(payload)
+        elif name == 'diagnostics':
+            result['diagnostics'].update(payload)
+    return result
+
+
+def test_ndjson_stream_assembles_to_the_baseline(client, texts):
+    for text in texts[:10]:
+        if len(text.strip()) < 20:
+            continue
+        response = client.post('/analyze/stream', json={'text': text})
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('application/x-ndjson')
+        assert assemble(parse_ndjson(response.text)) == baseline.analyze(text)
+
+
+def test_cached_replay_matches_the_live_stream(client, texts):
+    text = texts[5]
+    live = client.post('/analyze/stream', json={'text': text})
+    replay = client.post('/analyze/stream', json={'text': text})
+    assert (live.headers['X-Cache'], replay.headers['X-Cache']) == ('MISS', 'HIT')
+    assert parse_ndjson(replay.text) == parse_ndjson(live.text)
+    # The completed stream cached the same result /analyze returns.
+    assert client.post('/analyze', json={'text': text}).json() == assemble(parse_ndjson(live.text))
+
+
+def test_sse_is_chosen_by_query_or_accept_header(client, texts):
+    text = texts[1]
+    by_query = client.post('/analyze/stream?format=sse', json={'text': text})
+    by_header = client.post('/analyze/stream', json={'text': text}, headers={'Accept': 'text/event-stream'})
+    for response in (by_query, by_header):
+        assert response.headers['content-type'].startswith('text/event-stream')
+        assert assemble(parse_sse(response.text)) == baseline.analyze(text)
+
+
+def test_streams_hold_a_queue_slot_until_they_finish(client, texts):
+    executor = main.analysis_executor
+    for _ in range(executor.max_pending):
+        executor.acquire()
+    response = client.post('/analyze/stream', json={'text': texts[3]})
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
+
+    for _ in range(executor.max_pending):
+        executor.release()
+    assert client.post('/analyze/stream', json={'text': texts[3]}).status_code == 200
+    assert executor.pending == 0
+
+
+class Gone(Exception):
+    """The client went away before the response started."""
+
+
+def test_a_stream_that_is_never_read_frees_its_slot(client, texts):
+    body = json.dumps({'text': texts[4]}).encode()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0', 'spec_version': '2.4'}, 'http_version': '1.1',
+        'method': 'POST', 'scheme': 'http', 'path': '/analyze/stream', 'raw_path': b'/analyze/stream',
+        'root_path': '', 'query_string': b'', 'client': ('test', 1), 'server': ('test', 80),
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        raise Gone()
+
+    with pytest.raises(Gone):
+        asyncio.run(main.app(scope, receive, send))
+    assert main.analysis_executor.pending == 0
+
+
+def test_a_dropped_stream_response_frees_its_slot(client, texts):
+    request = Request({'type': 'http', 'method': 'POST', 'headers': [], 'query_string': b''})
+    response = main.analyze_stream(main.AnalyzeRequest(text=texts[4]), request)
+    assert main.analysis_executor.pending == 1
+    del response
+    gc.collect()
+    assert main.analysis_executor.pending == 0
+
+
+def test_a_stream_past_the_timeout_ends_with_an_error(client, monkeypatch, texts):
+    monkeypatch.setattr(main, 'analysis_executor', AnalysisExecutor(mode='thread', max_pending=4, timeout=1e-9))
+    response = client.post('/analyze/stream', json={'text': texts[4]})
+    assert response.status_code == 200
+    events = parse_ndjson(response.text)
+    assert [name for name, _payload in events] == ['scores', 'error']
+    assert events[-1][1] == {'detail': 'Analysis timed out.'}
+    # The unfinished analysis is not cached, and its slot is free.
+    assert main.result_cache.get(main.cache_key(texts[4], main.SCORING_VERSION))[0] is None
+    assert main.analysis_executor.pending == 0
@@ -0,0 +1,65 @@
+import json
+import random
+import re
+
+import pytest
+
+from backend.ingest import clean_text
+from backend.text_normalizer import TextNormalizer, default_normalizer
+from benchmarks.bench_clean_text import ARTIFACTS, legacy_clean_text, make_page
+
+
+def test_matches_the_legacy_multi_pass_cleanup():
+    rng = random.Random(0)
+    for _ in range(200):
+        page = make_page(rng, words=120)
+        assert default_normalizer(page) == legacy_clean_text(page)
+
+
+def test_matches_the_legacy_cleanup_on_dense_artifacts():
+    rng = random.Random(1)
+    alphabet = ARTIFACTS + ['a', 'wri', 'ting', ' ', '\t', 'WRI  TING', 'ﬁ ﬁ', '  ﬂ']
+    for _ in range(2000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        assert default_normalizer(text) == legacy_clean_text(text)
+
+
+def test_clean_text_uses_the_default_rules():
+    assert clean_text("The e ﬃcient “draft” – wri ting") == 'The efficient "draft" - writing'
+
+
+def test_ligatures_swallow_preceding_whitespace():
+    assert default_normalizer("signi ﬁcant  ﬂow") == "significantflow"
+
+
+def test_longest_ligature_wins():
+    normalizer = TextNormalizer(ligatures={'ﬀ': 'ff', 'ﬀi': 'XX'}, translate={}, patterns=[])
+    assert normalizer("oﬀice oﬀ") == "oXXce off"
+
+
+def test_no_rules_returns_the_text_unchanged():
+    text = "No rules at all ﬁ"
+    assert TextNormalizer(ligatures={}, translate={}, patterns=[])(text) == text
+
+
+def test_translate_rules_must_be_single_characters():
+    with pytest.raises(ValueError):
+        TextNormalizer(translate={'ab': 'c'})
+
+
+def test_bad_patterns_are_reported_on_their_own():
+    with pytest.raises(re.error) as raised:
+        TextNormalizer(patterns=[('analy(sis', 'analysis')])
+    assert raised.value.pattern == 'analy(sis'
+
+
+def test_load_rules_extends_the_defaults(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({
+        'translate': {'‘': "'"},
+        'ligatures': {'ﬅ': 'st'},
+        'patterns': [['analy\\s+sis', 'analysis', 'i']],
+    }), encoding='utf-8')
+    normalizer = TextNormalizer()
+    normalizer.load_rules(str(path))
+    assert normalizer("‘fa ﬅ’ ANALY SIS") == "'fast' analysis"
@@ -0,0 +1,134 @@
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import auth
+import user_store
+from user_store import UserStore
+
+
+def add_user(path, i):
+    return UserStore(path).add(f'user{i}', {'email': f'user{i}@example.com'})
+
+
+@pytest.fixture
+def legacy_json(tmp_path):
+    path = tmp_path / 'users.json'
+    path.write_text(json.dumps({
+        'alice': {'email': 'a@example.com', 'password': 'h1', 'created_at': '2024-01-01'},
+        'bob': {'email': 'b@example.com', 'password': 'h2', 'created_at': '2024-01-02'},
+    }))
+    return path
+
+
+def test_add_checks_username_then_email(tmp_path):
+    store = UserStore(tmp_path / 'users.db')
+    assert store.add('alice', {'email': 'a@example.com'}) is None
+    assert store.add('alice', {'email': 'other@example.com'}) == 'username'
+    assert store.add('bob', {'email': 'a@example.com'}) == 'email'
+    assert store.get('alice') == {'email': 'a@example.com'}
+    assert store.get('bob') is None
+
+
+def test_accounts_are_persisted(tmp_path):
+    path = tmp_path / 'users.db'
+    UserStore(path).add('alice', {'email': 'a@example.com', 'created_at': '2024-01-01'})
+    assert UserStore(path).get('alice') == {'email': 'a@example.com', 'created_at': '2024-01-01'}
+
+
+def test_a_sign_up_writes_only_its_own_row(tmp_path):
+    store = UserStore(tmp_path / 'users.db')
+    store.replace_all({f'user{i}': {'email': f'user{i}@example.com'} for i in range(2000)})
+    before = store._db.total_changes
+    assert store.add('alice', {'email': 'a@example.com'}) is None
+    # One inserted row, not a rewrite of every account.
+    assert store._db.total_changes - before == 1
+    assert store.add('user7', {'email': 'x@example.com'}) == 'username'
+    assert store._db.total_changes - before == 1
+
+
+def test_changes_by_another_process_are_picked_up(tmp_path):
+    path = tmp_path / 'users.db'
+    store = UserStore(path)
+    assert store.get('alice') is None
+    other = UserStore(path)
+    other.add('alice', {'email': 'a@example.com'})
+    assert store.get('alice') == {'email': 'a@example.com'}
+    assert store.add('bob', {'email': 'a@example.com'}) == 'email'
+
+
+def test_replace_all_rebuilds_the_email_index(tmp_path):
+    store = UserStore(tmp_path / 'users.db')
+    store.add('alice', {'email': 'a@example.com'})
+    store.replace_all({'bob': {'email': 'b@example.com'}})
+    assert store.all() == {'bob': {'email': 'b@example.com'}}
+    assert store.add('carol', {'email': 'a@example.com'}) is None
+    assert store.add('carol2', {'email': 'b@example.com'}) == 'email'
+
+
+def test_concurrent_sign_ups_from_threads_are_all_kept(tmp_path):
+    path = tmp_path / 'users.db'
+    store = UserStore(path)
+    threads = [threading.Thread(target=store.add, args=(f'user{i}', {'email': f'user{i}@example.com'}))
+               for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(UserStore(path).all()) == 20
+
+
+def test_concurrent_sign_ups_from_processes_are_all_kept(tmp_path):
+    path = str(tmp_path / 'users.db')
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(add_user, [path] * 12, range(12))) == [None] * 12
+    assert len(UserStore(path).all()) == 12
+
+
+def test_import_runs_once(tmp_path, legacy_json):
+    store = UserStore(tmp_path / 'users.db')
+    assert store.import_json(legacy_json) == 2
+    assert store.import_json(legacy_json) is None
+    assert store.all() == json.loads(legacy_json.read_text())
+    assert store.add('carol', {'email': 'b@example.com'}) == 'email'
+
+
+def test_migrate_command(tmp_path, legacy_json, capsys):
+    db_path = tmp_path / 'users.db'
+    assert user_store.main(['migrate', str(legacy_json), str(db_path)]) == 0
+    assert user_store.main(['migrate', str(legacy_json), str(db_path)]) == 1
+    assert 'Imported 2 accounts' in capsys.readouterr().out
+
+
+@pytest.fixture
+def users(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, '_user_store', UserStore(tmp_path / 'users.db'))
+
+
+def test_register_and_login(users):
+    assert auth.register_user('alice', 'a@example.com', 'secret1') == (True, "Registration successful!")
+    assert auth.register_user('alice', 'x@example.com', 'secret1') == (False, "Username already exists")
+    assert auth.register_user('alicia', 'a@example.com', 'secret1') == (False, "Email already registered")
+    assert auth.login_user('alice', 'secret1') == (True, "Login successful!")
+    assert auth.login_user('alice', 'wrong!!') == (False, "Incorrect password")
+    assert auth.login_user('nobody', 'secret1') == (False, "Username not found")
+    assert auth.load_users()['alice']['password'] == auth.hash_password('secret1')
+
+
+def test_legacy_accounts_are_imported_on_first_use(tmp_path, legacy_json, monkeypatch):
+    monkeypatch.setattr(auth, 'USERS_DB', tmp_path / 'users.db')
+    monkeypatch.setattr(auth, 'LEGACY_USERS_DB', legacy_json)
+    monkeypatch.setattr(auth, '_user_store', None)
+    assert auth.register_user('alice', 'new@example.com', 'secret1') == (False, "Username already exists")
+    assert set(auth.load_users()) == {'alice', 'bob'}
+
+
+@pytest.mark.parametrize('username, email, password, message', [
+    ('', 'a@example.com', 'secret1', "All fields are required"),
+    ('al', 'a@example.com', 'secret1', "Username must be at least 3 characters"),
+    ('alice', 'a@example.com', 'short', "Password must be at least 6 characters"),
+])
+def test_register_validates_fields(users, username, email, password, message):
+    assert auth.register_user(username, email, password) == (False, message)
@@ -0,0 +1,66 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import baseline
+from backend import main
+from backend.executor import AnalysisExecutor
+from backend.warmup import SAMPLE_DOCUMENT, WarmUp
+
+
+def test_steps_run_once_in_order():
+    calls = []
+    warmup = WarmUp()
+    assert warmup.state == 'pending' and not warmup.ready
+    warmup.run([lambda: calls.append(1), lambda: calls.append(2)])
+    warmup.run([lambda: calls.append(3)])
+    assert calls == [1, 2]
+    assert warmup.ready
+    status = warmup.status()
+    assert status['state'] == 'ready' and status['seconds'] >= 0
+
+
+def test_a_failed_step_does_not_block_traffic():
+    warmup = WarmUp()
+
+    def broken():
+        raise OSError("lexicon missing")
+
+    warmup.run([broken, lambda: None])
+    assert warmup.ready
+    assert warmup.status()['state'] == 'failed'
+    assert warmup.status()['error'] == "OSError: lexicon missing"
+
+
+def test_disabled_warmup_is_ready_and_never_runs():
+    warmup = WarmUp(enabled=False)
+    warmup.run([lambda: 1 / 0])
+    assert warmup.ready and warmup.status() == {'state': 'disabled'}
+
+
+def test_health_reports_warming_until_ready(monkeypatch):
+    warmup = WarmUp()
+    monkeypatch.setattr(main, 'warmup', warmup)
+    client = TestClient(main.app)
+
+    response = client.get('/health')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.json()['status'] == 'warming'
+
+    warmup.run([])
+    response = client.get('/health')
+    assert response.status_code == 200
+    assert response.json()['warmup']['state'] == 'ready'
+
+
+def test_warmup_steps_run_the_pipeline_on_the_sample(monkeypatch):
+    monkeypatch.setattr(main, 'analysis_executor', AnalysisExecutor(mode='thread', workers=2))
+    warmup = WarmUp()
+    warmup.run(main.warmup_steps())
+    assert warmup.status()['state'] == 'ready'
+    main.analysis_executor.shutdown()
+
+    body, error, _timings = main.analyze_to_json(SAMPLE_DOCUMENT)
+    assert error is None
+    assert json.loads(body) == baseline.analyze(SAMPLE_DOCUMENT)